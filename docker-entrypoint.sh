@@ -13,7 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-PLUGIN_OPTIONS=""
+# Use the templates compiled when the image was built. When run with --user,
+# the cache is read-only, and custom templates are compiled every time.
+PLUGIN_OPTIONS=",python-gapic-bytecode-cache=/usr/src/gapic-bytecode-cache"
 
 # Parse out options.
 while [ -n "$1" ]; do
@@ -0,0 +1,183 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import concurrent.futures
+import json
+import math
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import typing
+
+import click
+
+from google.protobuf.compiler import plugin_pb2
+
+from gapic.cli.generate import generate_response
+from gapic.utils import profile
+
+
+# What is measured of each run, and the units it is reported in.
+METRICS = {
+    'total': 'ms',
+    'build': 'ms',
+    'samples': 'ms',
+    'render': 'ms',
+    'pandoc': 'ms',
+    'peak_rss': 'MiB',
+    'allocated_blocks': 'blocks',
+}
+
+# The stages of a run which each span of its profile belongs to.
+_SPAN_METRICS = {
+    'generate': 'total',
+    'API.build': 'build',
+    'samples': 'samples',
+    'pandoc': 'pandoc',
+}
+
+
+@click.command()
+@click.argument('requests', nargs=-1, required=True,
+                type=click.Path(exists=True, dir_okay=False))
+@click.option('--runs', type=click.IntRange(min=1), default=5, show_default=True,
+              help='The number of times to generate each library.')
+@click.option('--output', type=click.File('w'),
+              help='Where to write the results, as JSON. They may be used '
+                   'as the --baseline of later runs.')
+@click.option('--baseline', type=click.File('r'),
+              help='The results of an earlier run, as written by --output, '
+                   'to compare with.')
+@click.option('--tolerance', type=click.FloatRange(min=0), default=0.1,
+              show_default=True,
+              help='The fraction by which a median may exceed its baseline '
+                   'before it counts as a regression.')
+def benchmark(
+        requests: typing.Sequence[str],
+        runs: int,
+        output: typing.Optional[typing.TextIO],
+        baseline: typing.Optional[typing.TextIO],
+        tolerance: float) -> None:
+    """Time the generator on `CodeGeneratorRequest`s.
+
+    Requests are serialized `CodeGeneratorRequest`s, as written by
+    `protoc-gen-dump`. Each run generates a library in a fresh process, as
+    protoc would, and reports the median and 95th percentile of each stage
+    (building the API schema, generating samples, rendering templates, and
+    running pandoc within them), the peak RSS, and the number of memory
+    blocks still allocated at the end.
+
+    With --baseline, this exits with an error if any median regresses.
+    """
+    baseline_results = json.load(baseline) if baseline else {}
+    results = {}
+    regressions = 0
+    for request_path in requests:
+        name = os.path.splitext(os.path.basename(request_path))[0]
+        measured = [measure(request_path) for _ in range(runs)]
+        results[name] = {
+            metric: {
+                'median': statistics.median(m[metric] for m in measured),
+                'p95': _percentile([m[metric] for m in measured], 95),
+            }
+            for metric in METRICS
+        }
+        regressions += _report(
+            name, runs, results[name], baseline_results.get(name), tolerance,
+        )
+
+    if output:
+        json.dump(results, output, indent=2, sort_keys=True)
+    if regressions:
+        click.secho(f'{regressions} regressions against the baseline.',
+                    err=True, fg='red')
+        sys.exit(1)
+
+
+def measure(request_path: str) -> typing.Dict[str, float]:
+    """Generate a library in a fresh process, returning the `METRICS` of it."""
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+        return executor.submit(_replay, request_path).result()
+
+
+def _replay(request_path: str) -> typing.Dict[str, float]:
+    """Generate a library in this process, returning what was measured."""
+    with open(request_path, 'rb') as f:
+        req = plugin_pb2.CodeGeneratorRequest.FromString(f.read())
+
+    # Profile the stages, but without tracing memory, which is costly.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = os.path.join(tmp_dir, 'profile.json')
+        with profile.profiling(report, trace_memory=False):
+            res = generate_response(req)
+        with open(report) as f:
+            events = json.load(f)['traceEvents']
+    if res.error:
+        raise click.ClickException(f'{request_path}: {res.error}')
+
+    answer = dict.fromkeys(METRICS, 0.0)
+    for event in events:
+        metric = _SPAN_METRICS.get(event['name'])
+        if event['cat'] == 'template':
+            metric = 'render'
+        if metric:
+            answer[metric] += event['dur'] / 1000
+
+    # Unlike the rest of the platforms, macOS reports bytes.
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    answer['peak_rss'] = rss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+    answer['allocated_blocks'] = sys.getallocatedblocks()
+    return answer
+
+
+def _percentile(values: typing.Sequence[float], percent: float) -> float:
+    """Return a percentile of the values, by the nearest-rank method."""
+    return sorted(values)[math.ceil(len(values) * percent / 100) - 1]
+
+
+def _report(
+        name: str,
+        runs: int,
+        results: typing.Dict[str, typing.Dict[str, float]],
+        baseline: typing.Optional[typing.Dict[str, typing.Dict[str, float]]],
+        tolerance: float) -> int:
+    """Print the results for a request, returning the number of regressions."""
+    click.echo(f'{name} ({runs} runs)')
+    click.echo(f'  {"":<24}{"median":>12}{"p95":>12}{"baseline":>12}{"change":>10}')
+    regressions = 0
+    for metric, unit in METRICS.items():
+        median, p95 = results[metric]['median'], results[metric]['p95']
+        line = f'  {f"{metric} ({unit})":<24}{median:>12.1f}{p95:>12.1f}'
+        previous = baseline[metric]['median'] if baseline and metric in baseline else None
+        if not previous:
+            click.echo(line)
+            continue
+
+        change = median / previous - 1
+        line += f'{previous:>12.1f}{change:>+10.1%}'
+        # A millisecond either way is noise, however short the stage.
+        if change > tolerance and median - previous > 1:
+            regressions += 1
+            click.secho(f'{line}  REGRESSION', fg='red')
+        else:
+            click.echo(line)
+    return regressions
+
+
+if __name__ == '__main__':
+    benchmark()
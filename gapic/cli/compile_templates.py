@@ -0,0 +1,46 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import typing
+
+import click
+
+from gapic import generator
+from gapic.utils import Options
+
+
+@click.command()
+@click.argument('cache_dir', type=click.Path(file_okay=False))
+@click.option('--templates', multiple=True, default=('DEFAULT', 'ads-templates'),
+              show_default=True,
+              help='A template directory to compile, as it would be passed '
+                   'to `python-gapic-templates`. May be given more than once; '
+                   'each directory is compiled on its own.')
+def compile_templates(cache_dir: str, templates: typing.Sequence[str]) -> None:
+    """Compile templates ahead of time into a bytecode cache.
+
+    Pass the same directory as `python-gapic-bytecode-cache` when generating
+    to skip compiling templates entirely.
+    """
+    for template_dir in templates:
+        opts = Options.build(
+            f'python-gapic-templates={template_dir},'
+            f'python-gapic-bytecode-cache={cache_dir}'
+        )
+        count = generator.Generator(opts).compile_templates()
+        click.echo(f'Compiled {count} templates from {opts.templates[0]}.')
+
+
+if __name__ == '__main__':
+    compile_templates()
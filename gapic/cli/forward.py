@@ -0,0 +1,74 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A protoc plugin which can forward its request to a generator server.
+
+It is installed as `protoc-gen-python_gapic_forward`. If `GAPIC_GENERATOR_SOCKET` names the socket of a running generator server
+(see `gapic.cli.serve`), the request is forwarded to it; otherwise it is
+handled in this process.
+
+This module deliberately imports nothing beyond the standard library until
+it knows the request must be handled locally, since avoiding those imports
+is much of what the server saves.
+"""
+
+import os
+import socket
+import sys
+
+
+def forward() -> None:
+    socket_path = os.environ.get('GAPIC_GENERATOR_SOCKET')
+
+    # Arguments are only used when debugging; always handle those locally.
+    if not socket_path or len(sys.argv) > 1:
+        from gapic.cli.generate import generate
+        generate()
+        return
+
+    request = sys.stdin.buffer.read()
+    response = _forward(socket_path, request)
+
+    # The generator always responds with at least its supported features,
+    # so an empty response means the server went away; handle it here.
+    if not response:
+        from google.protobuf.compiler import plugin_pb2
+        from gapic.cli.generate import generate_response
+        response = generate_response(
+            plugin_pb2.CodeGeneratorRequest.FromString(request),
+        ).SerializeToString()
+
+    sys.stdout.buffer.write(response)
+
+
+def _forward(socket_path: str, request: bytes) -> bytes:
+    """Send a request to the server, returning b'' if that is impossible.
+
+    The server handles the request in this process's working directory,
+    which is the one protoc was run in.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            sock.sendall(os.fsencode(os.getcwd()) + b'\0')
+            sock.sendall(request)
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile('rb') as response:
+                return response.read()
+    except OSError:
+        return b''
+
+
+if __name__ == '__main__':
+    forward()
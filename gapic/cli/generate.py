@@ -21,8 +21,11 @@ import click
 from google.protobuf.compiler import plugin_pb2
 
 from gapic import generator
+from gapic.generator import schema_cache
+from gapic.generator import writer
 from gapic.schema import api
 from gapic.utils import Options
+from gapic.utils import profile
 
 
 @click.command()
@@ -33,16 +36,97 @@ from gapic.utils import Options
 @click.option('--output', type=click.File('wb'), default=sys.stdout.buffer,
               help='Where to output the `CodeGeneratorResponse`. '
                    'Defaults to stdout.')
+@click.option('--output-dir', type=click.Path(file_okay=False),
+              help='Write the generated files under this directory, rather '
+                   'than outputting a `CodeGeneratorResponse`. Files whose '
+                   'content is unchanged are not rewritten, and files written '
+                   'by the previous run which are no longer generated are '
+                   'removed.')
+@click.option('--output-srcjar', type=click.Path(dir_okay=False),
+              help='Write the generated files to this zip file (such as a '
+                   '.srcjar), rather than outputting a '
+                   '`CodeGeneratorResponse`. It is only rewritten if its '
+                   'content changes.')
+@click.option('--changed-files', type=click.File('w'),
+              help='Where to list the generated files which were written '
+                   'or removed by --output-dir or --output-srcjar, one path '
+                   'per line.')
 def generate(
         request: typing.BinaryIO,
-        output: typing.BinaryIO) -> None:
+        output: typing.BinaryIO,
+        output_dir: typing.Optional[str],
+        output_srcjar: typing.Optional[str],
+        changed_files: typing.Optional[typing.TextIO]) -> None:
     """Generate a full API client description."""
+    if output_dir and output_srcjar:
+        raise click.UsageError(
+            '--output-dir and --output-srcjar are mutually exclusive.')
+    if changed_files and not (output_dir or output_srcjar):
+        raise click.UsageError(
+            '--changed-files requires --output-dir or --output-srcjar.')
+
     # Load the protobuf CodeGeneratorRequest.
     req = plugin_pb2.CodeGeneratorRequest.FromString(request.read())
+    opts = _build_options(req)
+    with profile.profiling(opts.profile):
+        api_schema = _build_api(req, opts)
+        gen = generator.Generator(opts)
+
+        # Write the files directly, if asked to.
+        if output_dir:
+            changed = writer.write_directory(
+                gen.get_files(api_schema, opts), output_dir)
+        elif output_srcjar:
+            changed = writer.write_srcjar(
+                gen.get_files(api_schema, opts), output_srcjar)
+        else:
+            # Translate into a protobuf CodeGeneratorResponse, and output it
+            # serialized, a file at a time, as the files are rendered.
+            gen.write_response(api_schema, opts, output)
+            return
+
+        if changed_files:
+            changed_files.writelines(f'{name}\n' for name in changed)
+
+
+def generate_response(
+        req: plugin_pb2.CodeGeneratorRequest,
+        bytecode_cache: typing.Optional[str] = None,
+) -> plugin_pb2.CodeGeneratorResponse:
+    """Return the response to a single `CodeGeneratorRequest`.
+
+    Args:
+        req (~.plugin_pb2.CodeGeneratorRequest): The request.
+        bytecode_cache (Optional[str]): A bytecode cache to use for
+            compiled templates, unless the request names its own.
+    """
+    opts = _build_options(req, bytecode_cache)
+    with profile.profiling(opts.profile):
+        api_schema = _build_api(req, opts)
 
+        # Translate into a protobuf CodeGeneratorResponse; this reads the
+        # individual templates and renders them.
+        # If there are issues, error out appropriately.
+        return generator.Generator(opts).get_response(api_schema, opts)
+
+
+def _build_options(
+        req: plugin_pb2.CodeGeneratorRequest,
+        bytecode_cache: typing.Optional[str] = None,
+) -> Options:
+    """Return the options of a `CodeGeneratorRequest`."""
     # Pull apart arguments in the request.
-    opts = Options.build(req.parameter)
+    parameter = req.parameter
+    if bytecode_cache and 'python-gapic-bytecode-cache=' not in parameter:
+        parameter = ','.join(filter(None, (
+            parameter,
+            f'python-gapic-bytecode-cache={bytecode_cache}',
+        )))
+    return Options.build(parameter)
+
 
+def _build_api(req: plugin_pb2.CodeGeneratorRequest, opts: Options) -> api.API:
+    """Return the API schema of a `CodeGeneratorRequest`."""
     # Determine the appropriate package.
     # This generator uses a slightly different mechanism for determining
     # which files to generate; it tracks at package level rather than file
@@ -56,15 +140,11 @@ def generate(
     # Build the API model object.
     # This object is a frozen representation of the whole API, and is sent
     # to each template in the rendering step.
-    api_schema = api.API.build(req.proto_file, opts=opts, package=package)
-
-    # Translate into a protobuf CodeGeneratorResponse; this reads the
-    # individual templates and renders them.
-    # If there are issues, error out appropriately.
-    res = generator.Generator(opts).get_response(api_schema, opts)
-
-    # Output the serialized response.
-    output.write(res.SerializeToString())
+    with profile.span('API.build', 'stage', cached=bool(opts.schema_cache)):
+        if opts.schema_cache:
+            return schema_cache.SchemaCache(opts.schema_cache).build(
+                req.proto_file, opts=opts, package=package)
+        return api.API.build(req.proto_file, opts=opts, package=package)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+import sys
+import tempfile
+import traceback
+import typing
+
+import click
+
+from google.protobuf.compiler import plugin_pb2
+
+from gapic.cli.generate import generate_response
+from gapic.generator import writer
+
+
+@click.command()
+@click.argument('requests', nargs=-1,
+                type=click.Path(exists=True, dir_okay=False))
+@click.option('--manifest', type=click.File('r'),
+              help='A file listing further `CodeGeneratorRequest`s to '
+                   'generate, one path per line.')
+@click.option('--output-dir', required=True, type=click.Path(file_okay=False),
+              help='Where to write the generated libraries. Each library is '
+                   'written to a directory named after its request file, so '
+                   'request files must have distinct names; files whose '
+                   'content is unchanged are not rewritten.')
+@click.option('--jobs', type=click.IntRange(min=1), default=1, show_default=True,
+              help='The number of requests to generate at once.')
+def generate_batch(
+        requests: typing.Sequence[str],
+        manifest: typing.Optional[typing.TextIO],
+        output_dir: str,
+        jobs: int) -> None:
+    """Generate client libraries for many `CodeGeneratorRequest`s at once.
+
+    Requests are serialized `CodeGeneratorRequest`s, as written by
+    `protoc-gen-dump`. Generating them in one process means the generator
+    is only started, and its templates only compiled, once. Each API's
+    schema is still built on its own, dependency protos included, since
+    their models are bound to the naming of the API importing them.
+    """
+    request_paths = list(requests)
+    if manifest:
+        request_paths.extend(line.strip() for line in manifest if line.strip())
+
+    # Each library's directory is named after its request file, so two
+    # requests with the same name would overwrite one another.
+    library_dirs: typing.Dict[str, str] = {}
+    for request_path in request_paths:
+        name = os.path.splitext(os.path.basename(request_path))[0]
+        if name in library_dirs:
+            raise click.UsageError(
+                f'{library_dirs[name]} and {request_path} would both be '
+                f'written to {os.path.join(output_dir, name)}; rename one.')
+        library_dirs[name] = request_path
+
+    with tempfile.TemporaryDirectory() as bytecode_cache:
+        generate = functools.partial(
+            _generate, output_dir=output_dir, bytecode_cache=bytecode_cache,
+        )
+        if jobs > 1:
+            # Fall back to the platform default (spawn) where forking is
+            # unavailable.
+            mp_context: typing.Any = multiprocessing.get_context()
+            if 'fork' in multiprocessing.get_all_start_methods():
+                mp_context = multiprocessing.get_context('fork')
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=jobs, mp_context=mp_context,
+            )
+            with executor:
+                errors = list(executor.map(generate, request_paths))
+        else:
+            errors = [generate(path) for path in request_paths]
+
+    failures = 0
+    for request_path, error in zip(request_paths, errors):
+        if error:
+            failures += 1
+            click.secho(f'{request_path}: {error}', err=True, fg='red')
+    click.echo(f'Generated {len(request_paths) - failures} of '
+               f'{len(request_paths)} libraries.')
+    if failures:
+        sys.exit(1)
+
+
+def _generate(request_path: str, *, output_dir: str, bytecode_cache: str) -> str:
+    """Generate a single library, returning an error message if it fails."""
+    try:
+        with open(request_path, 'rb') as f:
+            req = plugin_pb2.CodeGeneratorRequest.FromString(f.read())
+        res = generate_response(req, bytecode_cache)
+    except Exception:
+        return traceback.format_exc()
+    if res.error:
+        return res.error
+
+    library_dir = os.path.join(
+        output_dir, os.path.splitext(os.path.basename(request_path))[0])
+    writer.write_directory(res.file, library_dir)
+    return ''
+
+
+if __name__ == '__main__':
+    generate_batch()
@@ -0,0 +1,139 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A long-lived generator process that serves requests over a Unix socket.
+
+Each connection carries the client's working directory, a NUL byte, and
+exactly one serialized `CodeGeneratorRequest` (terminated by the client
+shutting down its end of the socket), and is answered with a serialized
+`CodeGeneratorResponse`. Requests are handled in processes forked from the
+server, so they start with every module imported and every template
+compiled, and never affect one another.
+
+Each request is handled in the client's working directory, so that the
+files named by relative paths in its options are the ones protoc meant.
+"""
+
+import os
+import signal
+import socket
+import socketserver
+import tempfile
+import traceback
+import typing
+
+import click
+
+from google.protobuf.compiler import plugin_pb2
+
+from gapic import generator
+from gapic.cli.generate import generate_response
+from gapic.utils import Options
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: 'Server'
+
+    def handle(self) -> None:
+        try:
+            cwd, _, request = self.rfile.read().partition(b'\0')
+            os.chdir(os.fsdecode(cwd))
+            req = plugin_pb2.CodeGeneratorRequest.FromString(request)
+            res = generate_response(req, self.server.bytecode_cache)
+        except Exception:
+            # Report failures to protoc, just as the plugin itself would.
+            res = plugin_pb2.CodeGeneratorResponse(
+                error=traceback.format_exc(),
+            )
+        self.wfile.write(res.SerializeToString())
+
+
+class Server(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """Serves `CodeGeneratorRequest`s over a Unix socket.
+
+    The given template directories are compiled into the bytecode cache
+    before the server starts listening.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            bytecode_cache: str,
+            templates: typing.Sequence[str]) -> None:
+        self.path = path
+        self.bytecode_cache = bytecode_cache
+        for template_dir in templates:
+            opts = Options.build(
+                f'python-gapic-templates={template_dir},'
+                f'python-gapic-bytecode-cache={bytecode_cache}'
+            )
+            generator.Generator(opts).compile_templates()
+        super().__init__(path, _Handler)
+
+    def server_bind(self) -> None:
+        super().server_bind()
+        # Requests run code as this user, in any directory they name, so
+        # only this user may connect.
+        os.chmod(self.path, 0o600)
+
+
+@click.command()
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False),
+              envvar='GAPIC_GENERATOR_SOCKET', required=True, show_envvar=True,
+              help='The Unix socket on which to listen for requests.')
+@click.option('--bytecode-cache', type=click.Path(file_okay=False),
+              help='Where to keep compiled templates. '
+                   'Defaults to a temporary directory.')
+@click.option('--templates', multiple=True, default=('DEFAULT', 'ads-templates'),
+              show_default=True,
+              help='A template directory to compile on startup. '
+                   'May be given more than once.')
+def serve(
+        socket_path: str,
+        bytecode_cache: typing.Optional[str],
+        templates: typing.Sequence[str]) -> None:
+    """Serve `CodeGeneratorRequest`s over a Unix socket.
+
+    Use `protoc-gen-python_gapic_forward` as the plugin, and point it at
+    the same socket using the `GAPIC_GENERATOR_SOCKET` environment
+    variable, to have it forward its requests here.
+    """
+    # Refuse to take over a socket another server is listening on; a socket
+    # nobody is listening on was left behind, and can be replaced.
+    if os.path.exists(socket_path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(socket_path)
+            except OSError:
+                os.unlink(socket_path)
+            else:
+                raise click.ClickException(
+                    f'A server is already listening on {socket_path}.')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with Server(socket_path, bytecode_cache or tmp_dir, templates) as server:
+            click.echo(f'Listening on {socket_path}.')
+
+            # Shut down cleanly when terminated, as well as when interrupted.
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os.unlink(socket_path)
+
+
+if __name__ == '__main__':
+    serve()
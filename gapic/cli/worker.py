@@ -0,0 +1,204 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A Bazel persistent worker which generates client libraries.
+
+Every work request runs ``protoc`` with the arguments below, writing the
+generated library to a srcjar. The plugin ``protoc`` runs is a thin shim
+(see `gapic.cli.forward`) which forwards each request to a generator
+server (see `gapic.cli.serve`) that lives as long as the worker, so actions
+never pay to start the generator or compile its templates.
+
+Bazel may send several work requests at once (multiplex workers); they
+are handled concurrently, each in its own ``protoc`` process.
+
+Run without ``--persistent_worker``, the worker handles the single request
+given by its arguments, which is what Bazel does when workers are disabled.
+"""
+
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import traceback
+import typing
+
+import click
+
+
+@click.command()
+@click.option('--protoc', required=True, type=click.Path(dir_okay=False),
+              help='The protoc binary.')
+@click.option('--proto_path', multiple=True,
+              help='A directory in which to search for imports.')
+@click.option('--opt', multiple=True,
+              help='An option for the generator, as for `--python_gapic_opt`.')
+@click.option('--output', required=True, type=click.Path(dir_okay=False),
+              help='Where to write the generated srcjar.')
+@click.argument('sources', nargs=-1, required=True)
+@click.pass_obj
+def _generate_srcjar(
+        obj: typing.Mapping[str, typing.Any],
+        protoc: str,
+        proto_path: typing.Sequence[str],
+        opt: typing.Sequence[str],
+        output: str,
+        sources: typing.Sequence[str]) -> str:
+    """Generate a client library from the given protos into a srcjar."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # protoc writes a zip archive when its output ends with `.zip`.
+        zip_path = os.path.join(tmp_dir, 'out.zip')
+        args = [
+            protoc,
+            f'--plugin=protoc-gen-python_gapic={obj["plugin"]}',
+            f'--python_gapic_out={zip_path}',
+            '--experimental_allow_proto3_optional',
+        ]
+        args.extend(f'--python_gapic_opt={o}' for o in opt)
+        args.extend(f'--proto_path={p}' for p in proto_path)
+        args.extend(sources)
+
+        proc = subprocess.run(
+            args, env=obj['env'], stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True,
+        )
+        if proc.returncode:
+            raise click.ClickException(
+                f'{proc.stdout}protoc exited with status {proc.returncode}.')
+        shutil.move(zip_path, output)
+        return proc.stdout
+
+
+def _handle(arguments: typing.Sequence[str], obj: typing.Mapping[str, typing.Any]) -> typing.Tuple[int, str]:
+    """Handle a single work request, returning its exit code and output."""
+    args: typing.List[str] = []
+    for arg in arguments:
+        # Bazel passes most arguments in a file, named by a leading `@`.
+        if arg.startswith('@'):
+            with open(arg[1:]) as f:
+                args.extend(f.read().splitlines())
+        else:
+            args.append(arg)
+
+    try:
+        output = _generate_srcjar.main(
+            args, obj=obj, standalone_mode=False, prog_name='gapic-worker',
+        )
+    except click.ClickException as e:
+        return e.exit_code, e.format_message()
+    except Exception:
+        # Bazel waits for a response to every request, so always send one.
+        return 1, traceback.format_exc()
+    return 0, output
+
+
+def _write_plugin(path: str) -> None:
+    """Write an executable which runs the forwarding plugin shim."""
+    with open(path, 'w') as f:
+        f.write('\n'.join((
+            f'#!{sys.executable}',
+            'import sys',
+            f'sys.path[:0] = {sys.path!r}',
+            'from gapic.cli.forward import forward',
+            'forward()',
+            '',
+        )))
+    os.chmod(path, 0o755)
+
+
+@click.command(context_settings={'ignore_unknown_options': True})
+@click.option('--persistent_worker', is_flag=True,
+              help='Serve work requests from Bazel on stdin.')
+@click.argument('arguments', nargs=-1, type=click.UNPROCESSED)
+def worker(persistent_worker: bool, arguments: typing.Sequence[str]) -> None:
+    """Generate client libraries as a Bazel persistent worker."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        obj: typing.Dict[str, typing.Any] = {
+            'env': dict(os.environ),
+            'plugin': os.path.join(tmp_dir, 'plugin'),
+        }
+        _write_plugin(obj['plugin'])
+
+        if not persistent_worker:
+            # Without a server, the plugin generates in its own process.
+            obj['env'].pop('GAPIC_GENERATOR_SOCKET', None)
+            exit_code, output = _handle(arguments, obj)
+            if output:
+                click.echo(output.rstrip('\n'), err=True)
+            sys.exit(exit_code)
+
+        # Start listening before any work arrives, and fork the server
+        # before any threads are started.
+        from gapic.cli.serve import Server
+        socket_path = os.path.join(tmp_dir, 'gapic.sock')
+        server = Server(
+            socket_path,
+            os.path.join(tmp_dir, 'bytecode'),
+            ('DEFAULT', 'ads-templates'),
+        )
+        server_process = multiprocessing.get_context('fork').Process(
+            target=server.serve_forever, daemon=True,
+        )
+        server_process.start()
+        obj['env']['GAPIC_GENERATOR_SOCKET'] = socket_path
+
+        # Bazel speaks to the worker over stdin and stdout; anything else
+        # written to stdout would corrupt the protocol.
+        responses = sys.stdout
+        sys.stdout = sys.stderr
+        lock = threading.Lock()
+
+        def respond(request: typing.Mapping[str, typing.Any]) -> None:
+            exit_code, output = _handle(request.get('arguments', ()), obj)
+            response = {
+                'exitCode': exit_code,
+                'output': output,
+                'requestId': request.get('requestId', 0),
+            }
+            with lock:
+                responses.write(json.dumps(response) + '\n')
+                responses.flush()
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor() as executor:
+                for line in sys.stdin:
+                    request = json.loads(line)
+
+                    # Singleplex requests (which have no ID) are handled one
+                    # at a time; Bazel never sends another until it is done.
+                    if request.get('requestId'):
+                        executor.submit(respond, request)
+                    else:
+                        respond(request)
+        finally:
+            server_process.terminate()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    # Use the pandoc binary bundled alongside the generator by Bazel, as
+    # generate_with_pandoc.py does.
+    pandoc = os.path.join(
+        os.path.abspath(__file__).rsplit("gapic", 1)[0], "pandoc")
+    if os.path.exists(pandoc):
+        os.environ['PYPANDOC_PANDOC'] = pandoc
+        os.environ['LC_ALL'] = 'C.UTF-8'
+        os.environ['PYTHONNOUSERSITE'] = 'True'
+
+    worker()
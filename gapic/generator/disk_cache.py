@@ -0,0 +1,134 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Helpers shared by the generator's on-disk caches.
+
+The caches keep one file per entry, named by a digest, in a directory
+which concurrent runs of the generator may share.
+"""
+
+import functools
+import hashlib
+import os
+import pathlib
+import tempfile
+from typing import List, Tuple
+
+
+def digest(*parts: str) -> str:
+    """Return a hex digest of the given strings, taken in order."""
+    answer = hashlib.sha256()
+    for part in parts:
+        answer.update(part.encode('utf8'))
+        answer.update(b'\0')
+    return answer.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def generator_digest() -> str:
+    """Return a digest of the generator's own source code.
+
+    This is stricter than the package version, and so also keeps caches
+    correct while the generator itself is being worked on.
+    """
+    gapic_root = pathlib.Path(__file__).parent.parent
+    return digest(*(
+        f'{path.relative_to(gapic_root)}\0{path.read_text()}'
+        for path in sorted(gapic_root.rglob('*.py'))
+    ))
+
+
+def write_atomically(path: pathlib.Path, data: bytes) -> None:
+    """Write a file such that concurrent readers never see partial content.
+
+    The file gets the permissions of any other new file, rather than the
+    private ones of a temporary file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o666 & ~_umask())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def store(path: pathlib.Path, data: bytes) -> None:
+    """Write a cache entry, unless the cache cannot be written.
+
+    A cache may be shared with users who cannot write to it (for instance,
+    in a Docker image run with ``--user``). Entries missing from it are
+    then computed every time instead.
+    """
+    try:
+        write_atomically(path, data)
+    except OSError:
+        pass
+
+
+def touch(path: pathlib.Path) -> None:
+    """Mark an entry as recently used.
+
+    It may have just been evicted by another run, in which case it is
+    simply written again next time.
+    """
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune(path: pathlib.Path, max_size: int) -> int:
+    """Evict the least recently used entries of a cache until it fits.
+
+    Args:
+        path (pathlib.Path): The cache's directory.
+        max_size (int): The total size of the entries, in bytes, to
+            evict down to.
+
+    Returns:
+        int: The number of entries evicted.
+    """
+    entries: List[Tuple[float, int, pathlib.Path]] = []
+    # Entry names start with digests; anything else is a concurrent write.
+    for entry in path.glob(f'*/{"[0-9a-f]" * 64}*'):
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+
+    size = sum(entry_size for _, entry_size, _ in entries)
+    evicted = 0
+    for _, entry_size, entry in sorted(entries):
+        if size <= max_size:
+            break
+        try:
+            entry.unlink()
+            evicted += 1
+        except OSError:
+            pass
+        size -= entry_size
+    return evicted
+
+
+@functools.lru_cache(maxsize=None)
+def _umask() -> int:
+    # The umask can only be read by setting it, so only do so once.
+    answer = os.umask(0)
+    os.umask(answer)
+    return answer
@@ -12,7 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import re
+from typing import Iterable, Iterator, List, Optional
+
+
+# The starts of the lines which blank lines before definitions are fixed for.
+_TOP_LEVEL = ('class', 'def', '@', '#', '_')
+_NESTED = ('_', '@', '#')
 
 
 def fix_whitespace(code: str) -> str:
@@ -28,14 +33,82 @@ def fix_whitespace(code: str) -> str:
     Returns
         str: Formatted code.
     """
-    # Remove trailing whitespace from any line.
-    code = re.sub(r'[ ]+\n', '\n', code)
+    return ''.join(fix_whitespace_stream((code,)))
 
-    # Ensure at most two blank lines before top level definitions.
-    code = re.sub(r'\s+\n\s*\n\s*\n(class|def|@|#|_)', r'\n\n\n\1', code)
 
-    # Ensure at most one line before nested definitions.
-    code = re.sub(r'\s+\n\s*\n((    )+)(\w|_|@|#)', r'\n\n\1\3', code)
+def fix_whitespace_stream(chunks: Iterable[str]) -> Iterator[str]:
+    """Perform :func:`fix_whitespace` on code which arrives in pieces.
+
+    This works a line at a time, and in a single pass: the output is
+    produced as soon as the blank lines after each line are known. The
+    chunks may break lines anywhere, as template streams do.
+
+    Args:
+        chunks (Iterable[str]): The pieces of code to be formatted.
+
+    Yields:
+        str: Pieces of the formatted code.
+    """
+    # The whitespace which separates the last line with any code from the
+    # next, which depends on what the next line holds: the trailing
+    # whitespace of that line (if any), followed by blank lines.
+    trailing: Optional[str] = None
+    blank: List[str] = []
+    partial = ''
+    for chunk in chunks:
+        lines = (partial + chunk).split('\n')
+        partial = lines.pop()
+        out = []
+        for line in lines:
+            # Remove trailing spaces from any line.
+            line = line.rstrip(' ')
+            if not line or line.isspace():
+                blank.append(line)
+                continue
+            if blank or trailing:
+                out.append(_separator(trailing, blank, line))
+                blank = []
+            elif trailing is not None:
+                # Consecutive lines of code; by far the most common case.
+                out.append('\n')
+            code = line.rstrip()
+            out.append(code)
+            trailing = line[len(code):]
+        if out:
+            yield ''.join(out)
 
     # All files shall end in one and exactly one line break.
-    return f'{code.rstrip()}\n'
+    if partial and not partial.isspace():
+        yield _separator(trailing, blank, partial) + partial.rstrip()
+    yield '\n'
+
+
+def _separator(trailing: Optional[str], blank: List[str], line: str) -> str:
+    """Return the whitespace which should precede a line with code.
+
+    Args:
+        trailing (Optional[str]): The trailing whitespace of the previous
+            line with code, or None at the start of the file.
+        blank (List[str]): The whitespace-only lines in between.
+        line (str): The line with code.
+    """
+    # The whitespace between the code, and the number of line breaks
+    # in it, not counting one at its very start.
+    whitespace = ('' if trailing is None else trailing + '\n') + '\n'.join(
+        blank) + ('\n' if blank else '')
+    breaks = len(blank) + (trailing is not None) - whitespace.startswith('\n')
+
+    code = line.lstrip()
+    indent = line[:len(line) - len(code)]
+
+    # Ensure at most two blank lines before top level definitions.
+    if not indent:
+        if breaks >= 3 and code.startswith(_TOP_LEVEL):
+            return '\n\n\n'
+        return whitespace
+
+    # Ensure at most one line before nested definitions.
+    if breaks >= 2 and len(indent) % 4 == 0 and not indent.strip(' ') and (
+            code[0].isalnum() or code.startswith(_NESTED)):
+        return '\n\n'
+    return whitespace
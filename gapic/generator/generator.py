@@ -12,14 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
 import jinja2
 import yaml
 import itertools
+import multiprocessing
 import re
 import os
+import sys
 import pathlib
 import typing
-from typing import Any, DefaultDict, Dict, Mapping, Optional, Tuple
+from typing import Any, DefaultDict, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
 from hashlib import sha256
 from collections import OrderedDict, defaultdict
 from gapic.samplegen_utils.utils import coerce_response_name, is_valid_sample_cfg, render_format_string
@@ -27,9 +30,12 @@ from gapic.samplegen_utils.types import DuplicateSample
 from gapic.samplegen_utils import snippet_index, snippet_metadata_pb2
 from gapic.samplegen import manifest, samplegen
 from gapic.generator import formatter
+from gapic.generator import render_cache
+from gapic.generator import rst_cache
 from gapic.schema import api
 from gapic import utils
 from gapic.utils import Options
+from gapic.utils import profile
 from google.protobuf.compiler.plugin_pb2 import CodeGeneratorResponse
 
 
@@ -49,8 +55,18 @@ class Generator:
 
     def __init__(self, opts: Options) -> None:
       # Create the jinja environment with which to render templates.
+        # Compiled templates may optionally be cached across runs; jinja
+        # checks the template source before reusing cached bytecode.
+        bytecode_cache = None
+        if opts.bytecode_cache:
+            try:
+                os.makedirs(opts.bytecode_cache, exist_ok=True)
+            except OSError:
+                pass
+            bytecode_cache = _BytecodeCache(directory=opts.bytecode_cache)
         self._env = jinja2.Environment(
             loader=jinja2.FileSystemLoader(searchpath=opts.templates),
+            bytecode_cache=bytecode_cache,
             undefined=jinja2.StrictUndefined,
             extensions=["jinja2.ext.do"],
             trim_blocks=True,
@@ -58,13 +74,23 @@ class Generator:
         )
 
         # Add filters which templates require.
-        self._env.filters["rst"] = utils.rst
-        self._env.filters["snake_case"] = utils.to_snake_case
-        self._env.filters["camel_case"] = utils.to_camel_case
-        self._env.filters["sort_lines"] = utils.sort_lines
-        self._env.filters["wrap"] = utils.wrap
-        self._env.filters["coerce_response_name"] = coerce_response_name
-        self._env.filters["render_format_string"] = render_format_string
+        # They are all pure, and templates call them with the same arguments
+        # over and over (e.g. `method.name|snake_case`), so they are memoized.
+        self._filters: Dict[str, utils.memoize] = {
+            "rst": utils.memoize(utils.rst),
+            "snake_case": utils.memoize(utils.to_snake_case),
+            "camel_case": utils.memoize(utils.to_camel_case),
+            "sort_lines": utils.memoize(utils.sort_lines),
+            "wrap": utils.memoize(utils.wrap),
+            "coerce_response_name": utils.memoize(coerce_response_name),
+            "render_format_string": utils.memoize(render_format_string),
+        }
+        self._env.filters.update(self._filters)
+        if opts.profile:
+            self._env.filters.update(
+                (name, profile.profiled(f"filter:{name}", fx))
+                for name, fx in self._filters.items()
+            )
 
         # Add tests to determine type of expressions stored in strings
         self._env.tests["str_field_pb"] = utils.is_str_field_pb
@@ -72,6 +98,33 @@ class Generator:
 
         self._sample_configs = opts.sample_configs
 
+        # Optionally reuse files rendered by previous runs.
+        self._render_cache: Optional[render_cache.RenderCache] = None
+        if opts.render_cache:
+            self._render_cache = render_cache.RenderCache(
+                opts.render_cache, self._env, opts,
+            )
+
+        # Optionally reuse docstrings converted by previous runs.
+        self._rst_cache: Optional[rst_cache.RstCache] = None
+        if opts.rst_cache:
+            self._rst_cache = rst_cache.RstCache(opts.rst_cache)
+
+    def compile_templates(self) -> int:
+        """Compile every template, populating the bytecode cache.
+
+        This allows the bytecode cache to be built ahead of time (for
+        instance, when the generator is installed), so that later runs
+        never need to compile templates at all.
+
+        Returns:
+            int: The number of templates compiled.
+        """
+        template_names = self._env.list_templates(extensions=("j2",))
+        for template_name in template_names:
+            self._env.get_template(template_name)
+        return len(template_names)
+
     def get_response(
         self, api_schema: api.API, opts: Options
     ) -> CodeGeneratorResponse:
@@ -88,7 +141,81 @@ class Generator:
             ~.CodeGeneratorResponse: A response describing appropriate
             files and contents. See ``plugin.proto``.
         """
-        output_files: Dict[str, CodeGeneratorResponse.File] = OrderedDict()
+        res = CodeGeneratorResponse(
+            file=list(self.get_files(api_schema, opts)))  # type: ignore
+        res.supported_features |= CodeGeneratorResponse.Feature.FEATURE_PROTO3_OPTIONAL  # type: ignore
+        return res
+
+    def write_response(
+        self, api_schema: api.API, opts: Options, output: typing.BinaryIO,
+    ) -> None:
+        """Write the serialized :class:`~.CodeGeneratorResponse` to a stream.
+
+        This writes exactly the bytes of the serialized :meth:`get_response`,
+        but writes each file as soon as it is rendered, so that only one
+        file of the library (besides its samples) is held at a time.
+
+        Args:
+            api_schema (~api.API): An API schema object.
+            opts (~.options.Options): An options instance.
+            output (BinaryIO): The stream to write the response to.
+        """
+        # Serialized messages may be concatenated, and the fields of the
+        # response are serialized in order: its features, then its files.
+        header = CodeGeneratorResponse(
+            supported_features=CodeGeneratorResponse.Feature.FEATURE_PROTO3_OPTIONAL,  # type: ignore
+        )
+        output.write(header.SerializeToString())
+        for cgr_file in self.get_files(api_schema, opts):
+            output.write(CodeGeneratorResponse(
+                file=[cgr_file]).SerializeToString())  # type: ignore
+
+    def get_files(
+        self, api_schema: api.API, opts: Options
+    ) -> Iterator[CodeGeneratorResponse.File]:
+        """Yield the files of the response, in order, as they are rendered.
+
+        Args:
+            api_schema (~api.API): An API schema object.
+            opts (~.options.Options): An options instance.
+
+        Yields:
+            ~.CodeGeneratorResponse.File: The files of the response.
+        """
+        # Convert the API's docstrings in bulk, rather than running pandoc
+        # for each of them in turn.
+        with utils.batch_rst(_docstrings(api_schema), cache=self._rst_cache):
+            yield from self._render_files(api_schema, opts)
+
+        # Worker processes share the cache directory, so this evicts what
+        # they stored too.
+        if self._render_cache:
+            self._render_cache.prune()
+
+        cache = self._rst_cache
+        if cache and (cache.hits or cache.misses or cache.errors):
+            evicted = cache.prune() if cache.misses or cache.errors else 0
+            print(
+                f"python-gapic-rst-cache: {cache.hits} hits, "
+                f"{cache.misses} misses, {cache.errors} unreadable, "
+                f"{evicted} evicted",
+                file=sys.stderr,
+            )
+
+        # Worker processes have filters of their own, so (with `jobs`)
+        # these only count the calls made by this process.
+        if opts.filter_stats:
+            for name, memoized in sorted(self._filters.items()):
+                rate = memoized.hits / memoized.calls if memoized.calls else 0
+                print(
+                    f"python-gapic-filter-stats: {name}: {memoized.calls} "
+                    f"calls, {memoized.hits} hits ({rate:.0%})",
+                    file=sys.stderr,
+                )
+
+    def _render_files(
+        self, api_schema: api.API, opts: Options
+    ) -> Iterator[CodeGeneratorResponse.File]:
         sample_templates, client_templates = utils.partition(
             lambda fname: os.path.basename(
                 fname) == samplegen.DEFAULT_TEMPLATE_NAME,
@@ -98,36 +225,65 @@ class Generator:
         # We generate code snippets *before* the library code so snippets
         # can be inserted into method docstrings.
         snippet_idx = snippet_index.SnippetIndex(api_schema)
+        sample_output: Dict[str, CodeGeneratorResponse.File] = {}
         if sample_templates:
-            sample_output, snippet_idx = self._generate_samples_and_manifest(
-                api_schema, snippet_idx, self._env.get_template(
-                    sample_templates[0]),
-                opts=opts,
-            )
-            output_files.update(sample_output)
+            with profile.span("samples", "stage"):
+                sample_output, snippet_idx = self._generate_samples_and_manifest(
+                    api_schema, snippet_idx, self._env.get_template(
+                        sample_templates[0]),
+                    opts=opts,
+                )
 
         # Iterate over each template and add the appropriate output files
         # based on that template.
         # Sample templates work differently: there's (usually) only one,
         # and instead of iterating over it/them, we iterate over samples
         # and plug those into the template.
+        render_jobs = []
         for template_name in client_templates:
             # Quick check: Skip "private" templates.
             filename = template_name.split("/")[-1]
             if filename.startswith("_") and filename != "__init__.py.j2":
                 continue
 
-            # Append to the output files dictionary.
-            output_files.update(
-                self._render_template(
-                    template_name, api_schema=api_schema, opts=opts, snippet_index=snippet_idx)
+            render_jobs.extend(
+                self._get_render_jobs(
+                    template_name, api_schema=api_schema, opts=opts)
             )
 
-        # Return the CodeGeneratorResponse output.
-        res = CodeGeneratorResponse(
-            file=[i for i in output_files.values()])  # type: ignore
-        res.supported_features |= CodeGeneratorResponse.Feature.FEATURE_PROTO3_OPTIONAL  # type: ignore
-        return res
+        # Several jobs may render the same file (for instance, `%name` and
+        # `%name_%version` coincide for unversioned APIs). The last rendering
+        # which is not empty wins, in the place of the first. Rendering the
+        # jobs for each file together means files can be yielded one by one.
+        jobs_by_filename: Dict[str, List[_RenderJob]] = OrderedDict()
+        for job in render_jobs:
+            jobs_by_filename.setdefault(
+                self._get_job_filename(job, api_schema=api_schema), [],
+            ).append(job)
+        render_jobs = list(itertools.chain(*jobs_by_filename.values()))
+
+        # Render the templates, either serially in this process or fanned
+        # out over a pool of worker processes. Either way, the results come
+        # back in job order, so the response is identical.
+        rendered: Iterator[Dict[str, CodeGeneratorResponse.File]]
+        if opts.jobs > 1 and len(render_jobs) > 1:
+            rendered = self._render_jobs_in_parallel(
+                render_jobs, api_schema=api_schema, opts=opts, snippet_index=snippet_idx,
+            )
+        else:
+            rendered = (
+                self._render_job(
+                    job, api_schema=api_schema, opts=opts, snippet_index=snippet_idx)
+                for job in render_jobs
+            )
+
+        # Yield each file (samples first) once all of its jobs are rendered.
+        for fn in OrderedDict.fromkeys(itertools.chain(sample_output, jobs_by_filename)):
+            cgr_file = sample_output.get(fn)
+            for _ in jobs_by_filename.get(fn, ()):
+                cgr_file = next(rendered).get(fn, cgr_file)
+            if cgr_file is not None:
+                yield cgr_file
 
     def _generate_samples_and_manifest(
             self, api_schema: api.API, index: snippet_index.SnippetIndex, sample_template: jinja2.Template, *, opts: Options) -> Tuple[Dict, snippet_index.SnippetIndex]:
@@ -187,8 +343,8 @@ class Generator:
                 if not id_is_unique:
                     spec["id"] += f"_{spec_hash}"
 
-                sample, snippet_metadata = samplegen.generate_sample(
-                    spec, api_schema, sample_template,)
+                sample, snippet_metadata = self._generate_sample(
+                    spec, api_schema, sample_template)
 
                 fpath = utils.to_snake_case(spec["id"]) + ".py"
                 fpath_to_spec_and_rendered[os.path.join(out_dir, fpath)] = (
@@ -220,10 +376,43 @@ class Generator:
 
         return output_files, index
 
-    def _render_template(
-            self, template_name: str, *, api_schema: api.API, opts: Options, snippet_index: snippet_index.SnippetIndex,
-    ) -> Dict[str, CodeGeneratorResponse.File]:
-        """Render the requested templates.
+    def _generate_sample(
+            self, spec: Dict[str, Any], api_schema: api.API, sample_template: jinja2.Template,
+    ) -> Tuple[str, Any]:
+        """Generate a single sample, reusing a previous rendering if possible.
+
+        Arguments:
+            spec (Dict[str, Any]): The sample's specification.
+            api_schema (api.API): The schema for the API to which the sample belongs.
+            sample_template (jinja2.Template): The template to use to generate the sample.
+
+        Returns:
+            Tuple[str, snippet_metadata_pb2.Snippet]: The rendered sample and its metadata.
+        """
+        if not self._render_cache:
+            return samplegen.generate_sample(spec, api_schema, sample_template)
+
+        # Generating the sample modifies its spec, so compute the key first.
+        cache_key = self._render_cache.key(
+            sample_template.name,  # type: ignore
+            spec["id"],
+            api_schema=api_schema,
+            service=api_schema.services.get(spec.get("service")),
+            sample_spec=spec,
+        )
+        cached = self._render_cache.get_sample(cache_key)
+        if cached:
+            return cached
+
+        sample, snippet_metadata = samplegen.generate_sample(
+            spec, api_schema, sample_template)
+        self._render_cache.put_sample(cache_key, sample, snippet_metadata)
+        return sample, snippet_metadata
+
+    def _get_render_jobs(
+            self, template_name: str, *, api_schema: api.API, opts: Options,
+    ) -> List["_RenderJob"]:
+        """Return the files which the requested template should be rendered to.
 
         Args:
             template_name (str): The template to be rendered.
@@ -232,12 +421,12 @@ class Generator:
                 able to be sent to the :meth:`jinja2.Environment.get_template`
                 method.
             api_schema (~.api.API): An API schema object.
+            opts (~.options.Options): An options instance.
 
         Returns:
-            Sequence[~.CodeGeneratorResponse.File]: A sequence of File
-                objects for inclusion in the final response.
+            Sequence[~._RenderJob]: The render jobs, in output order.
         """
-        answer: Dict[str, CodeGeneratorResponse.File] = OrderedDict()
+        answer: List[_RenderJob] = []
         skip_subpackages = False
 
         # Very, very special case. This flag exists to gate this one file.
@@ -258,9 +447,9 @@ class Generator:
         # services and protos we pull from for the remainder of the method).
         if "%sub" in template_name:
             for subpackage in api_schema.subpackages.values():
-                answer.update(
-                    self._render_template(
-                        template_name, api_schema=subpackage, opts=opts, snippet_index=snippet_index
+                answer.extend(
+                    self._get_render_jobs(
+                        template_name, api_schema=subpackage, opts=opts,
                     )
                 )
                 skip_subpackages = True
@@ -268,25 +457,23 @@ class Generator:
         # If this template should be rendered once per proto, iterate over
         # all protos to be rendered
         if "%proto" in template_name:
-            for proto in api_schema.protos.values():
+            for proto_name, proto in api_schema.protos.items():
                 if (
                         skip_subpackages
                         and proto.meta.address.subpackage != api_schema.subpackage_view
                 ):
                     continue
 
-                answer.update(
-                    self._get_file(
-                        template_name, api_schema=api_schema, proto=proto, opts=opts, snippet_index=snippet_index
-                    )
-                )
+                answer.append(_RenderJob(
+                    template_name, api_schema.subpackage_view, proto=proto_name,
+                ))
 
             return answer
 
         # If this template should be rendered once per service, iterate
         # over all services to be rendered.
         if "%service" in template_name:
-            for service in api_schema.services.values():
+            for service_name, service in api_schema.services.items():
                 if (
                         (skip_subpackages
                          and service.meta.address.subpackage != api_schema.subpackage_view)
@@ -300,23 +487,71 @@ class Generator:
                 ):
                     continue
 
-                answer.update(
-                    self._get_file(
-                        template_name,
-                        api_schema=api_schema,
-                        service=service,
-                        opts=opts,
-                        snippet_index=snippet_index,
-                    )
-                )
+                answer.append(_RenderJob(
+                    template_name, api_schema.subpackage_view, service=service_name,
+                ))
             return answer
 
         # This file is not iterating over anything else; return back
         # the one applicable file.
-        answer.update(self._get_file(
-            template_name, api_schema=api_schema, opts=opts, snippet_index=snippet_index))
+        answer.append(_RenderJob(template_name, api_schema.subpackage_view))
         return answer
 
+    def _render_job(
+            self, job: "_RenderJob", *, api_schema: api.API, opts: Options, snippet_index: snippet_index.SnippetIndex,
+    ) -> Dict[str, CodeGeneratorResponse.File]:
+        """Render a single job produced by :meth:`_get_render_jobs`.
+
+        Args:
+            job (~._RenderJob): The job to be rendered.
+            api_schema (~.api.API): The API schema object the job was
+                created from.
+            opts (~.options.Options): An options instance.
+            snippet_index (~.SnippetIndex): The snippets for the API.
+
+        Returns:
+            Dict[str, ~.CodeGeneratorResponse.File]: A dictionary with
+                the rendered file, or an empty dictionary if the file
+                would be empty.
+        """
+        api_schema, context = _job_context(job, api_schema)
+        return self._get_file(
+            job.template_name, api_schema=api_schema, opts=opts, snippet_index=snippet_index, **context
+        )
+
+    def _get_job_filename(self, job: "_RenderJob", *, api_schema: api.API) -> str:
+        """Return the filename which a job produced by :meth:`_get_render_jobs` renders."""
+        api_schema, context = _job_context(job, api_schema)
+        return self._get_filename(
+            job.template_name, api_schema=api_schema, context=context,
+        )
+
+    def _render_jobs_in_parallel(
+            self, jobs: Sequence["_RenderJob"], *, api_schema: api.API, opts: Options, snippet_index: snippet_index.SnippetIndex,
+    ) -> Iterator[Dict[str, CodeGeneratorResponse.File]]:
+        """Render the given jobs using a pool of worker processes.
+
+        The API schema is handed to each worker exactly once, when the
+        worker starts; the jobs themselves only carry names.
+
+        Returns:
+            Iterator[Dict[str, ~.CodeGeneratorResponse.File]]: The rendered
+                files, in the same order as ``jobs``.
+        """
+        # Forking lets the workers inherit the schema without pickling it.
+        # Fall back to the platform default (spawn) where that is unavailable.
+        mp_context: Any = multiprocessing.get_context()
+        if "fork" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("fork")
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(opts.jobs, len(jobs)),
+            mp_context=mp_context,
+            initializer=_init_render_worker,
+            initargs=(api_schema, opts, snippet_index),
+        ) as executor:
+            yield from executor.map(_render_job_in_worker, jobs)
+
     def _is_desired_transport(self, template_name: str, opts: Options) -> bool:
         """Returns true if template name contains a desired transport"""
         desired_transports = ['__init__', 'base'] + opts.transport
@@ -335,15 +570,35 @@ class Generator:
         fn = self._get_filename(
             template_name, api_schema=api_schema, context=context,)
 
-        # Render the file contents.
-        cgr_file = CodeGeneratorResponse.File(
-            content=formatter.fix_whitespace(
-                self._env.get_template(template_name).render(
-                    api=api_schema, opts=opts, **context
-                ),
-            ),
-            name=fn,
-        )
+        with profile.span(template_name, "template", file=fn):
+            # Look for a previous rendering of this file with identical inputs.
+            cache_key = None
+            cgr_file = None
+            if self._render_cache:
+                cache_key = self._render_cache.key(
+                    template_name,
+                    fn,
+                    api_schema=api_schema,
+                    service=context.get("service"),
+                    proto=context.get("proto"),
+                    snippets=context.get("snippet_index"),
+                )
+                cgr_file = self._render_cache.get(cache_key)
+
+            # Render the file contents.
+            if cgr_file is None:
+                # Format the template's output as it is generated, rather than
+                # holding both the raw and the formatted file.
+                cgr_file = CodeGeneratorResponse.File(
+                    content="".join(formatter.fix_whitespace_stream(
+                        self._env.get_template(template_name).generate(
+                            api=api_schema, opts=opts, **context
+                        ),
+                    )),
+                    name=fn,
+                )
+                if cache_key:
+                    self._render_cache.put(cache_key, cgr_file)  # type: ignore
 
         # Quick check: Do not render empty files.
         if utils.empty(cgr_file.content) and not fn.endswith(
@@ -414,4 +669,84 @@ class Generator:
         return filename
 
 
+class _RenderJob(NamedTuple):
+    """A template together with the part of the API it is rendered for."""
+    template_name: str
+    subpackage_view: Tuple[str, ...]
+    service: str = ""
+    proto: str = ""
+
+
+# The state of a render worker process; see `_init_render_worker`.
+_worker_state: Dict[str, Any] = {}
+
+
+def _docstrings(api_schema: api.API) -> Iterator[str]:
+    """Yield the documentation of every element of the API."""
+    for message in api_schema.messages.values():
+        yield message.meta.doc
+        for field in message.fields.values():
+            yield field.meta.doc
+    for enum in api_schema.enums.values():
+        yield enum.meta.doc
+        for value in enum.values:
+            yield value.meta.doc
+    for service in api_schema.services.values():
+        yield service.meta.doc
+        for method in service.methods.values():
+            yield method.meta.doc
+
+
+class _BytecodeCache(jinja2.FileSystemBytecodeCache):
+    """A bytecode cache which may not be writable.
+
+    A cache compiled ahead of time may be shared with users who cannot
+    write to it (for instance, in a Docker image run with ``--user``).
+    Templates missing from it, such as custom ones, are then compiled
+    every time instead.
+    """
+
+    def dump_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def _job_context(job: _RenderJob, api_schema: api.API) -> Tuple[api.API, Dict[str, Any]]:
+    """Return the API schema and template context of a render job."""
+    # Walk down to the subpackage this job belongs to.
+    for subpackage_name in job.subpackage_view[len(api_schema.subpackage_view):]:
+        api_schema = api_schema.subpackages[subpackage_name]
+
+    context: Dict[str, Any] = {}
+    if job.service:
+        context["service"] = api_schema.services[job.service]
+    if job.proto:
+        context["proto"] = api_schema.protos[job.proto]
+    return api_schema, context
+
+
+def _init_render_worker(
+        api_schema: api.API, opts: Options, index: snippet_index.SnippetIndex,
+) -> None:
+    """Prepare a worker process to render templates for the given API."""
+    _worker_state.update(
+        generator=Generator(opts),
+        api_schema=api_schema,
+        opts=opts,
+        snippet_index=index,
+    )
+
+
+def _render_job_in_worker(job: _RenderJob) -> Dict[str, CodeGeneratorResponse.File]:
+    """Render a job in a worker process set up by `_init_render_worker`."""
+    return _worker_state["generator"]._render_job(
+        job,
+        api_schema=_worker_state["api_schema"],
+        opts=_worker_state["opts"],
+        snippet_index=_worker_state["snippet_index"],
+    )
+
+
 __all__ = ("Generator",)
@@ -0,0 +1,403 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A persistent, content-addressed cache of rendered files.
+
+Every entry is keyed by a digest of everything that can influence the
+rendered output: the generator itself, the tools it renders with, the
+options, the template (and every template it extends, includes, or
+imports), and the part of the API being rendered. Entries therefore never
+need to be invalidated; a change to any input simply produces a different
+key. Once the entries outgrow a maximum size, the least recently used are
+evicted instead.
+"""
+
+import dataclasses
+import functools
+import hashlib
+import json
+import pathlib
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+import jinja2
+import jinja2.meta
+import pypandoc  # type: ignore
+
+from google.api import resource_pb2  # type: ignore
+from google.protobuf.compiler.plugin_pb2 import CodeGeneratorResponse
+from google.protobuf.message import DecodeError
+
+from gapic.generator import disk_cache
+from gapic.samplegen_utils import snippet_index
+from gapic.samplegen_utils import snippet_metadata_pb2
+from gapic.schema import api
+from gapic.schema import wrappers
+from gapic.utils import Options
+
+
+# Options which change how the generator runs, but not what it produces.
+IGNORED_OPTIONS = frozenset((
+    'bytecode_cache',
+    'filter_stats',
+    'jobs',
+    'profile',
+    'render_cache',
+    'rst_cache',
+    'schema_cache',
+))
+
+# The default limit on the total size of the entries, in bytes.
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+
+class RenderCache:
+    """An on-disk cache of :class:`~.CodeGeneratorResponse.File` objects.
+
+    Args:
+        path (str): The directory in which cache entries are stored.
+            It is created if it does not exist, and may be shared by
+            concurrent runs of the generator.
+        env (jinja2.Environment): The environment templates are loaded from.
+        opts (~.options.Options): The options for this run.
+        max_size (int): The total size of the entries, in bytes, which
+            :meth:`prune` evicts down to.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        env: jinja2.Environment,
+        opts: Options,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ) -> None:
+        self._path = pathlib.Path(path)
+        self._env = env
+        self._max_size = max_size
+        self._base_digest = disk_cache.digest(
+            disk_cache.generator_digest(), _toolchain_digest(), _options_digest(opts))
+        self._template_references: Dict[str, Tuple[str, List[Optional[str]]]] = {}
+        self._template_digests: Dict[str, str] = {}
+        self._all_protos: Optional[Mapping[str, api.Proto]] = None
+        self._api_digest = ''
+        self._surface_digest = ''
+        self._file_digests: Dict[str, str] = {}
+
+    def key(
+        self,
+        template_name: str,
+        filename: str,
+        *,
+        api_schema: api.API,
+        service: Optional[wrappers.Service] = None,
+        proto: Optional[api.Proto] = None,
+        sample_spec: Optional[Mapping[str, Any]] = None,
+        snippets: Optional[snippet_index.SnippetIndex] = None,
+    ) -> str:
+        """Return the cache key for rendering a template to a file.
+
+        Args:
+            template_name (str): The name of the template being rendered.
+            filename (str): The name of the file being rendered.
+            api_schema (~.api.API): The API (or subpackage view of it)
+                the template is rendered for.
+            service (~.wrappers.Service): The service the template is
+                rendered for, if any.
+            proto (~.api.Proto): The proto the template is rendered for,
+                if any.
+            sample_spec (Mapping[str, Any]): The sample the template is
+                rendered for, if any.
+            snippets (~.SnippetIndex): The snippets available to the
+                template, if any. Only per-service templates embed
+                snippets, so these are ignored for other templates.
+
+        Returns:
+            str: A hex digest identifying the rendered file.
+        """
+        return disk_cache.digest(
+            self._base_digest,
+            self._template_digest(template_name),
+            filename,
+            self._schema_digest(api_schema, service=service, proto=proto),
+            repr(sample_spec),
+            _snippets_digest(snippets, service) if snippets and service else '',
+        )
+
+    def get(self, key: str) -> Optional[CodeGeneratorResponse.File]:
+        """Return the file stored under the given key, if any."""
+        path = self._entry_path(key)
+        try:
+            answer = CodeGeneratorResponse.File.FromString(path.read_bytes())
+        except (OSError, DecodeError):
+            return None
+        disk_cache.touch(path)
+        return answer
+
+    def put(self, key: str, cgr_file: CodeGeneratorResponse.File) -> None:
+        """Store a rendered file under the given key."""
+        disk_cache.store(self._entry_path(key), cgr_file.SerializeToString())
+
+    def get_sample(self, key: str) -> Optional[Tuple[str, Any]]:
+        """Return the sample and its snippet metadata stored under the given key, if any."""
+        cgr_file = self.get(key)
+        if cgr_file is None:
+            return None
+        metadata_path = self._entry_path(f'{key}-metadata')
+        try:
+            snippet_metadata = snippet_metadata_pb2.Snippet.FromString(  # type: ignore
+                metadata_path.read_bytes(),
+            )
+        except (OSError, DecodeError):
+            return None
+        disk_cache.touch(metadata_path)
+        return cgr_file.content, snippet_metadata
+
+    def put_sample(
+        self,
+        key: str,
+        sample: str,
+        snippet_metadata: Any,
+    ) -> None:
+        """Store a rendered sample and its snippet metadata under the given key."""
+        # The metadata goes first, so the sample is only ever found with it.
+        disk_cache.store(
+            self._entry_path(f'{key}-metadata'),
+            snippet_metadata.SerializeToString(),
+        )
+        self.put(key, CodeGeneratorResponse.File(content=sample))
+
+    def prune(self) -> int:
+        """Evict the least recently used entries until the cache fits.
+
+        Returns:
+            int: The number of entries evicted.
+        """
+        return disk_cache.prune(self._path, self._max_size)
+
+    def _entry_path(self, key: str) -> pathlib.Path:
+        return self._path / key[:2] / key
+
+    def _template_digest(self, template_name: str) -> str:
+        """Return a digest of a template and every template it references."""
+        if template_name not in self._template_digests:
+            sources: Dict[str, str] = {}
+            pending = [template_name]
+            while pending:
+                name = pending.pop()
+                if name in sources:
+                    continue
+                sources[name], references = self._get_template_references(
+                    name)
+                for reference in references:
+                    # A dynamic reference could be to any template at all.
+                    if reference is None:
+                        pending.extend(self._env.list_templates())
+                    else:
+                        pending.append(reference)
+
+            self._template_digests[template_name] = disk_cache.digest(*(
+                f'{name}\0{source}' for name, source in sorted(sources.items())
+            ))
+        return self._template_digests[template_name]
+
+    def _get_template_references(self, template_name: str) -> Tuple[str, List[Optional[str]]]:
+        """Return the source of a template and the templates it references.
+
+        Finding references requires parsing the template, which is nearly
+        as expensive as compiling it, so the result is cached on disk too.
+        """
+        if template_name not in self._template_references:
+            source, _, _ = self._env.loader.get_source(  # type: ignore
+                self._env, template_name,
+            )
+            references_path = self._path / 'templates' / disk_cache.digest(source)
+            try:
+                references = json.loads(references_path.read_text())
+            except (OSError, ValueError):
+                references = list(jinja2.meta.find_referenced_templates(
+                    self._env.parse(source),
+                ))
+                disk_cache.store(
+                    references_path, json.dumps(references).encode('utf8'))
+            self._template_references[template_name] = (source, references)
+        return self._template_references[template_name]
+
+    def _schema_digest(
+        self,
+        api_schema: api.API,
+        *,
+        service: Optional[wrappers.Service],
+        proto: Optional[api.Proto],
+    ) -> str:
+        """Return a digest of the part of the API that is being rendered.
+
+        Templates rendered for a particular proto or service only see that
+        proto or service, the protos it depends on, and a few API-wide
+        settings. Everything else is rendered for the whole API.
+
+        Per-proto templates do not see other files' services or resources,
+        so a change to a service only re-renders the files that can show it.
+        """
+        all_protos = api_schema.all_protos
+
+        # Digests are memoized for the API currently being rendered only.
+        if all_protos is not self._all_protos:
+            self._all_protos = all_protos
+            self._file_digests = {}
+            self._api_digest = ''
+            self._surface_digest = ''
+
+        file_names: Optional[Set[str]] = None
+        if proto:
+            file_names = _dependency_closure(all_protos, [proto.name])
+        elif service:
+            files_by_module = {
+                (p.meta.address.package, p.meta.address.module): name
+                for name, p in all_protos.items()
+            }
+
+            # Long-running operation types do not need to be imported by
+            # the file declaring the service, so track them explicitly.
+            roots = [service.meta.address] + [
+                t.meta.address
+                for m in service.methods.values() if m.lro
+                for t in (m.lro.response_type, m.lro.metadata_type)
+            ]
+            root_files = [
+                files_by_module.get((address.package, address.module))
+                for address in roots
+            ]
+            if all(root_files):
+                file_names = _dependency_closure(
+                    all_protos, root_files)  # type: ignore
+
+        # If the rendered slice could not be narrowed down, assume that the
+        # template depends on every file in the API.
+        sees_surface = not proto or file_names is None
+        if file_names is None:
+            file_names = set(all_protos)
+
+        return disk_cache.digest(
+            self._get_api_digest(api_schema),
+            self._get_surface_digest(api_schema) if sees_surface else '',
+            '/'.join(api_schema.subpackage_view),
+            *(self._get_file_digest(all_protos[name])
+              for name in sorted(file_names)),
+        )
+
+    def _get_api_digest(self, api_schema: api.API) -> str:
+        """Return a digest of the API-wide settings every template can see.
+
+        This covers the naming, the service config, and every file-level
+        option in the API.
+        """
+        if not self._api_digest:
+            digests = [
+                repr(api_schema.naming),
+                api_schema.service_yaml_config.SerializeToString(
+                    deterministic=True).hex(),
+            ]
+            for name, p in api_schema.all_protos.items():
+                digests.append(name)
+                digests.append(p.file_pb2.options.SerializeToString(
+                    deterministic=True).hex())
+            self._api_digest = disk_cache.digest(*digests)
+        return self._api_digest
+
+    def _get_surface_digest(self, api_schema: api.API) -> str:
+        """Return a digest of the services and resources in the API.
+
+        Services may refer to any other service (for instance, to poll
+        extended operations), and resource references are resolved across
+        the whole API rather than through imports.
+        """
+        if not self._surface_digest:
+            digests = []
+            for name, p in api_schema.all_protos.items():
+                digests.append(name)
+                digests.extend(
+                    s.SerializeToString(deterministic=True).hex()
+                    for s in p.file_pb2.service
+                )
+                digests.extend(
+                    m.SerializeToString(deterministic=True).hex()
+                    for m in p.file_pb2.message_type
+                    if m.options.Extensions[resource_pb2.resource].type
+                )
+            self._surface_digest = disk_cache.digest(*digests)
+        return self._surface_digest
+
+    def _get_file_digest(self, proto: api.Proto) -> str:
+        if proto.name not in self._file_digests:
+            self._file_digests[proto.name] = hashlib.sha256(
+                proto.file_pb2.SerializeToString(deterministic=True),
+            ).hexdigest()
+        return self._file_digests[proto.name]
+
+
+def _dependency_closure(all_protos: Mapping[str, api.Proto], file_names: List[str]) -> Optional[Set[str]]:
+    """Return the given files and all the files they transitively import.
+
+    Returns ``None`` if an import cannot be found among the API's protos
+    (for instance, because the file was renamed to avoid a Python keyword).
+    """
+    answer: Set[str] = set()
+    pending = list(file_names)
+    while pending:
+        name = pending.pop()
+        if name in answer:
+            continue
+        if name not in all_protos:
+            return None
+        answer.add(name)
+        pending.extend(all_protos[name].file_pb2.dependency)
+    return answer
+
+
+def _snippets_digest(index: snippet_index.SnippetIndex, service: wrappers.Service) -> str:
+    """Return a digest of the snippets for every method of a service."""
+    return disk_cache.digest(*(
+        snippet.sample_str if snippet else ''
+        for method_name in sorted(service.methods)
+        for snippet in (
+            index.get_snippet(service.name, method_name, sync=True),
+            index.get_snippet(service.name, method_name, sync=False),
+        )
+    ))
+
+
+@functools.lru_cache(maxsize=None)
+def _toolchain_digest() -> str:
+    """Return a digest of the versions of the tools files are rendered with.
+
+    Docstrings are converted by pandoc, whose output differs from version
+    to version.
+    """
+    return disk_cache.digest(
+        pypandoc.get_pandoc_version(), pypandoc.__version__, jinja2.__version__)
+
+
+def _options_digest(opts: Options) -> str:
+    """Return a digest of every option that can influence rendered output."""
+    values: Dict[str, Any] = {
+        field.name: getattr(opts, field.name)
+        for field in dataclasses.fields(opts)
+        if field.name not in IGNORED_OPTIONS
+    }
+
+    # Sample configs are passed by path; what matters is their content.
+    values['sample_configs'] = {
+        path: pathlib.Path(path).read_text() for path in opts.sample_configs
+    }
+
+    return disk_cache.digest(json.dumps(values, sort_keys=True, default=sorted))
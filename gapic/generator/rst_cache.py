@@ -0,0 +1,102 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A persistent cache of docstrings converted to RST.
+
+Converting docstrings with pandoc is the most expensive part of rendering,
+yet most proto comments are the same from one run to the next.
+"""
+
+import functools
+import pathlib
+from typing import Optional
+
+import pypandoc  # type: ignore
+
+from gapic.generator import disk_cache
+
+
+# The default limit on the total size of the entries, in bytes.
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+class RstCache:
+    """An on-disk cache of conversions made by :func:`~.rst`.
+
+    Entries are keyed by the text, the source format, the number of columns
+    and the version of pandoc. They are only ever written atomically, so
+    the cache may be shared by concurrent runs of the generator. Once the
+    entries outgrow the maximum size, the least recently used are evicted
+    by :meth:`prune`.
+
+    Args:
+        path (str): The directory in which entries are stored.
+            It is created if it does not exist.
+        max_size (int): The total size of the entries, in bytes, which
+            :meth:`prune` evicts down to.
+
+    Attributes:
+        hits (int): The number of conversions found in the cache.
+        misses (int): The number of conversions which were not.
+        errors (int): The number of entries which could not be read,
+            for instance because they are corrupt or not readable by this
+            user. These are converted again, but not counted as misses.
+    """
+
+    def __init__(self, path: str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self._path = pathlib.Path(path)
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, text: str, columns: int, source_format: str) -> Optional[str]:
+        """Return the stored conversion of a text, if any."""
+        path = self._entry_path(text, columns, source_format)
+        try:
+            answer = path.read_bytes().decode('utf8')
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, UnicodeDecodeError):
+            self.errors += 1
+            return None
+        self.hits += 1
+        disk_cache.touch(path)
+        return answer
+
+    def put(self, text: str, columns: int, source_format: str, answer: str) -> None:
+        """Store the conversion of a text."""
+        disk_cache.store(
+            self._entry_path(text, columns, source_format),
+            answer.encode('utf8'),
+        )
+
+    def prune(self) -> int:
+        """Evict the least recently used entries until the cache fits.
+
+        Returns:
+            int: The number of entries evicted.
+        """
+        return disk_cache.prune(self._path, self._max_size)
+
+    def _entry_path(self, text: str, columns: int, source_format: str) -> pathlib.Path:
+        key = disk_cache.digest(
+            _pandoc_version(), source_format, str(columns), text)
+        return self._path / key[:2] / key
+
+
+@functools.lru_cache(maxsize=None)
+def _pandoc_version() -> str:
+    return pypandoc.get_pandoc_version()
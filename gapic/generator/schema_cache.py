@@ -0,0 +1,134 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A persistent cache of built :class:`~.api.API` objects.
+
+Building the API model dominates generation time for large APIs, yet it
+only depends on the protos, a few options, and the generator itself. When
+only the templates change, a snapshot of the model is loaded instead.
+"""
+
+import dataclasses
+import hashlib
+import json
+import pathlib
+import pickle
+from typing import Any, Dict, Optional, Sequence
+
+from google.protobuf import descriptor_pb2
+
+from gapic.generator import disk_cache
+from gapic.generator import render_cache
+from gapic.schema import api
+from gapic.utils import Options
+
+
+# Options which only influence rendering, and so cannot change the API model.
+IGNORED_OPTIONS = render_cache.IGNORED_OPTIONS | frozenset((
+    'autogen_snippets',
+    'sample_configs',
+    'templates',
+))
+
+
+class SchemaCache:
+    """An on-disk cache of :class:`~.api.API` snapshots.
+
+    Snapshots are pickles, so the cache directory must be no more widely
+    writable than the generator's own source.
+
+    Args:
+        path (str): The directory in which snapshots are stored.
+            It is created if it does not exist, and may be shared by
+            concurrent runs of the generator.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = pathlib.Path(path)
+
+    def build(
+        self,
+        file_descriptors: Sequence[descriptor_pb2.FileDescriptorProto],
+        package: str = '',
+        opts: Options = Options(),
+    ) -> api.API:
+        """Return the API for the given files, building it only if needed.
+
+        The arguments are those of :meth:`~.api.API.build`.
+        """
+        key = self.key(file_descriptors, package=package, opts=opts)
+        api_schema = self.get(key)
+        if api_schema is None:
+            api_schema = api.API.build(
+                file_descriptors, package=package, opts=opts)
+            self.put(key, api_schema)
+        return api_schema
+
+    def key(
+        self,
+        file_descriptors: Sequence[descriptor_pb2.FileDescriptorProto],
+        *,
+        package: str,
+        opts: Options,
+    ) -> str:
+        """Return the cache key for building an API.
+
+        Returns:
+            str: A hex digest identifying the API model.
+        """
+        files = hashlib.sha256()
+        for fd in file_descriptors:
+            files.update(fd.SerializeToString(deterministic=True))
+            files.update(b'\0')
+        return disk_cache.digest(
+            disk_cache.generator_digest(),
+            _options_digest(opts),
+            package,
+            files.hexdigest(),
+        )
+
+    def get(self, key: str) -> Optional[api.API]:
+        """Return the API stored under the given key, if any."""
+        try:
+            with self._entry_path(key).open('rb') as f:
+                api_schema = pickle.load(f)
+        # Unreadable snapshots (for instance, truncated ones) are treated
+        # as missing; they are replaced once the API has been rebuilt.
+        except Exception:
+            return None
+        return api_schema if isinstance(api_schema, api.API) else None
+
+    def put(self, key: str, api_schema: api.API) -> None:
+        """Store an API under the given key."""
+        try:
+            data = pickle.dumps(api_schema, protocol=pickle.HIGHEST_PROTOCOL)
+        # Exceptionally deep models may not be picklable; they are simply
+        # built every time.
+        except RecursionError:
+            return
+        disk_cache.store(self._entry_path(key), data)
+
+    def _entry_path(self, key: str) -> pathlib.Path:
+        return self._path / key[:2] / f'{key}.pickle'
+
+
+def _options_digest(opts: Options) -> str:
+    """Return a digest of every option that can influence the API model."""
+    values: Dict[str, Any] = {
+        field.name: getattr(opts, field.name)
+        for field in dataclasses.fields(opts)
+        if field.name not in IGNORED_OPTIONS
+    }
+    return disk_cache.digest(
+        json.dumps(values, sort_keys=True, default=sorted))
@@ -0,0 +1,182 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Write generated files to a directory or a srcjar, rather than to protoc.
+
+Only files whose content changed are written, so the modification times
+of the others (and any build steps keyed on them) are left alone. Files
+are written atomically, so an interrupted run never leaves one truncated.
+"""
+
+import os
+import pathlib
+import zipfile
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from google.protobuf.compiler.plugin_pb2 import CodeGeneratorResponse
+
+from gapic.generator import disk_cache
+
+
+# The file in an output directory which lists the files written to it.
+MANIFEST = '.gapic-generator-manifest'
+
+
+# Entries of srcjars are stamped with a fixed time, so that identical files
+# make identical srcjars.
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def write_directory(
+    files: Iterable[CodeGeneratorResponse.File], path: str,
+) -> List[str]:
+    """Write files under a directory, leaving those which are unchanged.
+
+    The names of the files are recorded in a manifest in the directory, so
+    that files which a later call no longer generates (for instance,
+    because a proto was removed) are removed too.
+
+    Args:
+        files (Iterable[~.CodeGeneratorResponse.File]): The files to write.
+        path (str): The directory to write them under. It is created if it
+            does not exist.
+
+    Returns:
+        List[str]: The names of the files which were written, followed by
+            those which were removed.
+    """
+    manifest_path = pathlib.Path(path, MANIFEST)
+    previous = _read_manifest(manifest_path)
+    changed = []
+    names = set()
+    for cgr_file in files:
+        data = cgr_file.content.encode('utf8')
+        names.add(cgr_file.name)
+        file_path = os.path.join(path, cgr_file.name)
+        if _read(file_path, len(data)) == data:
+            continue
+        disk_cache.write_atomically(pathlib.Path(file_path), data)
+        changed.append(cgr_file.name)
+
+    # The manifest may have been edited; never remove anything outside the
+    # directory.
+    removed = sorted(
+        name for name in previous - names if _is_inside(path, name))
+    for name in removed:
+        _remove(path, name)
+    if names != previous:
+        manifest = ''.join(f'{name}\n' for name in sorted(names))
+        disk_cache.write_atomically(manifest_path, manifest.encode('utf8'))
+    return changed + removed
+
+
+def write_srcjar(
+    files: Iterable[CodeGeneratorResponse.File], path: str,
+) -> List[str]:
+    """Write files to a zip file (such as a ``.srcjar``).
+
+    The zip file is only replaced if any of its entries change, or are
+    added or removed.
+
+    Args:
+        files (Iterable[~.CodeGeneratorResponse.File]): The files to write.
+        path (str): The zip file to write them to.
+
+    Returns:
+        List[str]: The names of the files which were added or changed,
+            followed by those which were removed.
+    """
+    previous = _zip_entries(path)
+    changed = []
+    names = set()
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as srcjar:
+            for cgr_file in files:
+                data = cgr_file.content.encode('utf8')
+                info = zipfile.ZipInfo(cgr_file.name, date_time=_ZIP_DATE_TIME)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                srcjar.writestr(info, data)
+
+                names.add(cgr_file.name)
+                if previous.get(cgr_file.name) != (zlib.crc32(data), len(data)):
+                    changed.append(cgr_file.name)
+
+        removed = sorted(previous.keys() - names)
+        if changed or removed:
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return changed + removed
+
+
+def _read(path: str, size: int) -> Optional[bytes]:
+    """Return the content of a file, unless it is missing or another size."""
+    try:
+        if os.path.getsize(path) != size:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _is_inside(path: str, name: str) -> bool:
+    """Return True if a relative file name stays within a directory.
+
+    Symbolic links are followed, so a name cannot escape through one either.
+    """
+    if os.path.isabs(name) or os.path.normpath(name) != name or name.startswith('..'):
+        return False
+    root = os.path.realpath(path)
+    file_path = os.path.realpath(os.path.join(path, name))
+    return os.path.commonpath([root, file_path]) == root and file_path != root
+
+
+def _read_manifest(path: pathlib.Path) -> Set[str]:
+    """Return the names of the files written by the last call, if any."""
+    try:
+        return set(path.read_text('utf8').splitlines())
+    except FileNotFoundError:
+        return set()
+
+
+def _remove(path: str, name: str) -> None:
+    """Remove a file, and any directories which that leaves empty."""
+    try:
+        os.remove(os.path.join(path, name))
+    except FileNotFoundError:
+        pass
+    directory = os.path.dirname(name)
+    while directory:
+        try:
+            os.rmdir(os.path.join(path, directory))
+        except OSError:  # The directory is not empty.
+            break
+        directory = os.path.dirname(directory)
+
+
+def _zip_entries(path: str) -> Dict[str, Tuple[int, int]]:
+    """Return the CRC and size of each entry of a zip file, if it exists."""
+    try:
+        with zipfile.ZipFile(path) as srcjar:
+            return {
+                info.filename: (info.CRC, info.file_size)
+                for info in srcjar.infolist()
+            }
+    except (OSError, zipfile.BadZipFile):
+        return {}
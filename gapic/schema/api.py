@@ -24,7 +24,7 @@ import keyword
 import os
 import sys
 from types import MappingProxyType
-from typing import Callable, Container, Dict, FrozenSet, Mapping, Optional, Sequence, Set, Tuple
+from typing import Any, Callable, cast, Container, Dict, FrozenSet, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Sequence, Set, Tuple
 import yaml
 
 from google.api_core import exceptions
@@ -49,6 +49,7 @@ from gapic.schema import mixins
 from gapic.schema import wrappers
 from gapic.schema import naming as api_naming
 from gapic.utils import cached_property
+from gapic.utils import delegate
 from gapic.utils import nth
 from gapic.utils import Options
 from gapic.utils import to_snake_case
@@ -81,8 +82,8 @@ class Proto:
         default_factory=metadata.Metadata,
     )
 
-    def __getattr__(self, name: str):
-        return getattr(self.file_pb2, name)
+    def __getattr__(self, name):
+        return delegate(self, 'file_pb2', name)
 
     @classmethod
     def build(
@@ -94,6 +95,7 @@ class Proto:
             prior_protos: Optional[Mapping[str, 'Proto']] = None,
             load_services: bool = True,
             all_resources: Optional[Mapping[str, wrappers.MessageType]] = None,
+            prior_symbols: Optional['_SymbolTable'] = None,
     ) -> 'Proto':
         """Build and return a Proto instance.
 
@@ -109,6 +111,9 @@ class Proto:
             load_services (bool): Toggle whether the proto file should
                 load its services. Not doing so enables a two-pass fix for
                 LRO response and metadata types in certain situations.
+            prior_symbols (~._SymbolTable): The messages and enums in
+                ``prior_protos``. This is built from ``prior_protos`` if
+                it is not provided.
         """
         return _ProtoBuilder(
             file_descriptor,
@@ -118,6 +123,7 @@ class Proto:
             prior_protos=prior_protos or {},
             load_services=load_services,
             all_resources=all_resources or {},
+            prior_symbols=prior_symbols,
         ).proto
 
     @cached_property
@@ -314,9 +320,21 @@ class API:
         # type into the proto file that defines an LRO.
         # We just load all the APIs types first and then
         # load the services and methods with the full scope of types.
+        #
+        # Types are looked up in a flat table of every message and enum
+        # loaded so far, which both passes share.
+        #
+        # Files which are not being generated are only built once one of
+        # their types is looked up, since an API usually uses few of the
+        # types it (transitively) imports.
         pre_protos: Dict[str, Proto] = dict(prior_protos or {})
+        symbols = _SymbolTable.build(pre_protos.values())
         for fd in file_descriptors:
             fd.name = disambiguate_keyword_sanitize_fname(fd.name, pre_protos)
+            if not fd.package.startswith(package):
+                pre_protos[fd.name] = symbols.defer(
+                    fd, naming=naming, opts=opts)
+                continue
             pre_protos[fd.name] = Proto.build(
                 file_descriptor=fd,
                 file_to_generate=fd.package.startswith(package),
@@ -325,29 +343,49 @@ class API:
                 prior_protos=pre_protos,
                 # Ugly, ugly hack.
                 load_services=False,
+                prior_symbols=symbols,
             )
+            symbols.add(pre_protos[fd.name])
 
         # A file descriptor's file-level resources are NOT visible to any importers.
         # The only way to make referenced resources visible is to aggregate them at
         # the API level and then pass that around.
         all_file_resources = collections.ChainMap(
-            *(proto.resource_messages for proto in pre_protos.values())
+            *(proto.resource_messages for proto in pre_protos.values()
+              if _declares_resources(proto.file_pb2))
         )
 
         # Second pass uses all the messages and enums defined in the entire API.
         # This allows LRO returning methods to see all the types in the API,
         # bypassing the above missing import problem.
-        protos: Dict[str, Proto] = {
-            name: Proto.build(
+        #
+        # Files which are not being generated have no services to load, so
+        # the first pass already built (or deferred) them in full, and they
+        # are reused.
+        # Protos passed in by the caller were built for another API, so they
+        # are rebuilt regardless.
+        #
+        # Note that even files which are not generated are bound to this
+        # API's naming (through every address in them), so their models
+        # are not prebuilt and shared between APIs. A stored copy would have
+        # to leave the naming out and re-bind it on load, and would save
+        # under 2ms per API: building the usual google/api, google/protobuf
+        # and google/longrunning imports takes about 7ms, and loading them
+        # about 5.6ms.
+        protos: Dict[str, Proto] = {}
+        for name, proto in pre_protos.items():
+            if not proto.file_to_generate and name not in (prior_protos or {}):
+                protos[name] = proto
+                continue
+            protos[name] = Proto.build(
                 file_descriptor=proto.file_pb2,
                 file_to_generate=proto.file_to_generate,
                 naming=naming,
                 opts=opts,
                 prior_protos=pre_protos,
                 all_resources=MappingProxyType(all_file_resources),
+                prior_symbols=symbols,
             )
-            for name, proto in pre_protos.items()
-        }
 
         # Parse the google.api.Service proto from the service_yaml data.
         service_yaml_config = service_pb2.Service()
@@ -501,10 +539,12 @@ class API:
     def requires_package(self, pkg: Tuple[str, ...]) -> bool:
         pkg_has_iam_mixin = self.has_iam_mixin and \
             pkg == ('google', 'iam', 'v1')
+        # Every message is in the package of the file declaring it, so the
+        # descriptors answer this without building imported files.
         return pkg_has_iam_mixin or any(
-            message.ident.package == pkg
+            tuple(proto.file_pb2.package.split('.')) == pkg
             for proto in self.all_protos.values()
-            for message in proto.all_messages.values()
+            if proto.file_pb2.message_type
         )
 
     def get_custom_operation_service(self, method: "wrappers.Method") -> "wrappers.Service":
@@ -752,6 +792,219 @@ class API:
         )
 
 
+@dataclasses.dataclass
+class _SymbolTable:
+    """A flat index of messages and enums, by fully-qualified name.
+
+    Looking a type up in each prior proto in turn gets slower with every
+    proto loaded, so :meth:`API.build` instead keeps one table up to date
+    as it loads protos. Where protos define the same name, the first
+    proto added wins, as it would in an ordered lookup.
+
+    Protos which are not being generated may be deferred instead: the
+    table then only records which file declares each name, and the file
+    is built when a name it declares is first looked up.
+    """
+    messages: Dict[str, wrappers.MessageType] = dataclasses.field(
+        default_factory=dict,
+    )
+    enums: Dict[str, wrappers.EnumType] = dataclasses.field(
+        default_factory=dict,
+    )
+    deferred: Dict[str, '_DeferredProto'] = dataclasses.field(
+        default_factory=dict,
+    )
+
+    @classmethod
+    def build(cls, protos: Iterable[Proto]) -> '_SymbolTable':
+        """Return a table of the messages and enums in the given protos."""
+        answer = cls()
+        for proto in protos:
+            answer.add(proto)
+        return answer
+
+    def add(self, proto: Proto) -> None:
+        """Add the messages and enums of a proto to the table."""
+        for name, message in proto.all_messages.items():
+            self.messages.setdefault(name, message)
+        for name, enum in proto.all_enums.items():
+            self.enums.setdefault(name, enum)
+
+    def defer(
+        self,
+        file_descriptor: descriptor_pb2.FileDescriptorProto,
+        *,
+        naming: api_naming.Naming,
+        opts: Options,
+    ) -> Proto:
+        """Add the names declared by a file which is not being generated.
+
+        Returns:
+            ~.Proto: The proto for the file. Its messages and enums are
+            built the first time they are used.
+        """
+        deferred = _DeferredProto(
+            file_descriptor, naming=naming, opts=opts, symbols=self,
+        )
+        for name in deferred.declared_names():
+            self.deferred.setdefault(name, deferred)
+        return Proto(
+            file_pb2=file_descriptor,
+            services={},
+            all_messages=_DeferredMapping(deferred, 'all_messages'),
+            all_enums=_DeferredMapping(deferred, 'all_enums'),
+            file_to_generate=False,
+            meta=metadata.Metadata(
+                address=_file_address(file_descriptor, naming),
+            ),
+        )
+
+
+class _DeferredProto:
+    """A proto which is not being generated, built on first use."""
+
+    def __init__(
+        self,
+        file_descriptor: descriptor_pb2.FileDescriptorProto,
+        *,
+        naming: api_naming.Naming,
+        opts: Options,
+        symbols: _SymbolTable,
+    ) -> None:
+        self.file_descriptor = file_descriptor
+        self.naming = naming
+        self.opts = opts
+        self.symbols = symbols
+        self.proto: Optional[Proto] = None
+        self.building = False
+
+    def build(self) -> Proto:
+        """Return the proto, building it first if necessary."""
+        # Build the deferred protos whose types this one uses beforehand,
+        # so that long chains of references between files do not recurse.
+        pending: List[_DeferredProto] = [self]
+        while pending:
+            deferred = pending[-1]
+            if deferred.proto is None:
+                unbuilt = [
+                    d for d in deferred._uses()
+                    if d.proto is None and d not in pending
+                ]
+                if unbuilt:
+                    pending.extend(unbuilt)
+                    continue
+                deferred.building = True
+                try:
+                    deferred.proto = Proto.build(
+                        file_descriptor=deferred.file_descriptor,
+                        file_to_generate=False,
+                        naming=deferred.naming,
+                        opts=deferred.opts,
+                        load_services=False,
+                        prior_symbols=deferred.symbols,
+                    )
+                finally:
+                    deferred.building = False
+            pending.pop()
+        return self.proto  # type: ignore
+
+    def declared_names(self) -> Iterator[str]:
+        """Yield the full names of the messages and enums in the file."""
+        package = tuple(self.file_descriptor.package.split('.'))
+        yield from ('.'.join(package + (e.name,))
+                    for e in self.file_descriptor.enum_type)
+        pending = [(package, m) for m in self.file_descriptor.message_type]
+        while pending:
+            parent, message_pb = pending.pop()
+            address = parent + (message_pb.name,)
+            yield '.'.join(address)
+            yield from ('.'.join(address + (e.name,))
+                        for e in message_pb.enum_type)
+            pending.extend((address, m) for m in message_pb.nested_type)
+
+    def _uses(self) -> Iterator['_DeferredProto']:
+        """Yield the deferred protos declaring the types of any field."""
+        pending = list(self.file_descriptor.message_type)
+        while pending:
+            message_pb = pending.pop()
+            pending.extend(message_pb.nested_type)
+            for field_pb in message_pb.field:
+                deferred = self.symbols.deferred.get(
+                    field_pb.type_name.lstrip('.'))
+                if deferred and deferred is not self:
+                    yield deferred
+
+
+class _DeferredMapping(Mapping[str, Any]):
+    """The messages or enums of a deferred proto, built on first use."""
+
+    def __init__(self, deferred: _DeferredProto, attr: str) -> None:
+        self._deferred = deferred
+        self._attr = attr
+
+    def _mapping(self) -> Mapping[str, Any]:
+        return getattr(self._deferred.build(), self._attr)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._mapping()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._mapping())
+
+    def __len__(self) -> int:
+        return len(self._mapping())
+
+
+class _DeferredSymbols(Mapping[str, Any]):
+    """The messages or enums declared by deferred protos, by full name.
+
+    Looking a name up builds the proto declaring it. Names declared by a
+    proto which is being built are not found, just as they would not be
+    if it had been built right away; the builder resolves those itself.
+    """
+
+    def __init__(self, deferred: Mapping[str, _DeferredProto], attr: str) -> None:
+        self._deferred = deferred
+        self._attr = attr
+
+    def __getitem__(self, key: str) -> Any:
+        deferred = self._deferred[key]
+        if deferred.building:
+            raise KeyError(key)
+        return getattr(deferred.build(), self._attr)[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._deferred)
+
+    def __len__(self) -> int:
+        return len(self._deferred)
+
+
+def _file_address(
+    file_descriptor: descriptor_pb2.FileDescriptorProto,
+    naming: api_naming.Naming,
+) -> metadata.Address:
+    """Return the address of everything declared in a file."""
+    return metadata.Address(
+        api_naming=naming,
+        module=file_descriptor.name.split('/')[-1][:-len('.proto')],
+        package=tuple(file_descriptor.package.split('.')),
+    )
+
+
+def _declares_resources(file_descriptor: descriptor_pb2.FileDescriptorProto) -> bool:
+    """Return True if a file declares any file-level resources.
+
+    See :attr:`Proto.resource_messages`.
+    """
+    return bool(
+        file_descriptor.options.Extensions[resource_pb2.resource_definition]
+    ) or any(
+        m.options.Extensions[resource_pb2.resource].type
+        for m in file_descriptor.message_type
+    )
+
+
 class _ProtoBuilder:
     """A "builder class" for Proto objects.
 
@@ -777,6 +1030,7 @@ class _ProtoBuilder:
         prior_protos: Optional[Mapping[str, Proto]] = None,
         load_services: bool = True,
         all_resources: Optional[Mapping[str, wrappers.MessageType]] = None,
+        prior_symbols: Optional['_SymbolTable'] = None,
     ):
         self.proto_messages: Dict[str, wrappers.MessageType] = {}
         self.proto_enums: Dict[str, wrappers.EnumType] = {}
@@ -784,6 +1038,9 @@ class _ProtoBuilder:
         self.file_descriptor = file_descriptor
         self.file_to_generate = file_to_generate
         self.prior_protos = prior_protos or {}
+        self.prior_symbols = prior_symbols or _SymbolTable.build(
+            self.prior_protos.values(),
+        )
         self.opts = opts
 
         # Iterate over the documentation and place it into a dictionary.
@@ -803,11 +1060,7 @@ class _ProtoBuilder:
         # We put this together by a baton pass of sorts: everything in
         # this file *starts with* this address, which is appended to
         # for each item as it is loaded.
-        self.address = metadata.Address(
-            api_naming=naming,
-            module=file_descriptor.name.split('/')[-1][:-len('.proto')],
-            package=tuple(file_descriptor.package.split('.')),
-        )
+        self.address = _file_address(file_descriptor, naming)
 
         # Now iterate over the FileDescriptorProto and pull out each of
         # the messages, enums, and services.
@@ -910,15 +1163,16 @@ class _ProtoBuilder:
             meta=naive.meta.with_context(collisions=naive.names),
         )
 
+    # ChainMap is typed as taking mutable mappings, but only ever writes to
+    # the first; the deferred symbols are read-only.
     @cached_property
     def api_enums(self) -> Mapping[str, wrappers.EnumType]:
         return collections.ChainMap(
             {},
             self.proto_enums,
-            # This is actually fine from a typing perspective:
-            # we're agglutinating all the prior protos' enums, which are
-            # stored in maps. This is just a convenient way to expand it out.
-            *[p.all_enums for p in self.prior_protos.values()],  # type: ignore
+            self.prior_symbols.enums,
+            cast(MutableMapping[str, wrappers.EnumType], _DeferredSymbols(
+                self.prior_symbols.deferred, 'all_enums')),
         )
 
     @cached_property
@@ -926,10 +1180,9 @@ class _ProtoBuilder:
         return collections.ChainMap(
             {},
             self.proto_messages,
-            # This is actually fine from a typing perspective:
-            # we're agglutinating all the prior protos' enums, which are
-            # stored in maps. This is just a convenient way to expand it out.
-            *[p.all_messages for p in self.prior_protos.values()],  # type: ignore
+            self.prior_symbols.messages,
+            cast(MutableMapping[str, wrappers.MessageType], _DeferredSymbols(
+                self.prior_symbols.deferred, 'all_messages')),
         )
 
     def _load_children(self,
@@ -27,7 +27,9 @@ with the things they describe for easy access in templates.
 """
 
 import dataclasses
+import functools
 import re
+import sys
 from typing import FrozenSet, Set, Tuple, Optional
 
 from google.protobuf import descriptor_pb2
@@ -36,10 +38,19 @@ from gapic.schema import imp
 from gapic.schema import naming
 from gapic.utils import cached_property
 from gapic.utils import RESERVED_NAMES
+from gapic.utils import slotted
+
+
+@functools.lru_cache(maxsize=4096)
+def _intern(names: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Return the first of the equal tuples passed in recently."""
+    return names
+
 
 # This class is a minor hack to optimize Address's __eq__ method.
 
 
+@slotted
 @dataclasses.dataclass(frozen=True)
 class BaseAddress:
     name: str = ''
@@ -49,6 +60,7 @@ class BaseAddress:
     parent: Tuple[str, ...] = dataclasses.field(default_factory=tuple)
 
 
+@slotted
 @dataclasses.dataclass(frozen=True)
 class Address(BaseAddress):
     api_naming: naming.Naming = dataclasses.field(
@@ -272,11 +284,13 @@ class Address(BaseAddress):
         Returns:
             ~.Address: The new address object.
         """
+        # Large APIs repeat the same names (and so parents) many times over;
+        # interning them keeps one copy of each.
         return dataclasses.replace(
             self,
             module_path=self.module_path + path,
-            name=child_name,
-            parent=self.parent + (self.name,) if self.name else self.parent,
+            name=sys.intern(child_name),
+            parent=_intern(self.parent + (self.name,)) if self.name else self.parent,
         )
 
     def rel(self, address: 'Address') -> str:
@@ -365,6 +379,7 @@ class Address(BaseAddress):
         )
 
 
+@slotted
 @dataclasses.dataclass(frozen=True)
 class Metadata:
     address: Address = dataclasses.field(default_factory=Address)
@@ -30,10 +30,12 @@ Documentation is consistently at ``{thing}.meta.doc``.
 import collections
 import copy
 import dataclasses
+import functools
 import json
 import keyword
 import re
 from itertools import chain
+from types import MappingProxyType
 from typing import (Any, cast, Dict, FrozenSet, Iterator, Iterable, List, Mapping,
                     ClassVar, Optional, Sequence, Set, Tuple, Union, Pattern)
 from google.api import annotations_pb2      # type: ignore
@@ -54,6 +56,7 @@ from gapic.schema import metadata
 from gapic.utils import uri_sample
 
 
+@utils.slotted
 @dataclasses.dataclass(frozen=True)
 class Field:
     """Description of a field."""
@@ -66,7 +69,7 @@ class Field:
     oneof: Optional[str] = None
 
     def __getattr__(self, name):
-        return getattr(self.field_pb, name)
+        return utils.delegate(self, 'field_pb', name)
 
     def __hash__(self):
         # The only sense in which it is meaningful to say a field is equal to
@@ -389,6 +392,50 @@ class Field:
         )
 
 
+class _ContextualFields(Mapping[str, Field]):
+    """A message's fields, with a context applied to each on first access.
+
+    Applying a context to a field applies it to the field's message, and so
+    on through every message the field leads to. Deferring that until the
+    field is used means only the parts of the graph templates look at are
+    ever copied.
+    """
+
+    def __init__(
+            self,
+            original: Mapping[str, Field],
+            *,
+            collisions: Set[str],
+            visited_messages: Set["MessageType"],
+    ) -> None:
+        self.original = original
+        self._collisions = collisions
+        self._visited_messages = visited_messages
+        self._fields: Dict[str, Field] = {}
+
+    def __getitem__(self, key: str) -> Field:
+        if key not in self._fields:
+            self._fields[key] = self.original[key].with_context(
+                collisions=self._collisions,
+                visited_messages=self._visited_messages,
+            )
+        return self._fields[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.original)
+
+    def __len__(self) -> int:
+        return len(self.original)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def __reduce__(self):
+        # The visited messages are not restored yet when unpickling, so they
+        # cannot be hashed into a set; pickle the realized fields instead.
+        return (dict, (dict(self),))
+
+
 @dataclasses.dataclass(frozen=True)
 class FieldHeader:
     raw: str
@@ -404,9 +451,10 @@ class Oneof:
     oneof_pb: descriptor_pb2.OneofDescriptorProto
 
     def __getattr__(self, name):
-        return getattr(self.oneof_pb, name)
+        return utils.delegate(self, 'oneof_pb', name)
 
 
+@utils.slotted
 @dataclasses.dataclass(frozen=True)
 class MessageType:
     """Description of a message (defined with the ``message`` keyword)."""
@@ -414,6 +462,9 @@ class MessageType:
     # https://google.aip.dev/122
     PATH_ARG_RE = re.compile(r'\{([a-zA-Z0-9_\-]+)(?:=\*\*)?\}')
 
+    # Attributes which are not fields (see :meth:`_reaches_cycle`).
+    __slots__ = ('_cycle_reachable',)
+
     # Instance attributes
     message_pb: descriptor_pb2.DescriptorProto
     fields: Mapping[str, Field]
@@ -425,7 +476,7 @@ class MessageType:
     oneofs: Optional[Mapping[str, 'Oneof']] = None
 
     def __getattr__(self, name):
-        return getattr(self.message_pb, name)
+        return utils.delegate(self, 'message_pb', name)
 
     def __hash__(self):
         # Identity is sufficiently unambiguous.
@@ -733,17 +784,80 @@ class MessageType:
         The ``skip_fields`` argument will omit applying the context to the
         underlying fields. This provides for an "exit" in the case of circular
         references.
+
+        Without circular references, the derivative does not depend on
+        ``visited_messages``, so it is made once for each set of collisions
+        and shared, rather than copied again for every reference.
         """
+        if self._reaches_cycle():
+            return self._with_context(
+                collisions=collisions,
+                skip_fields=skip_fields,
+                visited_messages=visited_messages,
+            )
+
+        key = (frozenset(collisions), skip_fields)
+        if key not in self._derivatives:
+            self._derivatives[key] = self._with_context(
+                collisions=collisions,
+                skip_fields=skip_fields,
+            )
+        return self._derivatives[key]
+
+    @utils.cached_property
+    def _derivatives(self) -> Dict[Tuple[FrozenSet[str], bool], 'MessageType']:
+        """Return the derivatives of this message made by :meth:`with_context`."""
+        return {}
+
+    def _reaches_cycle(self, path: FrozenSet[int] = frozenset()) -> bool:
+        """Return True if a circular reference can be reached from this message.
+
+        Args:
+            path (FrozenSet[int]): The ids of the messages through which this
+                message was reached.
+        """
+        if id(self) in path:
+            return True
+
+        # Anything reached from here that is on the path is part of a cycle,
+        # so the answer does not depend on the path and can be stored.
+        try:
+            # Bypass ``__getattr__``, which would consult the descriptor.
+            return object.__getattribute__(self, '_cycle_reachable')
+        except AttributeError:
+            pass
+
+        path = path | {id(self)}
+        # The fields of a derivative lead to derivatives of the original
+        # fields' messages, which have the same references; checking
+        # the originals avoids applying the context to every field.
+        fields = self.fields
+        if isinstance(fields, _ContextualFields):
+            fields = fields.original
+        answer = any(
+            message._reaches_cycle(path)
+            for message in chain(
+                (f.message for f in fields.values() if f.message),
+                self.nested_messages.values(),
+            )
+        )
+        object.__setattr__(self, '_cycle_reachable', answer)
+        return answer
+
+    def _with_context(self, *,
+                      collisions: Set[str],
+                      skip_fields: bool = False,
+                      visited_messages: Optional[Set["MessageType"]] = None,
+                      ) -> 'MessageType':
         visited_messages = visited_messages or set()
         visited_messages = visited_messages | {self}
         return dataclasses.replace(
             self,
-            fields={
-                k: v.with_context(
-                    collisions=collisions,
-                    visited_messages=visited_messages
-                ) for k, v in self.fields.items()
-            } if not skip_fields else self.fields,
+            fields=_ContextualFields(
+                self.fields,
+                collisions=collisions,
+                visited_messages=visited_messages,
+            ) if not skip_fields else self.fields,
             nested_enums={
                 k: v.with_context(collisions=collisions)
                 for k, v in self.nested_enums.items()
@@ -769,9 +883,10 @@ class EnumValueType:
     )
 
     def __getattr__(self, name):
-        return getattr(self.enum_value_pb, name)
+        return utils.delegate(self, 'enum_value_pb', name)
 
 
+@utils.slotted
 @dataclasses.dataclass(frozen=True)
 class EnumType:
     """Description of an enum (defined with the ``enum`` keyword.)"""
@@ -786,7 +901,7 @@ class EnumType:
         return hash(self.ident)
 
     def __getattr__(self, name):
-        return getattr(self.enum_pb, name)
+        return utils.delegate(self, 'enum_pb', name)
 
     @property
     def resource_path(self) -> Optional[str]:
@@ -861,9 +976,12 @@ class PrimitiveType(PythonType):
     python_type: Optional[type]
 
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def build(cls, primitive_type: Optional[type]):
         """Return a PrimitiveType object for the given Python primitive type.
 
+        Primitive types never change, so each one is only made once.
+
         Args:
             primitive_type (cls): A Python primitive type, such as
                 :class:`int` or :class:`str`. Despite not being a type,
@@ -1156,6 +1274,7 @@ class MixinHttpRule(HttpRule):
         return req
 
 
+@utils.slotted
 @dataclasses.dataclass(frozen=True)
 class Method:
     """Description of a method (defined with the ``rpc`` keyword)."""
@@ -1172,7 +1291,7 @@ class Method:
     )
 
     def __getattr__(self, name):
-        return getattr(self.method_pb, name)
+        return utils.delegate(self, 'method_pb', name)
 
     @property
     def safe_name(self) -> str:
@@ -1677,7 +1796,15 @@ class Service:
         return hash(f"{self.meta.address.api_naming.module_name}.{self.name}")
 
     def __getattr__(self, name):
-        return getattr(self.service_pb, name)
+        return utils.delegate(self, 'service_pb', name)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Mapping proxies cannot be pickled, so pickle what they show.
+        return dict(self.__dict__, visible_resources=dict(self.visible_resources))
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.__dict__['visible_resources'] = MappingProxyType(state['visible_resources'])
 
     @property
     def client_name(self) -> str:
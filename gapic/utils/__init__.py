@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from gapic.utils.cache import cached_property
+from gapic.utils.cache import memoize
 from gapic.utils.case import to_snake_case
 from gapic.utils.case import to_camel_case
 from gapic.utils.checks import is_msg_field_pb
@@ -27,22 +28,29 @@ from gapic.utils.lines import sort_lines
 from gapic.utils.lines import wrap
 from gapic.utils.options import Options
 from gapic.utils.reserved_names import RESERVED_NAMES
+from gapic.utils.rst import batch_rst
 from gapic.utils.rst import rst
+from gapic.utils.slots import delegate
+from gapic.utils.slots import slotted
 from gapic.utils.uri_conv import convert_uri_fieldnames
 
 
 __all__ = (
+    'batch_rst',
     'cached_property',
     'convert_uri_fieldnames',
+    'delegate',
     'doc',
     'empty',
     'is_msg_field_pb',
     'is_str_field_pb',
+    'memoize',
     'nth',
     'Options',
     'partition',
     'RESERVED_NAMES',
     'rst',
+    'slotted',
     'sort_lines',
     'to_snake_case',
     'to_camel_case',
@@ -12,32 +12,93 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import functools
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
 
 
-def cached_property(fx):
+T = TypeVar('T')
+
+
+class cached_property:
     """Make the callable into a cached property.
 
     Similar to @property, but the function will only be called once per
     object.
 
+    This is a non-data descriptor: the result is stored in the instance's
+    ``__dict__``, where it shadows the descriptor, so later accesses are
+    ordinary attribute lookups. This works on frozen dataclasses too.
+    :func:`~.slotted` classes, which have no ``__dict__``, store the
+    result in a slot instead.
+
     Args:
         fx (Callable[]): The property function.
+    """
+
+    def __init__(self, fx: Callable[[Any], Any]) -> None:
+        functools.update_wrapper(self, fx)  # type: ignore
+        self.fx = fx
+        self.name = fx.__name__
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    # Typed ``Any``, as the property this used to return was: the schema
+    # relies on invariants mypy cannot see, such as a field's type being a
+    # message.
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+
+        # Frozen dataclasses refuse ordinary assignment, but their
+        # __dict__ is writable all the same.
+        answer = instance.__dict__[self.name] = self.fx(instance)
+        return answer
 
-    Returns:
-        Callable[]: The wrapped function.
+
+class memoize(Generic[T]):
+    """Cache the results of a pure function.
+
+    Unlike :func:`functools.lru_cache`, this accepts unhashable arguments
+    (which are simply not cached), and counts the calls made and how many
+    of them were answered from the cache.
+
+    Args:
+        fx (Callable[]): The function. Its result must depend only on its
+            arguments.
+        maxsize (int): The number of results to keep. Once the cache is
+            full, the least recently used result is evicted.
+
+    Attributes:
+        calls (int): The number of times the function was called.
+        hits (int): The number of calls answered from the cache.
     """
-    @functools.wraps(fx)
-    def inner(self):
-        # Quick check: If there is no cache at all, create an empty cache.
-        if not hasattr(self, '_cached_values'):
-            object.__setattr__(self, '_cached_values', {})
-
-        # If and only if the function's result is not in the cache,
-        # run the function.
-        if fx.__name__ not in self._cached_values:
-            self._cached_values[fx.__name__] = fx(self)
-
-        # Return the value from cache.
-        return self._cached_values[fx.__name__]
-    return property(inner)
+
+    def __init__(self, fx: Callable[..., T], maxsize: int = 8192) -> None:
+        functools.update_wrapper(self, fx)  # type: ignore
+        self.fx = fx
+        self.maxsize = maxsize
+        self.calls = 0
+        self.hits = 0
+        self._cache: 'collections.OrderedDict[Hashable, T]' = collections.OrderedDict()
+
+    def __call__(self, *args: Any, **kwargs: Any) -> T:
+        self.calls += 1
+        key: Hashable = (args, tuple(kwargs.items())) if kwargs else args
+        try:
+            answer = self._cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # An unhashable argument.
+            return self.fx(*args, **kwargs)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return answer
+
+        answer = self._cache[key] = self.fx(*args, **kwargs)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return answer
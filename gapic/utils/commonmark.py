@@ -0,0 +1,272 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Convert simple CommonMark to ReStructured Text without pandoc.
+
+Most proto comments only use a handful of constructs: paragraphs, lists,
+inline code, emphasis and links. This module converts exactly those, and
+produces what pandoc would, character for character. Anything else,
+including constructs whose conversion depends on subtle parsing rules, is
+left to pandoc.
+"""
+
+import re
+from typing import List, Match, Optional, Union
+
+
+# Raw HTML, entities, escapes, images, substitutions, and non-ASCII text
+# (which pandoc wraps by display width) are all left to pandoc.
+_UNSUPPORTED = re.compile(r'[^\n -~]|[<&\\|]|!\[|``')
+
+# Lines which could start a block other than a paragraph or a list.
+_BLOCK_START = re.compile(
+    r' *([#>=_]|```|~~~|-+ *$|[-*+]( |$)|\d+[.)]( |$)|\[[^\]]*\]:)')
+
+# List items; more spaces after the marker would start a code block.
+_BULLET = re.compile(r'( {0,3})([-*+]) {1,4}(?=\S)')
+_ORDERED = re.compile(r'( {0,3})(\d{1,9})\. {1,4}(?=\S)')
+
+# The characters which may surround inline markup in RST without escaping.
+_BEFORE_MARKUP = frozenset(' ([{"\'/-:')
+_AFTER_MARKUP = frozenset(' )]}"\'/-:;,.!?')
+
+# Plain text characters which pandoc copies as they are.
+_PLAIN = re.compile(r'[A-Za-z0-9 \n.,;:!?\'"()/+=#%$@^~{}>-]')
+
+# A space which the text may not be wrapped at.
+_NBSP = '\0'
+
+
+def to_rst(text: str, columns: int, bullet: str = '- ') -> Optional[str]:
+    """Convert CommonMark text to RST, as pandoc would.
+
+    Args:
+        text (str): The CommonMark text.
+        columns (int): The number of columns to wrap the text to.
+        bullet (str): The marker of bullet list items, including the
+            spaces after it. Pandoc 3 writes ``'- '``, and earlier
+            versions ``'-  '``.
+
+    Returns:
+        Optional[str]: The RST text (without a trailing newline), or
+        ``None`` if the text uses anything but the simplest constructs.
+    """
+    if _UNSUPPORTED.search(text):
+        return None
+
+    blocks: List[Union[List[str], _List]] = []
+    for chunk in re.split(r'\n\s*\n', text.strip('\n')):
+        lines = chunk.split('\n')
+
+        # Indented text after a list continues its last item.
+        indent = len(lines[0]) - len(lines[0].lstrip(' '))
+        if blocks and isinstance(blocks[-1], _List) and (
+                indent >= blocks[-1].content_indent):
+            return None
+
+        # A paragraph, which may be interrupted by a list.
+        paragraph: List[str] = []
+        while lines and not _starts_item(lines[0], paragraph):
+            if _BLOCK_START.match(lines[0]):
+                return None
+            paragraph.append(lines.pop(0))
+        if paragraph:
+            if indent > 3:
+                return None
+            blocks.append(paragraph)
+        if not lines:
+            continue
+
+        items = _List.parse(lines)
+        if items is None:
+            return None
+        # Lists separated by blank lines are one loose list, provided
+        # that they use the same marker.
+        previous = blocks[-1] if blocks else None
+        if isinstance(previous, _List):
+            if previous.marker != items.marker:
+                return None
+            previous.items.extend(items.items)
+            previous.content_indent = items.content_indent
+            previous.loose = True
+        else:
+            blocks.append(items)
+
+    answers = []
+    for block in blocks:
+        if isinstance(block, _List):
+            answer = block.render(columns, bullet)
+        else:
+            answer = _fill(block, columns)
+        if answer is None:
+            return None
+        answers.append(answer)
+    return '\n\n'.join(answers)
+
+
+class _List:
+    """A bullet or ordered list whose items are simple paragraphs."""
+
+    def __init__(self, marker: str, start: int, content_indent: int) -> None:
+        self.marker = marker
+        self.start = start
+        self.content_indent = content_indent
+        self.items: List[List[str]] = []
+        self.loose = False
+
+    @classmethod
+    def parse(cls, lines: List[str]) -> Optional['_List']:
+        """Parse the lines of a list, which start with an item.
+
+        Returns ``None`` unless every line is part of a simple item.
+        """
+        match = _BULLET.match(lines[0]) or _ORDERED.match(lines[0])
+        assert match
+        regex, indent = match.re, match.group(1)
+        if regex is _BULLET:
+            answer = cls(match.group(2), 1, match.end())
+        else:
+            answer = cls('.', int(match.group(2)), match.end())
+
+        for line in lines:
+            match = regex.match(line)
+            if match:
+                if match.group(1) != indent or (
+                        regex is _BULLET and match.group(2) != answer.marker):
+                    return None
+                if _BLOCK_START.match(line, match.end()):
+                    return None
+                answer.items.append([line[match.end():]])
+            elif _BLOCK_START.match(line):
+                return None
+            else:
+                # A continuation line, which may be lazy.
+                answer.items[-1].append(line)
+        return answer
+
+    def render(self, columns: int, bullet: str) -> Optional[str]:
+        if self.marker == '.':
+            numbers = range(self.start, self.start + len(self.items))
+            width = max(len(f'{n}.') for n in numbers) + 1
+            markers = [f'{n}.'.ljust(width) for n in numbers]
+        else:
+            width = len(bullet)
+            markers = [bullet] * len(self.items)
+
+        answers = []
+        for marker, lines in zip(markers, self.items):
+            answer = _fill(lines, columns - width)
+            if answer is None:
+                return None
+            answers.append(marker + answer.replace('\n', '\n' + ' ' * width))
+        return ('\n\n' if self.loose else '\n').join(answers)
+
+
+def _starts_item(line: str, paragraph: List[str]) -> bool:
+    """Return True if the line starts a list item.
+
+    Only bullets, and lists starting at one, may interrupt a paragraph.
+    """
+    match = _BULLET.match(line) or _ORDERED.match(line)
+    if match is None:
+        return False
+    return not paragraph or match.re is _BULLET or match.group(2) == '1'
+
+
+def _fill(lines: List[str], columns: int) -> Optional[str]:
+    """Convert the inline text of a paragraph, wrapping it as pandoc does."""
+    if any(line.endswith('  ') for line in lines[:-1]):
+        # A hard line break.
+        return None
+    inline = _inline(' '.join(line.strip() for line in lines))
+    if inline is None:
+        return None
+
+    answer: List[str] = []
+    line = ''
+    for word in inline.split():
+        word = word.replace(_NBSP, ' ')
+        if line and len(line) + 1 + len(word) <= columns:
+            line += ' ' + word
+        else:
+            if line:
+                answer.append(line)
+            line = word
+    answer.append(line)
+    return '\n'.join(answer)
+
+
+_CODE = re.compile(r'`([^`\s]|[^`\s][^`\n]*[^`\s])`')
+_EMPHASIS = re.compile(
+    r'(\*\*?)([A-Za-z0-9][A-Za-z0-9 ,.:;\'/()-]*(?<=[A-Za-z0-9]))\1')
+_LINK = re.compile(
+    r'\[([A-Za-z0-9][A-Za-z0-9 ,.:;\'/()-]*)\]\(([^\s()<>`*]+)\)')
+
+
+def _inline(text: str) -> Optional[str]:
+    """Convert inline CommonMark to RST.
+
+    Spaces in the result may be wrapped at, unless they are :data:`_NBSP`.
+    """
+    answer = []
+    i = 0
+    while i < len(text):
+        for regex, convert in (
+            (_CODE, _code),
+            (_EMPHASIS, _emphasis),
+            (_LINK, _link),
+        ):
+            match = regex.match(text, i)
+            if match:
+                before = text[i - 1] if i else ' '
+                after = text[match.end()] if match.end() < len(text) else ' '
+                if before not in _BEFORE_MARKUP or after not in _AFTER_MARKUP:
+                    return None
+                converted = convert(match)
+                if converted is None:
+                    return None
+                answer.append(converted)
+                i = match.end()
+                break
+        else:
+            char = text[i]
+            if char == '_':
+                # Underscores are only literal within words.
+                if not (text[i - 1:i].isalnum() and text[i + 1:i + 2].isalnum()):
+                    return None
+            elif char == '[':
+                # Brackets are literal unless they form a link.
+                if re.match(r'\[[^\]]*\]\(', text[i:]):
+                    return None
+            elif char != ']' and not _PLAIN.match(char):
+                return None
+            answer.append(char)
+            i += 1
+    return ''.join(answer)
+
+
+def _code(match: Match[str]) -> str:
+    return '``' + match.group(1).replace(' ', _NBSP) + '``'
+
+
+def _emphasis(match: Match[str]) -> str:
+    return match.group(1) + match.group(2) + match.group(1)
+
+
+def _link(match: Match[str]) -> Optional[str]:
+    text, url = match.groups()
+    # Pandoc writes links to their own URL differently.
+    if text.strip() != text or '://' in text:
+        return None
+    return f'`{text} <{url}>`__'.replace(' <', _NBSP + '<')
@@ -50,6 +50,13 @@ class Options:
         default_factory=dict)
     rest_numeric_enums: bool = False
     proto_plus_deps: Tuple[str, ...] = dataclasses.field(default=('',))
+    jobs: int = 1
+    render_cache: str = ''
+    bytecode_cache: str = ''
+    schema_cache: str = ''
+    rst_cache: str = ''
+    filter_stats: bool = False
+    profile: str = ''
 
     # Class constants
     PYTHON_GAPIC_PREFIX: str = 'python-gapic-'
@@ -90,6 +97,8 @@ class Options:
             gapic.samplegen_utils.types.InvalidConfig:
                 If paths to files or directories that should contain sample
                 configs are passed and no valid sample config is found.
+            ValueError: If an option which takes a number is given something
+                else.
         """
         # Parse out every option beginning with `python-gapic`
         opts: DefaultDict[str, List[str]] = defaultdict(list)
@@ -191,6 +200,20 @@ class Options:
             service_yaml_config=service_yaml_config,
             rest_numeric_enums=bool(opts.pop('rest-numeric-enums', False)),
             proto_plus_deps=proto_plus_deps,
+            # The number of worker processes used to render templates.
+            jobs=cls._positive_int('jobs', opts.pop('jobs', ['1']).pop()),
+            # A directory in which to cache rendered files across runs.
+            render_cache=opts.pop('render-cache', ['']).pop(),
+            # A directory in which to cache compiled templates across runs.
+            bytecode_cache=opts.pop('bytecode-cache', ['']).pop(),
+            # A directory in which to cache built API models across runs.
+            schema_cache=opts.pop('schema-cache', ['']).pop(),
+            # A directory in which to cache docstrings converted to RST.
+            rst_cache=opts.pop('rst-cache', ['']).pop(),
+            # Whether to report how often template filters are called.
+            filter_stats=bool(opts.pop('filter-stats', False)),
+            # Where to write a report of where the time and memory go.
+            profile=opts.pop('profile', ['']).pop(),
         )
 
         # Note: if we ever need to recursively check directories for sample
@@ -203,3 +226,17 @@ class Options:
 
         # Done; return the built options.
         return answer
+
+    @classmethod
+    def _positive_int(cls, key: str, value: str) -> int:
+        """Return the value of an option which must be a positive integer."""
+        try:
+            answer = int(value)
+        except ValueError:
+            answer = 0
+        if answer < 1:
+            raise ValueError(
+                f'`{cls.PYTHON_GAPIC_PREFIX}{key}` must be a positive '
+                f'integer, not {value!r}.'
+            )
+        return answer
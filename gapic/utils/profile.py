@@ -0,0 +1,172 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Record where the time and memory of a run of the generator go.
+
+While :func:`profiling` is active, each :func:`span` records its wall time,
+CPU time and peak memory, and each function wrapped by :func:`profiled`
+totals its calls and time. The report is a Chrome trace, which can be
+loaded by ``chrome://tracing`` or https://ui.perfetto.dev. Otherwise,
+nothing is recorded, and spans cost next to nothing.
+"""
+
+import collections
+import contextlib
+import functools
+import json
+import os
+import time
+import tracemalloc
+from typing import (Any, Callable, ContextManager, DefaultDict, Dict, Iterator,
+                    List, Optional, TypeVar)
+
+
+T = TypeVar('T')
+
+# `reset_peak` is new in Python 3.9; before that, the peak memory of a span
+# is the peak of the whole run so far.
+_reset_peak = getattr(tracemalloc, 'reset_peak', lambda: None)
+
+
+@contextlib.contextmanager
+def profiling(path: str, trace_memory: bool = True) -> Iterator[None]:
+    """Profile the generator while the context is active.
+
+    Tracing memory allocations slows the generator down considerably, so
+    the timings are best compared with each other, rather than with runs
+    which are not profiled.
+
+    Args:
+        path (str): Where to write the report when the context exits.
+            If empty, nothing is recorded.
+        trace_memory (bool): Whether to record the peak memory of spans.
+            Without it, the timings are those of an ordinary run.
+    """
+    global _profiler
+    if not path:
+        yield
+        return
+
+    tracing = tracemalloc.is_tracing()
+    if trace_memory and not tracing:
+        tracemalloc.start()
+    profiler = _profiler = _Profiler(trace_memory)
+    try:
+        with span('generate', 'stage'):
+            yield
+    finally:
+        _profiler = None
+        if trace_memory and not tracing:
+            tracemalloc.stop()
+        profiler.write(path)
+
+
+def span(name: str, category: str, **args: Any) -> ContextManager[None]:
+    """Record a span of the run, if the generator is being profiled.
+
+    Args:
+        name (str): The name of the span, such as the template rendered.
+        category (str): The kind of span, such as ``'template'``.
+        args: Further details of the span, which are added to the report.
+    """
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _profiler.span(name, category, args)
+
+
+def profiled(name: str, fx: Callable[..., T]) -> Callable[..., T]:
+    """Wrap a function so that its calls are totalled while profiling.
+
+    Functions which are called very often (such as template filters) are
+    totalled rather than recorded as spans, which would be too costly.
+
+    Args:
+        name (str): The name of the function in the report.
+        fx (Callable): The function.
+    """
+    @functools.wraps(fx)
+    def wrapper(*args, **kwargs):
+        if _profiler is None:
+            return fx(*args, **kwargs)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            return fx(*args, **kwargs)
+        finally:
+            totals = _profiler.functions[name]
+            totals['calls'] += 1
+            totals['wall_ms'] += (time.perf_counter() - wall) * 1000
+            totals['cpu_ms'] += (time.process_time() - cpu) * 1000
+    return wrapper
+
+
+class _Profiler:
+    def __init__(self, trace_memory: bool) -> None:
+        self.trace_memory = trace_memory
+        self.events: List[Dict[str, Any]] = []
+        self.functions: DefaultDict[str, Dict[str, float]] = (
+            collections.defaultdict(lambda: dict.fromkeys(
+                ('calls', 'wall_ms', 'cpu_ms'), 0)))
+        # The highest memory traced within each open span, innermost last.
+        self._peaks: List[int] = []
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str, args: Dict[str, Any]) -> Iterator[None]:
+        if self.trace_memory:
+            # Spans reset the peak, so take note of it for the enclosing span.
+            current, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            _reset_peak()
+            self._peaks.append(current)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall_end, cpu_end = time.perf_counter(), time.process_time()
+            args = dict(args, cpu_ms=round((cpu_end - cpu) * 1000, 3))
+            if self.trace_memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                args['peak_memory_kb'] = round((peak - current) / 1024)
+            self.events.append({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'pid': os.getpid(),
+                'tid': 0,
+                'ts': round((wall - self._start) * 1e6),
+                'dur': round((wall_end - wall) * 1e6),
+                'args': args,
+            })
+
+    def write(self, path: str) -> None:
+        """Write the report, in the JSON object format of Chrome traces."""
+        # List the events in the order they started, enclosing spans first.
+        events = sorted(
+            self.events, key=lambda event: (event['ts'], -event['dur']))
+        functions = {
+            name: {key: round(value, 3) for key, value in totals.items()}
+            for name, totals in sorted(self.functions.items())
+        }
+        with open(path, 'w') as f:
+            json.dump({
+                'traceEvents': events,
+                'displayTimeUnit': 'ms',
+                'functions': functions,
+            }, f, indent=1)
+
+
+_profiler: Optional[_Profiler] = None
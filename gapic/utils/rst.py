@@ -12,13 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextlib
+import functools
 import re
-from typing import Optional
+from typing import (TYPE_CHECKING, Dict, FrozenSet, Iterable, Iterator,
+                    Optional, Sequence, Set, Tuple)
 
 import pypandoc  # type: ignore
 
+from gapic.utils import commonmark
+from gapic.utils import profile
 from gapic.utils.lines import wrap
 
+if TYPE_CHECKING:  # pragma: NO COVER
+    from gapic.generator.rst_cache import RstCache
+
 
 def rst(text: str, width: int = 72, indent: int = 0, nl: Optional[bool] = None,
         source_format: str = 'commonmark'):
@@ -42,7 +50,7 @@ def rst(text: str, width: int = 72, indent: int = 0, nl: Optional[bool] = None,
     # do not convert it.
     # (This makes code generation significantly faster; calling out to pandoc
     # is by far the most expensive thing we do.)
-    if not re.search(r'[|*`_[\]]', text):
+    if not _has_markup(text):
         answer = wrap(text,
             indent=indent,
             offset=indent + 3,
@@ -50,10 +58,8 @@ def rst(text: str, width: int = 72, indent: int = 0, nl: Optional[bool] = None,
                       )
     else:
         # Convert from CommonMark to ReStructured Text.
-        answer = pypandoc.convert_text(text, 'rst',
-            format=source_format,
-            extra_args=['--columns=%d' % (width - indent)],
-        ).strip().replace('\n', f"\n{' ' * indent}")
+        answer = _convert(text, width - indent, source_format).replace(
+            '\n', f"\n{' ' * indent}")
 
     # Add a newline to the end of the document if any line breaks are
     # already present.
@@ -71,3 +77,197 @@ def rst(text: str, width: int = 72, indent: int = 0, nl: Optional[bool] = None,
 
     # Done; return the answer.
     return answer
+
+
+@contextlib.contextmanager
+def batch_rst(
+    texts: Iterable[str], cache: Optional['RstCache'] = None,
+) -> Iterator[None]:
+    """Convert the given texts in bulk while the context is active.
+
+    Each call to pandoc starts a new process, which takes far longer than
+    the conversion itself. Within this context, the first time :func:`rst`
+    converts one of ``texts`` at a given width and source format, every
+    other text is converted the same way, in the same pandoc process. The
+    results are identical to converting each text on its own.
+
+    Args:
+        texts (Iterable[str]): The texts which are likely to be converted,
+            such as the docstrings of an API. They are only read once a
+            text needs converting.
+        cache (~.RstCache): A persistent cache of conversions. Pandoc
+            only converts the texts which are not found in it, and the
+            results are added to it.
+    """
+    global _batch
+    previous = _batch
+    _batch = _Batch(texts, cache)
+    try:
+        yield
+    finally:
+        _batch = previous
+
+
+class _Batch:
+    def __init__(self, texts: Iterable[str], cache: Optional['RstCache']) -> None:
+        self.cache = cache
+        self.texts: Optional[FrozenSet[str]] = None
+        self.converted: Dict[Tuple[str, int, str], str] = {}
+        self.missed: Set[Tuple[str, int, str]] = set()
+        self.conversions: Set[Tuple[int, str]] = set()
+        self._texts = texts
+
+    def get(self, text: str, columns: int, source_format: str) -> Optional[str]:
+        key = (text, columns, source_format)
+        if key in self.converted:
+            return self.converted[key]
+        # Texts are only looked up in the cache once.
+        if key in self.missed:
+            return None
+
+        if self.texts is None:
+            self.texts = frozenset(t for t in self._texts if _has_markup(t))
+        if text in self.texts and (columns, source_format) not in self.conversions:
+            self.conversions.add((columns, source_format))
+            self._convert(columns, source_format)
+            # Every text has now been looked up.
+            return self.converted.get(key)
+
+        answer = self.cache.get(*key) if self.cache else None
+        if answer is None:
+            self.missed.add(key)
+        else:
+            self.converted[key] = answer
+        return answer
+
+    def put(self, text: str, columns: int, source_format: str, answer: str) -> None:
+        self.converted[text, columns, source_format] = answer
+        if self.cache:
+            self.cache.put(text, columns, source_format, answer)
+
+    def _convert(self, columns: int, source_format: str) -> None:
+        """Look every text up in the cache, and convert the batchable misses."""
+        assert self.texts is not None
+        texts = []
+        for text in sorted(self.texts):
+            if _fast(text, columns, source_format):
+                continue
+            key = (text, columns, source_format)
+            answer = self.cache.get(*key) if self.cache else None
+            if answer is not None:
+                self.converted[key] = answer
+                continue
+            self.missed.add(key)
+            if _batchable(text, source_format):
+                texts.append(text)
+        for text, answer in _convert_many(texts, columns, source_format):
+            self.put(text, columns, source_format, answer)
+
+
+_batch: Optional[_Batch] = None
+
+# A paragraph which separates texts converted in a single document.
+_SEPARATOR = 'GAPICDOCSTRINGSEPARATOR'
+
+
+def _has_markup(text: str) -> bool:
+    return bool(re.search(r'[|*`_[\]]', text))
+
+
+def _batchable(text: str, source_format: str) -> bool:
+    """Return True if the text converts the same within a larger document.
+
+    This rules out anything which refers to, or depends on, the rest of
+    the document.
+    """
+    if _SEPARATOR in text:
+        return False
+    if source_format == 'commonmark':
+        # Images are defined at the end of the document, and link
+        # reference definitions apply to all of it.
+        return '![' not in text and not re.search(
+            r'^ {0,3}\[[^\]]+\]:', text, flags=re.MULTILINE)
+    if source_format == 'rst':
+        # Targets and substitutions are defined by explicit markup or
+        # named hyperlinks, and the section levels follow the order in
+        # which title adornments first appear.
+        return not re.search(
+            r'^\s*\.\.\s|`_|^([!-/:-@[-`{-~])\1{3,}\s*$',
+            text, flags=re.MULTILINE)
+    return False
+
+
+def _fast(text: str, columns: int, source_format: str) -> Optional[str]:
+    """Convert the text without pandoc, if it is simple enough."""
+    if source_format != 'commonmark':
+        return None
+    bullet = _bullet()
+    if bullet is None:
+        return None
+    return commonmark.to_rst(text, columns, bullet=bullet)
+
+
+# The bullet pandoc writes, by the versions whose output the fast path has
+# been checked against. Other versions, including newer ones, use pandoc
+# for everything, as its output may have changed.
+_VERIFIED_BULLETS: Dict[Tuple[int, ...], str] = {
+    (2, 19): '-  ',
+    (3, 5): '- ',
+    (3, 6): '- ',
+    (3, 9): '- ',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _bullet() -> Optional[str]:
+    """Return the bullet pandoc writes, if :mod:`commonmark` imitates it."""
+    try:
+        version = pypandoc.get_pandoc_version()
+    except OSError:
+        return None
+    major_minor = tuple(int(n) for n in re.findall(r'\d+', version)[:2])
+    return _VERIFIED_BULLETS.get(major_minor)
+
+
+def _convert(text: str, columns: int, source_format: str) -> str:
+    answer = _fast(text, columns, source_format)
+    if answer is not None:
+        return answer
+    if _batch:
+        answer = _batch.get(text, columns, source_format)
+        if answer is not None:
+            return answer
+    with profile.span('pandoc', 'rst', texts=1):
+        answer = pypandoc.convert_text(text, 'rst',
+            format=source_format,
+            extra_args=['--columns=%d' % columns],
+        ).strip()
+    if _batch:
+        _batch.put(text, columns, source_format, answer)
+    return answer
+
+
+def _convert_many(
+    texts: Sequence[str], columns: int, source_format: str,
+) -> Iterator[Tuple[str, str]]:
+    """Convert texts as one document, yielding each text and its conversion.
+
+    Texts which swallow the separator (such as an unclosed code block)
+    throw off the split; such batches are halved until they convert
+    cleanly, and lone texts which cannot are skipped.
+    """
+    if len(texts) < 2:
+        return
+    with profile.span('pandoc', 'rst', texts=len(texts)):
+        converted = pypandoc.convert_text(
+            f'\n\n{_SEPARATOR}\n\n'.join(texts), 'rst',
+            format=source_format,
+            extra_args=['--columns=%d' % columns],
+        )
+    answers = re.split(f'^{_SEPARATOR}$', converted, flags=re.MULTILINE)
+    if len(answers) == len(texts):
+        yield from zip(texts, (answer.strip() for answer in answers))
+    else:
+        middle = len(texts) // 2
+        yield from _convert_many(texts[:middle], columns, source_format)
+        yield from _convert_many(texts[middle:], columns, source_format)
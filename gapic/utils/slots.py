@@ -0,0 +1,164 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import dataclasses
+from typing import (Any, Callable, Dict, Iterator, Optional, Tuple, Type,
+                    TypeVar)
+
+from gapic.utils.cache import cached_property
+
+
+T = TypeVar('T')
+
+
+def slotted(cls: Type[T]) -> Type[T]:
+    """Make a dataclass store its fields in ``__slots__``.
+
+    Instances of the returned class have no ``__dict__``, which makes
+    them considerably smaller. This is ``dataclass(slots=True)`` for the
+    Python versions that lack it. It keeps frozen dataclasses picklable.
+
+    Names listed in the class's own ``__slots__`` get slots too, for
+    attributes which are not fields. So does each
+    :class:`~.cached_property`: its function is called by ``__getattr__``
+    the first time, and the slot is read directly afterwards.
+
+    Args:
+        cls (type): A dataclass whose bases are slotted or plain objects.
+
+    Returns:
+        type: A copy of the class, with slots.
+    """
+    inherited = {name for base in cls.__mro__[1:] for name in _own_slots(base)}
+    own = tuple(cls.__dict__.get('__slots__', ()))
+    cached = {
+        name: value for name, value in cls.__dict__.items()
+        if isinstance(value, cached_property)
+    }
+
+    cls_dict = dict(cls.__dict__)
+    slots: Dict[str, Optional[str]] = dict.fromkeys(own)
+    slots.update(
+        (f.name, None) for f in dataclasses.fields(cls)  # type: ignore
+        if f.name not in inherited and f.name not in slots
+    )
+    slots.update((name, prop.__doc__) for name, prop in cached.items())
+    for name in slots:
+        cls_dict.pop(name, None)
+    cls_dict['__slots__'] = slots
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    cls_dict.setdefault('__getstate__', _getstate)
+    cls_dict.setdefault('__setstate__', _setstate)
+    if cached:
+        cls_dict['__getattr__'] = _cached_getattr(
+            cached, getattr(cls, '__getattr__', None))
+
+    # Build the copy with the class's own metaclass.
+    metaclass: Type[type] = type(cls)
+    answer: Type[T] = metaclass(cls.__name__, cls.__bases__, cls_dict)
+    answer.__qualname__ = cls.__qualname__
+
+    # Methods which refer to the class (through ``super()``, or the ones
+    # dataclasses generate) must refer to the copy instead.
+    values = [*cls_dict.values(), *(prop.fx for prop in cached.values())]
+    for value in values:
+        for fx in _functions(value):
+            for cell in fx.__closure__ or ():
+                try:
+                    if cell.cell_contents is cls:
+                        cell.cell_contents = answer
+                except ValueError:  # An empty cell.
+                    pass
+    return answer
+
+
+def delegate(wrapper: Any, attr: str, name: str) -> Any:
+    """Look an attribute up on a wrapped object, for a wrapper's ``__getattr__``.
+
+    Special methods are never delegated, which keeps copying and pickling
+    working on the wrapper itself.
+
+    Args:
+        wrapper (Any): The wrapper.
+        attr (str): The name of the attribute holding the wrapped object,
+            such as a descriptor.
+        name (str): The name of the attribute to look up.
+    """
+    if name.startswith('__'):
+        raise AttributeError(name)
+    return getattr(getattr(wrapper, attr), name)
+
+
+def _cached_getattr(
+    cached: Dict[str, cached_property],
+    fallback: Optional[Callable[[Any, str], Any]],
+) -> Callable[[Any, str], Any]:
+    """Return a ``__getattr__`` which fills the slots of cached properties.
+
+    It is only called while the slot is empty, so each property function
+    runs once per object. Other names go to the class's own
+    ``__getattr__``, if it has one.
+    """
+    def __getattr__(self, name: str) -> Any:
+        prop = cached.get(name)
+        if prop is None:
+            if fallback is not None:
+                return fallback(self, name)
+            raise AttributeError(
+                f'{type(self).__name__!r} object has no attribute {name!r}')
+
+        answer = prop.fx(self)
+        # Frozen dataclasses refuse ordinary assignment.
+        object.__setattr__(self, name, answer)
+        return answer
+    return __getattr__
+
+
+def _own_slots(cls: type) -> Tuple[str, ...]:
+    slots = cls.__dict__.get('__slots__', ())
+    return (slots,) if isinstance(slots, str) else tuple(slots)
+
+
+def _functions(value: Any) -> Iterator[Any]:
+    """Yield the functions making up a class attribute."""
+    if isinstance(value, property):
+        candidates = [value.fget, value.fset, value.fdel]
+    elif isinstance(value, (classmethod, staticmethod)):
+        candidates = [value.__func__]
+    else:
+        candidates = [value]
+    for candidate in candidates:
+        # Decorated functions (such as cached properties) wrap the original.
+        while candidate is not None and hasattr(candidate, '__code__'):
+            yield candidate
+            candidate = getattr(candidate, '__wrapped__', None)
+
+
+def _getstate(self) -> Dict[str, Any]:
+    state = {}
+    for cls in type(self).__mro__:
+        for name in _own_slots(cls):
+            # Bypass ``__getattr__``, which some wrappers delegate.
+            try:
+                state[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+    return state
+
+
+def _setstate(self, state: Dict[str, Any]) -> None:
+    # Frozen dataclasses refuse ordinary assignment.
+    for name, value in state.items():
+        object.__setattr__(self, name, value)
@@ -69,6 +69,49 @@ def unit(session):
     )
 
 
+# The scripts in tests/benchmark which the benchmark session runs by default.
+BENCHMARKS = (
+    "formatter",
+    "dependencies",
+    "cached_property",
+    "render",
+)
+
+
+@nox.session(python=NEWEST_PYTHON)
+def benchmark(session):
+    """Time parts of the generator with the scripts in tests/benchmark.
+
+    The scripts in BENCHMARKS are run by default; others may be named, e.g.:
+
+        nox -s benchmark -- dependencies scaling
+    """
+    session.install("-e", ".")
+    for name in session.posargs or BENCHMARKS:
+        session.run("python", path.join("tests", "benchmark", f"{name}.py"))
+
+
+# The requests which the benchmark_replay session replays by default.
+SEED_REQUESTS = Path("tests") / "benchmark" / "requests"
+
+
+@nox.session(python=NEWEST_PYTHON)
+def benchmark_replay(session):
+    """Time the generator on dumped requests, against an optional baseline.
+
+    The seed requests in tests/benchmark/requests are replayed by default.
+    Others may be named, such as those dumped by
+    tests/benchmark/integration_requests.py:
+
+        nox -s benchmark_replay -- requests/*.desc --baseline baseline.json
+    """
+    session.install("-e", ".")
+    session.run(
+        "gapic-benchmark",
+        *(session.posargs or sorted(map(str, SEED_REQUESTS.glob("*.desc")))),
+    )
+
+
 FRAG_DIR = Path("tests") / "fragments"
 FRAGMENT_FILES = tuple(
     Path(dirname).relative_to(FRAG_DIR) / f
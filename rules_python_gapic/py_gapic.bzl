@@ -34,6 +34,75 @@ gapic_test_file = rule(
     },
 )
 
+def _import_path(proto_info, src):
+    root = proto_info.proto_source_root
+    if root != "." and src.path.startswith(root + "/"):
+        return src.path[len(root) + 1:]
+    return src.path
+
+def _py_gapic_srcjar_impl(ctx):
+    output = ctx.actions.declare_file("%s.srcjar" % ctx.label.name)
+    proto_infos = [dep[ProtoInfo] for dep in ctx.attr.deps]
+
+    args = ctx.actions.args()
+    args.use_param_file("@%s", use_always = True)
+    args.set_param_file_format("multiline")
+    args.add("--protoc", ctx.executable._protoc)
+    args.add("--output", output)
+    args.add("--proto_path=.")
+    args.add_all(
+        depset(transitive = [p.transitive_proto_path for p in proto_infos]),
+        format_each = "--proto_path=%s",
+    )
+    args.add_all(ctx.attr.opt_args, before_each = "--opt")
+    for target, name in ctx.attr.plugin_file_args.items():
+        for f in target.files.to_list():
+            args.add("--opt", "%s=%s" % (name, f.path))
+    for proto_info in proto_infos:
+        for src in proto_info.direct_sources:
+            args.add(_import_path(proto_info, src))
+
+    ctx.actions.run(
+        executable = ctx.executable._worker,
+        arguments = [args],
+        inputs = depset(
+            direct = ctx.files.plugin_file_args,
+            transitive = [p.transitive_sources for p in proto_infos],
+        ),
+        tools = [ctx.executable._protoc],
+        outputs = [output],
+        mnemonic = "PyGapicGenerate",
+        progress_message = "Generating Python GAPIC library %s" % ctx.label,
+        execution_requirements = {
+            "requires-worker-protocol": "json",
+            "supports-multiplex-workers": "1",
+            "supports-workers": "1",
+        },
+    )
+
+    return [DefaultInfo(files = depset(direct = [output]))]
+
+# Generates a srcjar like proto_custom_library does, but through a
+# persistent worker which keeps the generator warm between actions.
+_py_gapic_srcjar = rule(
+    _py_gapic_srcjar_impl,
+    attrs = {
+        "deps": attr.label_list(providers = [ProtoInfo]),
+        "opt_args": attr.string_list(),
+        "plugin_file_args": attr.label_keyed_string_dict(allow_files = True),
+        "_protoc": attr.label(
+            default = Label("@com_google_protobuf//:protoc"),
+            executable = True,
+            cfg = "exec",
+        ),
+        "_worker": attr.label(
+            default = Label("@gapic_generator_python//:gapic_worker"),
+            executable = True,
+            cfg = "exec",
+        ),
+    },
+)
+
 def py_gapic_library(
         name,
         srcs,
@@ -44,6 +113,7 @@ def py_gapic_library(
         service_yaml = None,
         transport = None,
         rest_numeric_enums = False,
+        use_worker = False,
         deps = [],
         **kwargs):
     srcjar_target_name = "%s_srcjar" % name
@@ -67,17 +137,26 @@ def py_gapic_library(
     if rest_numeric_enums:
         opt_args = opt_args + ["rest-numeric-enums"]
 
-    proto_custom_library(
-        name = srcjar_target_name,
-        deps = srcs,
-        plugin = Label("@gapic_generator_python//:gapic_plugin"),
-        plugin_args = plugin_args,
-        plugin_file_args = file_args,
-        opt_args = opt_args,
-        output_type = "python_gapic",
-        output_suffix = srcjar_output_suffix,
-        **kwargs
-    )
+    if use_worker:
+        _py_gapic_srcjar(
+            name = srcjar_target_name,
+            deps = srcs,
+            opt_args = plugin_args + opt_args,
+            plugin_file_args = file_args,
+            **kwargs
+        )
+    else:
+        proto_custom_library(
+            name = srcjar_target_name,
+            deps = srcs,
+            plugin = Label("@gapic_generator_python//:gapic_plugin"),
+            plugin_args = plugin_args,
+            plugin_file_args = file_args,
+            opt_args = opt_args,
+            output_type = "python_gapic",
+            output_suffix = srcjar_output_suffix,
+            **kwargs
+        )
 
     main_file = "%s" % srcjar_target_name + srcjar_output_suffix
     main_dir = "%s.py" % srcjar_target_name
@@ -55,8 +55,13 @@ setuptools.setup(
     description=description,
     long_description=readme,
     entry_points="""[console_scripts]
+        gapic-benchmark=gapic.cli.benchmark:benchmark
+        gapic-compile-templates=gapic.cli.compile_templates:compile_templates
+        gapic-generate-batch=gapic.cli.generate_batch:generate_batch
         protoc-gen-dump=gapic.cli.dump:dump
         protoc-gen-python_gapic=gapic.cli.generate:generate
+        protoc-gen-python_gapic_forward=gapic.cli.forward:forward
+        gapic-serve=gapic.cli.serve:serve
     """,
     author="Google LLC",
     author_email="googleapis-packages@google.com",
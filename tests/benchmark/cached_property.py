@@ -0,0 +1,62 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Time access to a :class:`~.cached_property` once it has been computed.
+
+Templates read the same cached properties of the API's wrappers many
+times, so this is timed both on a plain class and on a slotted
+:class:`~.MessageType`. Usage::
+
+    python tests/benchmark/cached_property.py [REPEAT]
+"""
+
+import sys
+import timeit
+
+from google.protobuf import descriptor_pb2
+
+from gapic.schema import wrappers
+from gapic.utils import cached_property
+
+
+NUMBER = 500000
+
+
+class Plain:
+    @cached_property
+    def value(self):
+        return 1
+
+
+def main(repeat: int = 5) -> None:
+    plain = Plain()
+    message = wrappers.MessageType(
+        message_pb=descriptor_pb2.DescriptorProto(name='Message'),
+        fields={},
+        nested_enums={},
+        nested_messages={},
+    )
+    accesses = {
+        'plain class': lambda: plain.value,
+        'slotted MessageType': lambda: message.recursive_field_types,
+    }
+    for name, access in accesses.items():
+        # Compute the value, so that only cached access is timed.
+        access()
+        seconds = min(timeit.repeat(access, number=NUMBER, repeat=repeat)) / NUMBER
+        print(f'{name}: {seconds * 1e9:.0f} ns')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
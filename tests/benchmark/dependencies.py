@@ -0,0 +1,90 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Time :meth:`~.API.build` on APIs with many dependency protos.
+
+The API is a single small proto, which follows ``PROTOS`` dependency
+protos. Every proto has 5 messages of 4 fields, half of which refer to a
+message of an earlier dependency. Dependencies are only built once one of
+their types is used, but nearly all of them can be reached from the API's
+own proto. Usage::
+
+    python tests/benchmark/dependencies.py [PROTOS ...]
+"""
+
+import random
+import sys
+import time
+from typing import List
+
+from google.protobuf import descriptor_pb2
+
+from gapic.schema import api
+from gapic.utils import Options
+
+
+PACKAGE = 'google.example.dependent.v1'
+DEPENDENCY_PACKAGE = 'google.example.dependency.v1'
+MESSAGES = 5
+FIELDS = 4
+
+
+def main(*counts: int) -> None:
+    for count in counts or (1000, 5000):
+        file_descriptors = synthesize(count)
+        start = time.perf_counter()
+        api.API.build(file_descriptors, package=PACKAGE, opts=Options())
+        print(f'{count} protos: {time.perf_counter() - start:.2f} s')
+
+
+def synthesize(count: int) -> List[descriptor_pb2.FileDescriptorProto]:
+    """Return ``count`` dependency protos, followed by the API's own proto.
+
+    The references between dependencies are chosen at random, but with
+    a fixed seed, so that every run builds the same API.
+    """
+    rand = random.Random(0)
+    answer = []
+    for index in range(count + 1):
+        package = PACKAGE if index == count else DEPENDENCY_PACKAGE
+        file_pb = descriptor_pb2.FileDescriptorProto(
+            name=_file_name(package, index), package=package,
+        )
+        for message_index in range(MESSAGES):
+            message_pb = file_pb.message_type.add(name=f'M{index}x{message_index}')
+            for number in range(1, FIELDS + 1):
+                field_pb = message_pb.field.add(
+                    name=f'f{number}', number=number,
+                    label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL,
+                    type=descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+                )
+                if not index or number % 2 == 0:
+                    continue
+                dependency = rand.randrange(index)
+                field_pb.type = descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE
+                field_pb.type_name = (f'.{DEPENDENCY_PACKAGE}.'
+                                      f'M{dependency}x{rand.randrange(MESSAGES)}')
+                dependency_name = _file_name(DEPENDENCY_PACKAGE, dependency)
+                if dependency_name not in file_pb.dependency:
+                    file_pb.dependency.append(dependency_name)
+        answer.append(file_pb)
+    return answer
+
+
+def _file_name(package: str, index: int) -> str:
+    return f'{package.replace(".", "/")}/dependency_{index}.proto'
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
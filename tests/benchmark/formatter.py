@@ -0,0 +1,51 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Time :func:`~.formatter.fix_whitespace` on the largest golden files.
+
+The largest generated files are the unit tests of each service
+(``test_%service.py``). Usage::
+
+    python tests/benchmark/formatter.py [NUMBER_OF_FILES]
+"""
+
+import pathlib
+import sys
+import timeit
+
+from gapic.generator import formatter
+
+
+GOLDENS = pathlib.Path(__file__).parent.parent / 'integration' / 'goldens'
+
+
+def main(count: int = 5) -> None:
+    paths = sorted(
+        GOLDENS.glob('*/tests/unit/gapic/*/test_*.py'),
+        key=lambda path: path.stat().st_size,
+    )[-count:]
+    for path in paths:
+        code = path.read_text()
+        timer = timeit.Timer(lambda: formatter.fix_whitespace(code))
+        number, _ = timer.autorange()
+        seconds = min(timer.repeat(repeat=5, number=number)) / number
+        print(
+            f'{path.relative_to(GOLDENS)}: {len(code) / 1024:.0f} KiB, '
+            f'{seconds * 1000:.1f} ms, '
+            f'{len(code) / seconds / 1024 / 1024:.0f} MiB/s'
+        )
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
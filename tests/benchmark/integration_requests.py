@@ -0,0 +1,118 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Dump the `CodeGeneratorRequest` of each integration test API.
+
+The requests are those which ``tests/integration/BUILD.bazel`` makes, and
+are written as ``<api>.desc`` to the output directory, to be replayed by
+``gapic-benchmark``. This needs a checkout of googleapis and
+``grpcio-tools``. Usage::
+
+    python tests/benchmark/integration_requests.py GOOGLEAPIS OUTPUT_DIR
+    gapic-benchmark OUTPUT_DIR/*.desc --output baseline.json
+"""
+
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+INTEGRATION = pathlib.Path(__file__).parent.parent / 'integration'
+
+# The protos, service config, service YAML and options of each API.
+APIS = {
+    'asset': (
+        'google/cloud/asset/v1',
+        'cloudasset_grpc_service_config.json',
+        'cloudasset_v1.yaml',
+        ['autogen-snippets', 'transport=grpc+rest'],
+    ),
+    'credentials': (
+        'google/iam/credentials/v1',
+        'iamcredentials_grpc_service_config.json',
+        'iamcredentials_v1.yaml',
+        ['autogen-snippets', 'transport=grpc+rest'],
+    ),
+    'eventarc': (
+        'google/cloud/eventarc/v1',
+        'eventarc_grpc_service_config.json',
+        'eventarc_v1.yaml',
+        [
+            'python-gapic-namespace=google.cloud',
+            'python-gapic-name=eventarc',
+            'autogen-snippets',
+            'transport=grpc+rest',
+        ],
+    ),
+    'logging': (
+        'google/logging/v2',
+        'logging_grpc_service_config.json',
+        'logging_v2.yaml',
+        [
+            'python-gapic-namespace=google.cloud',
+            'python-gapic-name=logging',
+            'autogen-snippets',
+            'transport=grpc',
+        ],
+    ),
+    'redis': (
+        'google/cloud/redis/v1',
+        'redis_grpc_service_config.json',
+        'redis_v1.yaml',
+        ['autogen-snippets', 'transport=grpc+rest'],
+    ),
+}
+
+
+def main(googleapis: str, output_dir: str) -> None:
+    googleapis = os.path.abspath(googleapis)
+    os.makedirs(output_dir, exist_ok=True)
+    dump = shutil.which('protoc-gen-dump')
+    if not dump:
+        sys.exit('protoc-gen-dump is not installed; run `pip install -e .`.')
+
+    for name, (package, retry_config, service_yaml, opts) in APIS.items():
+        protos = sorted(
+            str(path.relative_to(googleapis))
+            for path in pathlib.Path(googleapis, package).glob('*.proto')
+        )
+        params = ','.join([
+            'metadata',
+            f'retry-config={INTEGRATION.resolve() / retry_config}',
+            f'service-yaml={INTEGRATION.resolve() / service_yaml}',
+            *opts,
+        ])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # The plugin writes `request.desc` to the working directory,
+            # then exits 1 so that protoc writes nothing else.
+            subprocess.run([
+                sys.executable, '-m', 'grpc_tools.protoc',
+                f'--proto_path={googleapis}',
+                f'--plugin=protoc-gen-dump={dump}',
+                f'--dump_out={tmp_dir}',
+                f'--dump_opt={params}',
+                *protos,
+            ], cwd=tmp_dir)
+            request = os.path.join(tmp_dir, 'request.desc')
+            if not os.path.exists(request):
+                sys.exit(f'protoc did not dump a request for {name}.')
+            shutil.move(request, os.path.join(output_dir, f'{name}.desc'))
+        print(f'{name}: {len(protos)} protos')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
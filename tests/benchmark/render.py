@@ -0,0 +1,76 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Time generating libraries from several requests in a single process.
+
+Unlike ``gapic-benchmark``, which generates each library in a fresh
+process as protoc would, the requests are all generated in this process,
+one after another, as ``gapic-generate-batch`` and ``gapic-serve`` do.
+Without requests, a synthetic API is generated. Usage::
+
+    python tests/benchmark/render.py [--runs N] [--opts OPTS] [REQUEST ...]
+
+Requests are serialized `CodeGeneratorRequest`s, as written by
+``protoc-gen-dump``, or by ``tests/benchmark/synthetic_api.py``.
+"""
+
+import time
+from typing import Optional, Sequence
+
+import click
+
+from google.protobuf.compiler import plugin_pb2
+
+from gapic.cli.generate import generate_response
+
+import synthetic_api
+
+
+@click.command()
+@click.argument('request_paths', metavar='REQUESTS', nargs=-1,
+                type=click.Path(exists=True, dir_okay=False))
+@click.option('--runs', type=click.IntRange(min=1), default=3, show_default=True,
+              help='The number of times to generate every library.')
+@click.option('--opts',
+              help="The options passed to the generator, in place of each "
+                   "request's own.")
+def main(request_paths: Sequence[str], runs: int, opts: Optional[str]) -> None:
+    requests = [_load(path) for path in request_paths]
+    if not requests:
+        requests.append(synthetic_api.synthesize(synthetic_api.Dimensions()))
+    if opts is not None:
+        for request in requests:
+            request.parameter = opts
+
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for request in requests:
+            response = generate_response(request)
+            if response.error:
+                raise click.ClickException(response.error)
+        times.append(time.perf_counter() - start)
+    click.echo(
+        f'{len(requests)} requests: {min(times):.2f} s '
+        f'(runs: {", ".join(f"{t:.2f} s" for t in times)})'
+    )
+
+
+def _load(path: str) -> plugin_pb2.CodeGeneratorRequest:
+    with open(path, 'rb') as f:
+        return plugin_pb2.CodeGeneratorRequest.FromString(f.read())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Plot how the generator scales with each dimension of a synthetic API.
+
+Each dimension of :class:`synthetic_api.Dimensions` is grown in turn,
+leaving the others at their defaults, and the median times of building the
+API schema and of rendering templates are plotted against it. Usage::
+
+    python tests/benchmark/scaling.py [--dimension messages ...] [--csv FILE]
+"""
+
+import csv
+import dataclasses
+import os
+import statistics
+import tempfile
+from typing import Dict, Sequence
+
+import click
+
+from gapic.cli.benchmark import measure
+
+import synthetic_api
+
+
+# The values which each dimension is grown through.
+SCALES = {
+    'protos': (1, 4, 16),
+    'messages': (10, 100, 1000),
+    'fields': (5, 20, 80),
+    'depth': (1, 4, 16),
+    'services': (1, 4, 16),
+    'methods': (10, 40, 160),
+    'lros': (1, 3, 9),
+    'paginated': (1, 3, 9),
+    'resources': (1, 3, 10),
+    'comment_sentences': (3, 12, 48),
+}
+
+# The width of the longest bar of each plot.
+WIDTH = 50
+
+
+@click.command()
+@click.option('--dimension', 'dimensions', multiple=True,
+              type=click.Choice(SCALES), default=tuple(SCALES),
+              help='The dimensions to grow. Defaults to all of them.')
+@click.option('--runs', type=click.IntRange(min=1), default=3, show_default=True,
+              help='The number of times to generate each API.')
+@click.option('--opts', default=synthetic_api.OPTS, show_default=True,
+              help='The options passed to the generator.')
+@click.option('--csv', 'csv_file', type=click.File('w'),
+              help='Where to write the results, to plot them elsewhere.')
+def main(dimensions: Sequence[str], runs: int, opts: str, csv_file) -> None:
+    writer = csv.writer(csv_file) if csv_file else None
+    if writer:
+        writer.writerow(('dimension', 'value', 'build_ms', 'render_ms'))
+    for dimension in dimensions:
+        results = {
+            value: timings(dataclasses.replace(synthetic_api.Dimensions(), **{
+                dimension: value,
+            }), opts, runs)
+            for value in SCALES[dimension]
+        }
+        plot(dimension, results)
+        if writer:
+            for value, result in results.items():
+                writer.writerow((dimension, value,
+                                 round(result['build'], 1), round(result['render'], 1)))
+
+
+def timings(dims: synthetic_api.Dimensions, opts: str, runs: int) -> Dict[str, float]:
+    """Return the median times of generating the synthetic API, in ms."""
+    request = synthetic_api.synthesize(dims, opts)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'request.desc')
+        with open(path, 'wb') as f:
+            f.write(request.SerializeToString())
+        measured = [measure(path) for _ in range(runs)]
+    return {
+        stage: statistics.median(m[stage] for m in measured)
+        for stage in ('build', 'render')
+    }
+
+
+def plot(dimension: str, results: Dict[int, Dict[str, float]]) -> None:
+    """Print the times of each value of a dimension, as a bar chart.
+
+    The time of building the API schema is drawn with ``#``, and that of
+    rendering templates with ``=``.
+    """
+    longest = max(r['build'] + r['render'] for r in results.values()) or 1
+    click.echo(f'{dimension}:')
+    for value, result in results.items():
+        build = round(result['build'] / longest * WIDTH)
+        render = round(result['render'] / longest * WIDTH)
+        click.echo(
+            f'  {value:>6} {"#" * build}{"=" * render}'
+            f'{" " * (WIDTH - build - render)} '
+            f'{result["build"]:>9.1f} ms build {result["render"]:>9.1f} ms render'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,414 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Synthesize a `CodeGeneratorRequest` for an API of any size.
+
+The API is made up of ``protos`` files in a single package. Each file has
+``messages`` messages with ``fields`` fields of every kind, each with a
+chain of ``depth`` nested messages (the innermost of which refers back to
+the outermost, if ``recursive``), and ``services`` services with
+``methods`` methods. Of the methods, ``lros`` return long-running
+operations and ``paginated`` are paginated. The first ``resources``
+messages of each file are resources, which the requests of methods name.
+Every element is documented with ``comment_sentences`` sentences of comments.
+
+The request is generated deterministically, so that it may be replayed by
+``gapic-benchmark``. Usage::
+
+    python tests/benchmark/synthetic_api.py --messages 1000 large.desc
+    gapic-benchmark large.desc
+"""
+
+import dataclasses
+import itertools
+import sys
+from typing import Iterator, List, Sequence
+
+import click
+
+from google.api import annotations_pb2
+from google.api import client_pb2
+from google.api import field_behavior_pb2
+from google.api import resource_pb2
+from google.longrunning import operations_pb2
+from google.protobuf import descriptor
+from google.protobuf import descriptor_pb2
+from google.protobuf.compiler import plugin_pb2
+
+
+PACKAGE = 'google.example.synthetic.v1'
+HOST = 'synthetic.example.com'
+OPTS = 'autogen-snippets,transport=grpc+rest'
+
+# The kinds of field which the fields of each message cycle through.
+_SCALARS = (
+    descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    descriptor_pb2.FieldDescriptorProto.TYPE_INT64,
+    descriptor_pb2.FieldDescriptorProto.TYPE_BOOL,
+    descriptor_pb2.FieldDescriptorProto.TYPE_DOUBLE,
+    descriptor_pb2.FieldDescriptorProto.TYPE_BYTES,
+)
+_KINDS = _SCALARS + ('repeated', 'enum', 'message', 'map')
+
+# The sentences which comments are made of, some of which need converting
+# to reStructuredText.
+_SENTENCES = (
+    'The {name} is created when the owning resource is first set up.',
+    'It may be updated at any time, except while an operation is running.',
+    'See `{name}` and [the overview](https://example.com/docs/{name}) '
+    'for the details.',
+    'Values are **case sensitive**, and must not exceed 1024 characters.',
+    'Deprecated values are still accepted, but are ignored by the service.',
+    'If unset, the value of the enclosing resource is used.',
+)
+
+# The tags of the paths to each kind of element in `source_code_info`.
+_MESSAGE_TYPE = 4
+_ENUM_TYPE = 5
+_SERVICE = 6
+_FIELD = 2
+_NESTED_TYPE = 3
+_ENUM_VALUE = 2
+_METHOD = 2
+
+
+@dataclasses.dataclass(frozen=True)
+class Dimensions:
+    """The size of a synthetic API."""
+    protos: int = 1
+    messages: int = 10
+    fields: int = 5
+    depth: int = 1
+    recursive: bool = False
+    services: int = 1
+    methods: int = 10
+    lros: int = 1
+    paginated: int = 1
+    resources: int = 1
+    comment_sentences: int = 3
+
+    def __post_init__(self):
+        if self.lros + self.paginated > self.methods:
+            raise ValueError('There are more LROs and paginated methods than methods.')
+        if self.resources > self.messages:
+            raise ValueError('There are more resources than messages.')
+
+
+def synthesize(dims: Dimensions, opts: str = OPTS) -> plugin_pb2.CodeGeneratorRequest:
+    """Return a request to generate a synthetic API of the given size.
+
+    Args:
+        dims (Dimensions): The size of the API.
+        opts (str): The options passed to the generator, as protoc would.
+    """
+    files = [_File(dims, index).build() for index in range(dims.protos)]
+    return plugin_pb2.CodeGeneratorRequest(
+        file_to_generate=[f.name for f in files],
+        parameter=opts,
+        proto_file=[*_dependencies(), *files],
+    )
+
+
+def _dependencies() -> List[descriptor_pb2.FileDescriptorProto]:
+    """Return the files which the synthetic files import, and theirs."""
+    answer: List[descriptor_pb2.FileDescriptorProto] = []
+    seen = set()
+
+    def visit(file: descriptor.FileDescriptor) -> None:
+        if file.name in seen:
+            return
+        seen.add(file.name)
+        for dependency in file.dependencies:
+            visit(dependency)
+        file_pb = descriptor_pb2.FileDescriptorProto()
+        file.CopyToProto(file_pb)
+        answer.append(file_pb)
+
+    for module in (annotations_pb2, client_pb2, field_behavior_pb2,
+                   resource_pb2, operations_pb2):
+        visit(module.DESCRIPTOR)
+    return answer
+
+
+class _File:
+    """Builds one file of a synthetic API."""
+
+    def __init__(self, dims: Dimensions, index: int) -> None:
+        self.dims = dims
+        self.index = index
+        self.file = descriptor_pb2.FileDescriptorProto(
+            name=f'google/example/synthetic/v1/synthetic_{index}.proto',
+            package=PACKAGE,
+            syntax='proto3',
+            dependency=[
+                'google/api/annotations.proto',
+                'google/api/client.proto',
+                'google/api/field_behavior.proto',
+                'google/api/resource.proto',
+                'google/longrunning/operations.proto',
+            ],
+        )
+        self._line = itertools.count(20)
+
+    def name(self, kind: str, number: int) -> str:
+        """Return a name which is unique across the files of the API."""
+        return f'{kind}{self.index}x{number}'
+
+    def build(self) -> descriptor_pb2.FileDescriptorProto:
+        enum = self.file.enum_type.add(name=self.name('State', 0))
+        self.document((_ENUM_TYPE, 0), enum.name)
+        for number, value in enumerate(('STATE_UNSPECIFIED', 'ACTIVE', 'DELETED')):
+            enum.value.add(name=f'{value}_{self.index}', number=number)
+            self.document((_ENUM_TYPE, 0, _ENUM_VALUE, number), value.lower())
+
+        for number in range(self.dims.messages):
+            path = (_MESSAGE_TYPE, len(self.file.message_type))
+            message = self.file.message_type.add(name=self.name('Thing', number))
+            self.add_fields(message, path, self.dims.fields)
+            if number < self.dims.resources:
+                resource = message.options.Extensions[resource_pb2.resource]
+                resource.type = f'{HOST}/{message.name}'
+                resource.pattern.append(
+                    f'projects/{{project}}/things{self.index}x{number}/{{thing}}')
+                message.field.add(
+                    name='name', number=len(message.field) + 1,
+                    type=descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+                    label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+            self.add_nested(message, path, message.name, self.dims.depth)
+
+        for number in range(self.dims.services):
+            self.add_service(number)
+        return self.file
+
+    def add_fields(self, message: descriptor_pb2.DescriptorProto,
+                   path: Sequence[int], count: int) -> None:
+        for number in range(count):
+            kind = _KINDS[number % len(_KINDS)]
+            field = message.field.add(
+                name=f'field_{number}',
+                number=number + 1,
+                label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL,
+            )
+            if kind == 'repeated':
+                field.type = descriptor_pb2.FieldDescriptorProto.TYPE_STRING
+                field.label = descriptor_pb2.FieldDescriptorProto.LABEL_REPEATED
+            elif kind == 'enum':
+                field.type = descriptor_pb2.FieldDescriptorProto.TYPE_ENUM
+                field.type_name = f'.{PACKAGE}.{self.name("State", 0)}'
+            elif kind == 'message':
+                # Refer to the previous message, if there is one.
+                previous = self.file.message_type[max(0, len(self.file.message_type) - 2)]
+                field.type = descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE
+                field.type_name = f'.{PACKAGE}.{previous.name}'
+            elif kind == 'map':
+                entry = message.nested_type.add(
+                    name=f'Field{number}Entry',
+                    options=descriptor_pb2.MessageOptions(map_entry=True),
+                )
+                for key_number, key in enumerate(('key', 'value'), start=1):
+                    entry.field.add(
+                        name=key, number=key_number,
+                        type=descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+                        label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+                field.type = descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE
+                field.type_name = f'.{PACKAGE}.{message.name}.{entry.name}'
+                field.label = descriptor_pb2.FieldDescriptorProto.LABEL_REPEATED
+            else:
+                field.type = kind
+            self.document((*path, _FIELD, number), field.name)
+
+    def add_nested(self, message: descriptor_pb2.DescriptorProto,
+                   path: Sequence[int], full_name: str, depth: int) -> None:
+        """Add a chain of nested messages, each a field of the last."""
+        self.document(path, message.name)
+        if not depth:
+            if self.dims.recursive and full_name != message.name:
+                outermost = full_name.split('.')[0]
+                message.field.add(
+                    name='parent', number=len(message.field) + 1,
+                    type=descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE,
+                    type_name=f'.{PACKAGE}.{outermost}',
+                    label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+            return
+
+        nested_path = (*path, _NESTED_TYPE, len(message.nested_type))
+        nested = message.nested_type.add(name=f'Level{depth}')
+        message.field.add(
+            name=f'level_{depth}', number=len(message.field) + 1,
+            type=descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE,
+            type_name=f'.{PACKAGE}.{full_name}.{nested.name}',
+            label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+        self.add_fields(nested, nested_path, self.dims.fields)
+        self.add_nested(nested, nested_path, f'{full_name}.{nested.name}', depth - 1)
+
+    def add_service(self, number: int) -> None:
+        service_path = (_SERVICE, number)
+        service = self.file.service.add(name=self.name('Service', number))
+        service.options.Extensions[client_pb2.default_host] = HOST
+        service.options.Extensions[client_pb2.oauth_scopes] = (
+            'https://www.googleapis.com/auth/cloud-platform')
+        self.document(service_path, service.name)
+
+        for method_number in range(self.dims.methods):
+            if method_number < self.dims.lros:
+                verb = 'Create'
+            elif method_number < self.dims.lros + self.dims.paginated:
+                verb = 'List'
+            else:
+                verb = 'Get'
+            method_name = f'{verb}Thing{method_number}'
+            prefix = f'{service.name}{method_name}'
+            thing_number = method_number % self.dims.messages
+            thing = self.file.message_type[thing_number]
+            resource = thing_number < self.dims.resources
+
+            request = self.add_message(f'{prefix}Request')
+            request.field.add(
+                name='thing', number=1,
+                type=descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE,
+                type_name=f'.{PACKAGE}.{thing.name}',
+                label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+            response = self.add_message(f'{prefix}Response')
+            response.field.add(
+                name='things', number=1,
+                type=descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE,
+                type_name=f'.{PACKAGE}.{thing.name}',
+                label=descriptor_pb2.FieldDescriptorProto.LABEL_REPEATED)
+
+            method = service.method.add(
+                name=method_name,
+                input_type=f'.{PACKAGE}.{request.name}',
+                output_type=f'.{PACKAGE}.{response.name}',
+            )
+            http = method.options.Extensions[annotations_pb2.http]
+            http.post = f'/v1/{service.name.lower()}:{method_name[0].lower()}{method_name[1:]}'
+            http.body = '*'
+            if resource:
+                name = request.field.add(
+                    name='name', number=2,
+                    type=descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+                    label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+                name.options.Extensions[field_behavior_pb2.field_behavior].append(
+                    field_behavior_pb2.FieldBehavior.REQUIRED)
+                reference = name.options.Extensions[resource_pb2.resource_reference]
+                reference.type = f'{HOST}/{thing.name}'
+                http.post = (
+                    f'/v1/{{name=projects/*/things{self.index}x{thing_number}/*}}'
+                    f':{method_name[0].lower()}{method_name[1:]}')
+                method.options.Extensions[client_pb2.method_signature].append('name')
+            if verb == 'Create':
+                metadata = self.add_message(f'{prefix}Metadata')
+                metadata.field.add(
+                    name='progress_percent', number=1,
+                    type=descriptor_pb2.FieldDescriptorProto.TYPE_INT32,
+                    label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+                method.output_type = '.google.longrunning.Operation'
+                info = method.options.Extensions[operations_pb2.operation_info]
+                info.response_type = response.name
+                info.metadata_type = metadata.name
+            elif verb == 'List':
+                for field_number, (field_name, field_type) in enumerate((
+                        ('page_size', descriptor_pb2.FieldDescriptorProto.TYPE_INT32),
+                        ('page_token', descriptor_pb2.FieldDescriptorProto.TYPE_STRING),
+                ), start=3):
+                    request.field.add(
+                        name=field_name, number=field_number, type=field_type,
+                        label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+                response.field.add(
+                    name='next_page_token', number=2,
+                    type=descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+                    label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+            self.document((*service_path, _METHOD, method_number), method_name)
+
+    def add_message(self, name: str) -> descriptor_pb2.DescriptorProto:
+        path = (_MESSAGE_TYPE, len(self.file.message_type))
+        message = self.file.message_type.add(name=name)
+        self.document(path, name)
+        return message
+
+    def document(self, path: Sequence[int], name: str) -> None:
+        """Add a comment for an element, as protoc would."""
+        lines = list(_comment(name, self.dims.comment_sentences))
+        start = next(self._line)
+        for _ in lines:
+            next(self._line)
+        self.file.source_code_info.location.add(
+            path=path,
+            span=[start + len(lines), 2, 40],
+            leading_comments=''.join(f' {line}\n' for line in lines),
+        )
+
+
+def _comment(name: str, count: int) -> Iterator[str]:
+    """Yield the lines of a comment, wrapped as they are in protos."""
+    words: List[str] = []
+    for sentence in itertools.islice(itertools.cycle(_SENTENCES), count):
+        words.extend(sentence.format(name=name).split())
+    line: List[str] = []
+    for word in words:
+        if line and len(' '.join(line + [word])) > 72:
+            yield ' '.join(line)
+            line = []
+        line.append(word)
+    if line:
+        yield ' '.join(line)
+
+    # Long comments end with a list, as many do.
+    if count > len(_SENTENCES):
+        yield ''
+        for item in range(count - len(_SENTENCES)):
+            yield f'- Case {item + 1}, in which `{name}` applies.'
+
+
+@click.command()
+@click.argument('output', type=click.File('wb'))
+@click.option('--opts', default=OPTS, show_default=True,
+              help='The options passed to the generator.')
+@click.option('--protos', type=int, default=Dimensions.protos, show_default=True)
+@click.option('--messages', type=int, default=Dimensions.messages, show_default=True,
+              help='Messages in each proto, besides those of the methods.')
+@click.option('--fields', type=int, default=Dimensions.fields, show_default=True,
+              help='Fields in each message.')
+@click.option('--depth', type=int, default=Dimensions.depth, show_default=True,
+              help='Messages nested in each message.')
+@click.option('--recursive/--no-recursive', default=Dimensions.recursive,
+              show_default=True,
+              help='Whether the innermost nested messages refer to the outermost.')
+@click.option('--services', type=int, default=Dimensions.services, show_default=True,
+              help='Services in each proto.')
+@click.option('--methods', type=int, default=Dimensions.methods, show_default=True,
+              help='Methods in each service.')
+@click.option('--lros', type=int, default=Dimensions.lros, show_default=True,
+              help='Methods in each service which return long-running operations.')
+@click.option('--paginated', type=int, default=Dimensions.paginated, show_default=True,
+              help='Methods in each service which are paginated.')
+@click.option('--resources', type=int, default=Dimensions.resources, show_default=True,
+              help='Messages in each proto which are resources.')
+@click.option('--comment-sentences', type=int, default=Dimensions.comment_sentences,
+              show_default=True,
+              help='Sentences in the comment of each element.')
+def main(output, opts, **dims) -> None:
+    try:
+        request = synthesize(Dimensions(**dims), opts)
+    except ValueError as ex:
+        raise click.UsageError(str(ex))
+    output.write(request.SerializeToString())
+    messages = sum(len(f.message_type) for f in request.proto_file
+                   if f.name in request.file_to_generate)
+    click.echo(f'{len(request.file_to_generate)} protos, {messages} messages, '
+               f'{request.ByteSize() / 1024:.0f} KiB', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
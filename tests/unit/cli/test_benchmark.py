@@ -0,0 +1,136 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import pathlib
+from unittest import mock
+
+import pytest
+from click.testing import CliRunner
+
+from gapic.cli import benchmark
+
+
+REQUESTS = pathlib.Path(__file__).parent.parent.parent / "benchmark" / "requests"
+BASELINE = json.loads((REQUESTS / "baseline.json").read_text())
+
+
+def scaled(results, **factors):
+    """Return a copy of the results, with the given medians scaled."""
+    return {
+        metric: dict(values, median=values["median"] * factors.get(metric, 1))
+        for metric, values in results.items()
+    }
+
+
+@pytest.mark.parametrize("values,percent,expected", (
+    ([7.0], 50, 7.0),
+    ([7.0], 95, 7.0),
+    ([7.0], 100, 7.0),
+    ([3.0, 1.0, 2.0], 50, 2.0),
+    ([3.0, 1.0, 2.0], 100, 3.0),
+    ([5.0, 1.0, 4.0, 2.0, 3.0], 95, 5.0),
+    ([float(n) for n in range(20, 0, -1)], 95, 19.0),
+    ([float(n) for n in range(20, 0, -1)], 100, 20.0),
+))
+def test_percentile(values, percent, expected):
+    assert benchmark._percentile(values, percent) == expected
+
+
+def test_report_without_baseline(capsys):
+    results = BASELINE["test_dynamic_routing"]
+    assert benchmark._report("dynamic_routing", 5, results, None, 0.1) == 0
+
+    out = capsys.readouterr().out
+    assert out.startswith("dynamic_routing (5 runs)\n")
+    assert "%" not in out
+    assert "REGRESSION" not in out
+
+
+def test_report_pass(capsys):
+    baseline = BASELINE["test_dynamic_routing"]
+    # Slower, but within the tolerance.
+    results = scaled(baseline, total=1.05, render=1.08)
+    assert benchmark._report("dynamic_routing", 5, results, baseline, 0.1) == 0
+
+    out = capsys.readouterr().out
+    assert "+5.0%" in out
+    assert "+8.0%" in out
+    assert "REGRESSION" not in out
+
+
+def test_report_regress(capsys):
+    baseline = BASELINE["test_recursive_messages"]
+    results = scaled(
+        baseline,
+        total=1.5,
+        render=1.2,
+        # Beyond the tolerance, but by less than a millisecond.
+        build=1.2,
+        # Faster.
+        samples=0.5,
+        # Not measured by the baseline.
+        pandoc=2,
+    )
+    assert baseline["pandoc"]["median"] == 0
+    assert benchmark._report("recursive_messages", 5, results, baseline, 0.1) == 2
+
+    lines = capsys.readouterr().out.splitlines()
+    regressions = [line.split()[0] for line in lines if line.endswith("REGRESSION")]
+    assert regressions == ["total", "render"]
+    assert any(line.split()[0] == "samples" and "-50.0%" in line for line in lines)
+
+
+def test_report_missing_metric(capsys):
+    baseline = dict(BASELINE["test_dynamic_routing"])
+    del baseline["render"]
+    results = scaled(BASELINE["test_dynamic_routing"], render=2)
+    assert benchmark._report("dynamic_routing", 5, results, baseline, 0.1) == 0
+
+
+@pytest.mark.parametrize("factor,exit_code", ((1, 0), (2, 1)))
+def test_benchmark(tmp_path, factor, exit_code):
+    name = "test_dynamic_routing"
+    medians = {metric: values["median"] for metric, values in BASELINE[name].items()}
+    measured = iter([
+        medians,
+        {metric: value * factor for metric, value in medians.items()},
+        {metric: value * factor for metric, value in medians.items()},
+    ])
+
+    with mock.patch.object(benchmark, "measure", side_effect=lambda path: next(measured)):
+        result = CliRunner().invoke(benchmark.benchmark, [
+            str(REQUESTS / f"{name}.desc"), "--runs", "3",
+            "--baseline", str(REQUESTS / "baseline.json"),
+            "--output", str(tmp_path / "results.json"),
+        ])
+
+    assert result.exit_code == exit_code, result.output
+    results = json.loads((tmp_path / "results.json").read_text())
+    assert list(results) == [name]
+    assert results[name]["total"] == {
+        "median": medians["total"] * factor,
+        "p95": medians["total"] * factor,
+    }
+    if exit_code:
+        assert "regressions against the baseline" in result.output
+
+
+def test_measure_seed_request():
+    answer = benchmark.measure(str(REQUESTS / "test_recursive_messages.desc"))
+
+    assert set(answer) == set(benchmark.METRICS)
+    assert answer["total"] > answer["render"] > 0
+    assert answer["build"] > 0
+    assert answer["peak_rss"] > 0
@@ -0,0 +1,71 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import sys
+from unittest import mock
+
+import pytest
+
+from google.protobuf.compiler.plugin_pb2 import CodeGeneratorRequest
+from google.protobuf.compiler.plugin_pb2 import CodeGeneratorResponse
+
+from gapic.cli import forward
+from gapic.cli import generate
+
+
+REQUEST = CodeGeneratorRequest(parameter="transport=rest")
+RESPONSE = CodeGeneratorResponse(
+    file=[CodeGeneratorResponse.File(name="foo.py", content="Foo\n")],
+)
+
+
+def run_forward(monkeypatch):
+    # Set stdin here rather than in a fixture, as pytest replaces it.
+    stdin = io.TextIOWrapper(io.BytesIO(REQUEST.SerializeToString()))
+    monkeypatch.setattr(sys, "stdin", stdin)
+    forward.forward()
+
+
+@pytest.mark.parametrize("argv", (
+    ["protoc-gen-python_gapic"],
+    ["protoc-gen-python_gapic", "--request", "request.desc"],
+))
+def test_forward_locally(monkeypatch, argv):
+    monkeypatch.setattr(sys, "argv", argv)
+    monkeypatch.setenv("GAPIC_GENERATOR_SOCKET", "gapic.sock")
+    if len(argv) == 1:
+        monkeypatch.delenv("GAPIC_GENERATOR_SOCKET")
+    with mock.patch.object(generate, "generate") as local:
+        run_forward(monkeypatch)
+    local.assert_called_once_with()
+
+
+def test_forward_to_server(monkeypatch, capsysbinary):
+    monkeypatch.setattr(sys, "argv", ["protoc-gen-python_gapic"])
+    monkeypatch.setenv("GAPIC_GENERATOR_SOCKET", "gapic.sock")
+    with mock.patch.object(forward, "_forward", return_value=RESPONSE.SerializeToString()) as fwd:
+        run_forward(monkeypatch)
+    fwd.assert_called_once_with("gapic.sock", REQUEST.SerializeToString())
+    assert capsysbinary.readouterr().out == RESPONSE.SerializeToString()
+
+
+def test_forward_without_server(monkeypatch, capsysbinary, tmp_path):
+    # Nothing is listening on the socket, so the request is handled here.
+    monkeypatch.setattr(sys, "argv", ["protoc-gen-python_gapic"])
+    monkeypatch.setenv("GAPIC_GENERATOR_SOCKET", str(tmp_path / "gapic.sock"))
+    with mock.patch.object(generate, "generate_response", return_value=RESPONSE) as local:
+        run_forward(monkeypatch)
+    local.assert_called_once_with(REQUEST)
+    assert capsysbinary.readouterr().out == RESPONSE.SerializeToString()
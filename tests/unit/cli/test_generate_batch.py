@@ -0,0 +1,94 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import concurrent.futures
+import multiprocessing
+from unittest import mock
+
+import pytest
+from click.testing import CliRunner
+
+from google.protobuf.compiler.plugin_pb2 import CodeGeneratorRequest
+from google.protobuf.compiler.plugin_pb2 import CodeGeneratorResponse
+
+from gapic.cli import generate_batch
+
+
+def fake_generate_response(req, bytecode_cache):
+    if req.parameter == "fail":
+        return CodeGeneratorResponse(error="Bad request.")
+    return CodeGeneratorResponse(file=[
+        CodeGeneratorResponse.File(name="setup.py", content=req.parameter),
+    ])
+
+
+def write_request(path, parameter):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(CodeGeneratorRequest(parameter=parameter).SerializeToString())
+    return str(path)
+
+
+@pytest.mark.parametrize("jobs", ("1", "2"))
+def test_generate_batch(tmp_path, jobs):
+    requests = [
+        write_request(tmp_path / "requests" / "library.pb", "Library"),
+        write_request(tmp_path / "requests" / "broken.pb", "fail"),
+    ]
+    (tmp_path / "manifest").write_text(
+        write_request(tmp_path / "requests" / "pubsub.pb", "Pubsub") + "\n\n")
+
+    with mock.patch.object(generate_batch, "generate_response", fake_generate_response):
+        result = CliRunner().invoke(generate_batch.generate_batch, [
+            *requests, "--manifest", str(tmp_path / "manifest"),
+            "--output-dir", str(tmp_path / "out"), "--jobs", jobs,
+        ])
+
+    assert result.exit_code == 1
+    assert "broken.pb: Bad request." in result.output
+    assert "Generated 2 of 3 libraries." in result.output
+    assert (tmp_path / "out" / "library" / "setup.py").read_text() == "Library"
+    assert (tmp_path / "out" / "pubsub" / "setup.py").read_text() == "Pubsub"
+
+
+def test_generate_batch_without_fork(tmp_path):
+    def executor(max_workers, mp_context):
+        assert mp_context is multiprocessing.get_context()
+        return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    request = write_request(tmp_path / "library.pb", "Library")
+    with mock.patch.object(generate_batch, "generate_response", fake_generate_response), \
+            mock.patch.object(multiprocessing, "get_all_start_methods", return_value=["spawn"]), \
+            mock.patch.object(concurrent.futures, "ProcessPoolExecutor", executor):
+        result = CliRunner().invoke(generate_batch.generate_batch, [
+            request, "--output-dir", str(tmp_path / "out"), "--jobs", "2",
+        ])
+
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "out" / "library" / "setup.py").read_text() == "Library"
+
+
+def test_generate_batch_duplicate_names(tmp_path):
+    requests = [
+        write_request(tmp_path / "a" / "library.pb", "A"),
+        write_request(tmp_path / "b" / "library.pb", "B"),
+    ]
+    with mock.patch.object(generate_batch, "generate_response") as generate:
+        result = CliRunner().invoke(generate_batch.generate_batch, [
+            *requests, "--output-dir", str(tmp_path / "out"),
+        ])
+
+    assert result.exit_code == 2
+    assert "would both be written to" in result.output
+    generate.assert_not_called()
+    assert not (tmp_path / "out").exists()
@@ -0,0 +1,110 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import socket
+import stat
+import threading
+from unittest import mock
+
+from click.testing import CliRunner
+
+from google.protobuf.compiler.plugin_pb2 import CodeGeneratorRequest
+from google.protobuf.compiler.plugin_pb2 import CodeGeneratorResponse
+
+from gapic.cli import forward
+from gapic.cli import serve
+
+
+def fake_generate_response(req, bytecode_cache):
+    # Read the file named by the request, relative to the working directory.
+    with open(req.parameter) as f:
+        content = f.read()
+    return CodeGeneratorResponse(file=[
+        CodeGeneratorResponse.File(name=os.getcwd(), content=content),
+    ])
+
+
+def handle_one(server, request):
+    thread = threading.Thread(target=server.handle_request)
+    thread.start()
+    try:
+        return CodeGeneratorResponse.FromString(
+            forward._forward(server.server_address, request.SerializeToString()),
+        )
+    finally:
+        thread.join()
+
+
+def test_server_uses_client_directory(tmp_path, monkeypatch):
+    client_dir = tmp_path / "client"
+    client_dir.mkdir()
+    (client_dir / "service.yaml").write_text("name: hail.example.com\n")
+    monkeypatch.chdir(client_dir)
+
+    with mock.patch.object(serve, "generate_response", fake_generate_response), \
+            serve.Server(str(tmp_path / "gapic.sock"), str(tmp_path / "cache"), ()) as server:
+        res = handle_one(server, CodeGeneratorRequest(parameter="service.yaml"))
+
+    assert not res.error
+    assert res.file[0].name == str(client_dir)
+    assert res.file[0].content == "name: hail.example.com\n"
+
+    # Requests are handled in forked processes, so the server stays put.
+    assert os.getcwd() == str(client_dir)
+
+
+def test_server_reports_errors(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with mock.patch.object(serve, "generate_response", fake_generate_response), \
+            serve.Server(str(tmp_path / "gapic.sock"), str(tmp_path / "cache"), ()) as server:
+        res = handle_one(server, CodeGeneratorRequest(parameter="missing.yaml"))
+    assert "FileNotFoundError" in res.error
+
+
+def test_server_compiles_templates(tmp_path):
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    (templates / "foo.py.j2").write_text("Foo")
+    with serve.Server(str(tmp_path / "gapic.sock"), str(tmp_path / "cache"), (str(templates),)):
+        assert len(list((tmp_path / "cache").iterdir())) == 1
+
+
+def test_server_socket_is_private(tmp_path):
+    with serve.Server(str(tmp_path / "gapic.sock"), str(tmp_path / "cache"), ()):
+        assert stat.S_IMODE(os.stat(tmp_path / "gapic.sock").st_mode) == 0o600
+
+
+def test_serve_refuses_busy_socket(tmp_path):
+    socket_path = str(tmp_path / "gapic.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(socket_path)
+        sock.listen()
+        result = CliRunner().invoke(serve.serve, ["--socket", socket_path])
+    assert result.exit_code == 1
+    assert "already listening" in result.output
+
+
+def test_serve_replaces_stale_socket(tmp_path):
+    socket_path = str(tmp_path / "gapic.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(socket_path)
+
+    with mock.patch.object(serve.Server, "serve_forever", side_effect=KeyboardInterrupt):
+        result = CliRunner().invoke(serve.serve, [
+            "--socket", socket_path, "--templates", str(tmp_path),
+        ])
+    assert result.exit_code == 0, result.output
+    assert f"Listening on {socket_path}." in result.output
+    assert not os.path.exists(socket_path)
@@ -0,0 +1,119 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import subprocess
+import sys
+import zipfile
+from textwrap import dedent
+from unittest import mock
+
+from click.testing import CliRunner
+
+from gapic.cli import worker
+from gapic.generator import generator
+
+
+def make_protoc(tmp_path, status=0):
+    """Write a fake protoc, which records how it was run in its output."""
+    protoc = tmp_path / "protoc"
+    protoc.write_text(dedent(f"""\
+        #!{sys.executable}
+        import json, os, sys, zipfile
+        out = [a for a in sys.argv if a.startswith('--python_gapic_out=')][0]
+        with zipfile.ZipFile(out.split('=', 1)[1], 'w') as z:
+            z.writestr('run.json', json.dumps({{
+                'args': sys.argv[1:],
+                'socket': os.environ.get('GAPIC_GENERATOR_SOCKET'),
+            }}))
+        print('Generated.')
+        sys.exit({status})
+    """))
+    protoc.chmod(0o755)
+    return str(protoc)
+
+
+def read_run(srcjar):
+    with zipfile.ZipFile(srcjar) as z:
+        return json.loads(z.read("run.json"))
+
+
+def test_worker_single_request(tmp_path, monkeypatch):
+    monkeypatch.setenv("GAPIC_GENERATOR_SOCKET", "gapic.sock")
+    (tmp_path / "args").write_text("--opt\ntransport=rest\nfoo.proto\n")
+    srcjar = tmp_path / "out.srcjar"
+
+    result = CliRunner().invoke(worker.worker, [
+        "--protoc", make_protoc(tmp_path), "--output", str(srcjar),
+        "--proto_path", "protos", f"@{tmp_path / 'args'}",
+    ])
+
+    assert result.exit_code == 0, result.output
+    assert "Generated." in result.output
+    run = read_run(srcjar)
+    assert run["args"][-3:] == [
+        "--python_gapic_opt=transport=rest", "--proto_path=protos", "foo.proto",
+    ]
+    # Without a server, the plugin generates in its own process.
+    assert run["socket"] is None
+
+
+def test_worker_single_request_failure(tmp_path):
+    result = CliRunner().invoke(worker.worker, [
+        "--protoc", make_protoc(tmp_path, status=3),
+        "--output", str(tmp_path / "out.srcjar"), "foo.proto",
+    ])
+    assert result.exit_code == 1
+    assert "protoc exited with status 3." in result.output
+
+
+def test_worker_single_request_error(tmp_path):
+    result = CliRunner().invoke(worker.worker, [
+        "--protoc", str(tmp_path / "missing"),
+        "--output", str(tmp_path / "out.srcjar"), "foo.proto",
+    ])
+    assert result.exit_code == 1
+    assert "FileNotFoundError" in result.output
+
+
+def test_persistent_worker(tmp_path):
+    protoc = make_protoc(tmp_path)
+    requests = [
+        {"arguments": ["--protoc", protoc, "--output", str(tmp_path / "a.srcjar"), "a.proto"]},
+        {"arguments": ["--protoc", protoc, "--output", str(tmp_path / "b.srcjar"), "b.proto"],
+         "requestId": 2},
+    ]
+
+    with mock.patch.object(generator.Generator, "compile_templates", return_value=0):
+        result = CliRunner().invoke(
+            worker.worker, ["--persistent_worker"],
+            input="".join(json.dumps(r) + "\n" for r in requests),
+        )
+
+    assert result.exit_code == 0, result.output
+    responses = [json.loads(line) for line in result.stdout.splitlines()]
+    assert sorted((r["requestId"], r["exitCode"]) for r in responses) == [(0, 0), (2, 0)]
+
+    # The plugin forwards its requests to the worker's server.
+    assert read_run(tmp_path / "a.srcjar")["socket"].endswith("gapic.sock")
+    assert read_run(tmp_path / "b.srcjar")["args"][-1] == "b.proto"
+
+
+def test_write_plugin(tmp_path):
+    plugin = str(tmp_path / "plugin")
+    worker._write_plugin(plugin)
+    proc = subprocess.run(
+        [plugin, "--help"], stdout=subprocess.PIPE, text=True, check=True,
+    )
+    assert "--request" in proc.stdout
@@ -0,0 +1,37 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import os
+import tempfile
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def read_only_cache(tmp_path):
+    """Return a cache directory which cannot be written to."""
+    path = tmp_path / "read-only-cache"
+    path.mkdir()
+    path.chmod(0o500)
+    # Root ignores the directory's mode, so make writes fail as they would
+    # for anyone else.
+    refuse_root = (
+        mock.patch.object(tempfile, "mkstemp", side_effect=PermissionError)
+        if os.geteuid() == 0 else contextlib.nullcontext()
+    )
+    with refuse_root:
+        yield path
+    path.chmod(0o700)
@@ -0,0 +1,51 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from unittest import mock
+
+import pytest
+
+from gapic.generator import disk_cache
+
+
+def test_digest():
+    assert disk_cache.digest("a", "b") == disk_cache.digest("a", "b")
+    assert disk_cache.digest("a", "b") != disk_cache.digest("b", "a")
+    # Parts are delimited, so they cannot run into one another.
+    assert disk_cache.digest("ab", "") != disk_cache.digest("a", "b")
+
+
+def test_generator_digest():
+    assert len(disk_cache.generator_digest()) == 64
+
+
+def test_write_atomically(tmp_path):
+    path = tmp_path / "ab" / "abc"
+    disk_cache.write_atomically(path, b"Old")
+    disk_cache.write_atomically(path, b"New")
+    assert path.read_bytes() == b"New"
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_write_atomically_error(tmp_path):
+    with mock.patch.object(os, "replace", side_effect=OSError):
+        with pytest.raises(OSError):
+            disk_cache.write_atomically(tmp_path / "abc", b"New")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_touch_missing(tmp_path):
+    disk_cache.touch(tmp_path / "missing")
+    assert not (tmp_path / "missing").exists()
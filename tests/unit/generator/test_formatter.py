@@ -129,3 +129,33 @@ def test_fix_whitespace_comment():
 
 def test_file_newline_ending():
     assert formatter.fix_whitespace('') == '\n'
+
+
+def test_fix_whitespace_other_whitespace():
+    # Only trailing spaces are removed, unless blank lines are fixed.
+    assert formatter.fix_whitespace(
+        "x = 1\t\n\n\n\ny = 2\t\n\n\n\nclass Foo:\n\tpass \n"
+    ) == "x = 1\t\n\n\n\ny = 2\n\n\nclass Foo:\n\tpass\n"
+
+
+def test_fix_whitespace_start_of_file():
+    assert formatter.fix_whitespace("\n\n\n\n\nclass Foo:") == "\n\n\nclass Foo:\n"
+    assert formatter.fix_whitespace("\n\n\n    foo()") == "\n\n    foo()\n"
+    assert formatter.fix_whitespace("    foo()  ") == "    foo()\n"
+
+
+def test_fix_whitespace_stream():
+    code = textwrap.dedent("""\
+    class JustAClass:
+        def foo(self):
+            pass
+
+
+        def too_far_down(self):
+            pass  \n\n\n
+    """)
+    chunks = [code[i:i + 7] for i in range(0, len(code), 7)]
+    assert "".join(formatter.fix_whitespace_stream(chunks)) == (
+        formatter.fix_whitespace(code)
+    )
+    assert "".join(formatter.fix_whitespace_stream([])) == "\n"
@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 import json
 from textwrap import dedent
 from typing import Mapping
 from unittest import mock
 
 import jinja2
+import pypandoc
 import pytest
 
 from google.api import service_pb2
@@ -25,7 +27,7 @@ from google.protobuf import descriptor_pb2
 from google.protobuf.compiler.plugin_pb2 import CodeGeneratorResponse
 
 from gapic.generator import generator
-from gapic.samplegen_utils import snippet_metadata_pb2, types, yaml
+from gapic.samplegen_utils import snippet_index, snippet_metadata_pb2, types, yaml
 from ..common_types import (DummyApiSchema, DummyField, DummyIdent, DummyNaming, DummyMessage, DummyMessageTypePB,
                           DummyService, DummyMethod, message_factory, enum_factory)
 
@@ -33,6 +35,7 @@ from gapic.schema import api
 from gapic.schema import naming
 from gapic.schema import wrappers
 from gapic.utils import Options
+from gapic.utils import profile
 
 
 def mock_generate_sample(*args, **kwargs):
@@ -53,6 +56,44 @@ def test_custom_template_directory():
     assert g._env.loader.searchpath == ["/templates"]
 
 
+def test_compile_templates_with_bytecode_cache(tmp_path):
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    (templates / "foo.py.j2").write_text("Foo")
+    (templates / "_bar.j2").write_text("Bar")
+    (templates / "README.md").write_text("Not a template.")
+    opts = Options.build(
+        f"python-gapic-templates={templates},"
+        f"python-gapic-bytecode-cache={tmp_path / 'cache'}"
+    )
+
+    assert generator.Generator(opts).compile_templates() == 2
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+    # Later runs load the compiled templates instead of compiling them.
+    g = generator.Generator(opts)
+    with mock.patch.object(g._env, "compile") as compile:
+        assert g._env.get_template("foo.py.j2").render() == "Foo"
+    compile.assert_not_called()
+
+
+def test_read_only_bytecode_cache(tmp_path):
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    (templates / "foo.py.j2").write_text("Foo")
+    opts = Options.build(
+        f"python-gapic-templates={templates},"
+        f"python-gapic-bytecode-cache={tmp_path / 'cache'}"
+    )
+
+    # Templates missing from a cache which cannot be written are compiled.
+    with mock.patch("os.makedirs", side_effect=PermissionError), \
+            mock.patch("tempfile.NamedTemporaryFile", side_effect=PermissionError):
+        g = generator.Generator(opts)
+        assert g._env.get_template("foo.py.j2").render() == "Foo"
+    assert not (tmp_path / "cache").exists()
+
+
 def test_get_response():
     g = make_generator()
     with mock.patch.object(jinja2.FileSystemLoader, "list_templates") as lt:
@@ -73,6 +114,87 @@ def test_get_response():
             assert cgr.file[0].content == "I am a template result.\n"
 
 
+def test_get_response_filter_stats(tmp_path, capsys):
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    (templates / "foo.py.j2").write_text(
+        "{{ 'HailInWales'|snake_case }} {{ 'HailInWales'|snake_case }}"
+    )
+    opts = Options.build(
+        f"python-gapic-templates={templates},python-gapic-filter-stats"
+    )
+    cgr = generator.Generator(opts).get_response(
+        api_schema=make_api(), opts=opts,
+    )
+    assert cgr.file[0].content == "hail_in_wales hail_in_wales\n"
+    stderr = capsys.readouterr().err
+    assert "python-gapic-filter-stats: snake_case: 2 calls, 1 hits (50%)" in stderr
+    assert "python-gapic-filter-stats: rst: 0 calls, 0 hits (0%)" in stderr
+
+
+def test_get_response_profile(tmp_path):
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    (templates / "foo.py.j2").write_text("{{ 'HailInWales'|snake_case }}")
+    report = tmp_path / "profile.json"
+    opts = Options.build(
+        f"python-gapic-templates={templates},python-gapic-profile={report}"
+    )
+    with profile.profiling(opts.profile):
+        cgr = generator.Generator(opts).get_response(
+            api_schema=make_api(), opts=opts,
+        )
+    assert cgr.file[0].content == "hail_in_wales\n"
+
+    trace = json.loads(report.read_text())
+    assert [e["name"] for e in trace["traceEvents"]] == ["generate", "foo.py.j2"]
+    assert trace["traceEvents"][1]["args"]["file"] == "foo.py"
+    assert trace["functions"]["filter:snake_case"]["calls"] == 1
+
+
+def test_docstrings():
+    def doc(text):
+        return mock.Mock(meta=mock.Mock(doc=text))
+
+    field = doc("A field.")
+    message = doc("A message.")
+    message.fields = {"field": field}
+    enum = doc("An enum.")
+    enum.values = [doc("A value.")]
+    method = doc("A method.")
+    service = doc("A service.")
+    service.methods = {"Method": method}
+    api_schema = mock.Mock(
+        messages={"Message": message},
+        enums={"Enum": enum},
+        services={"Service": service},
+    )
+    assert list(generator._docstrings(api_schema)) == [
+        "A message.", "A field.", "An enum.", "A value.", "A service.",
+        "A method.",
+    ]
+
+
+def test_get_response_rst_cache(tmp_path, capsys):
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    (templates / "foo.py.j2").write_text("{{ 'The _hail_'|rst }}")
+    opts = Options.build(
+        f"python-gapic-templates={templates},"
+        f"python-gapic-rst-cache={tmp_path / 'cache'}"
+    )
+    with mock.patch.object(pypandoc, "convert_text", return_value="The *hail*"):
+        for _ in range(2):
+            cgr = generator.Generator(opts).get_response(
+                api_schema=make_api(), opts=opts,
+            )
+            assert cgr.file[0].content == "The *hail*\n"
+    assert capsys.readouterr().err.splitlines() == [
+        "python-gapic-rst-cache: 0 hits, 1 misses, 0 unreadable, 0 evicted",
+        "python-gapic-rst-cache: 1 hits, 0 misses, 0 unreadable, 0 evicted",
+    ]
+
+
 def test_get_response_ignores_empty_files():
     g = make_generator()
     with mock.patch.object(jinja2.FileSystemLoader, "list_templates") as lt:
@@ -305,6 +427,145 @@ def test_get_response_divides_subpackages():
             }
 
 
+def test_get_response_parallel_matches_serial(tmp_path):
+    templates = {
+        "foo/%sub/types/%proto.py.j2": "Proto: {{ proto.module_name }}",
+        "foo/%sub/services/%service.py.j2": "Service: {{ service.name }}",
+        "foo/%sub/__init__.py.j2": "Subpackage: {{ '.'.join(api.subpackage_view) }}",
+    }
+    for template_name, content in templates.items():
+        template_path = tmp_path / template_name
+        template_path.parent.mkdir(parents=True, exist_ok=True)
+        template_path.write_text(content)
+
+    api_schema = api.API.build(
+        [
+            descriptor_pb2.FileDescriptorProto(
+                name="top.proto",
+                package="foo.v1",
+                service=[descriptor_pb2.ServiceDescriptorProto(name="Top")],
+            ),
+            descriptor_pb2.FileDescriptorProto(
+                name="a/spam/ham.proto",
+                package="foo.v1.spam",
+                service=[descriptor_pb2.ServiceDescriptorProto(name="Bacon")],
+            ),
+        ],
+        package="foo.v1",
+    )
+    opt_string = f"autogen-snippets=false,python-gapic-templates={tmp_path}"
+
+    serial_opts = Options.build(opt_string)
+    serial = generator.Generator(serial_opts).get_response(
+        api_schema=api_schema, opts=serial_opts)
+
+    parallel_opts = Options.build(f"{opt_string},python-gapic-jobs=2")
+    assert parallel_opts.jobs == 2
+    parallel = generator.Generator(parallel_opts).get_response(
+        api_schema=api_schema, opts=parallel_opts)
+
+    assert len(parallel.file) == 6
+    assert parallel.SerializeToString() == serial.SerializeToString()
+
+
+def test_get_response_renders_each_file_once(tmp_path):
+    # Without a version, `%name` and `%name_%version` are the same directory.
+    templates = {
+        "%name/x.py.j2": "First",
+        "%name/y.py.j2": "Between",
+        "%name_%version/x.py.j2": "Last",
+        "%name_%version/y.py.j2": "# Empty",
+    }
+    for template_name, content in templates.items():
+        template_path = tmp_path / template_name
+        template_path.parent.mkdir(parents=True, exist_ok=True)
+        template_path.write_text(content)
+
+    opts = Options.build(f"python-gapic-templates={tmp_path}")
+    cgr = generator.Generator(opts).get_response(
+        api_schema=make_api(naming=make_naming(version="")), opts=opts,
+    )
+    # The last rendering which is not empty wins, in the place of the first.
+    assert [(f.name, f.content) for f in cgr.file] == [
+        ("hatstand/x.py", "Last\n"),
+        ("hatstand/y.py", "Between\n"),
+    ]
+
+
+@pytest.mark.parametrize("opt_string", ["", ",python-gapic-jobs=2"])
+def test_write_response(tmp_path, opt_string):
+    templates = tmp_path / "templates"
+    (templates / "foo").mkdir(parents=True)
+    (templates / "foo" / "%service.py.j2").write_text(
+        "Service: {{ service.name }}\n\n\n\n\nclass Foo:  \n    pass"
+    )
+    (templates / "foo" / "empty.py.j2").write_text("")
+    (templates / "foo" / "py.typed.j2").write_text("")
+
+    api_schema = api.API.build(
+        [
+            descriptor_pb2.FileDescriptorProto(
+                name="foo.proto",
+                package="foo.v1",
+                service=[
+                    descriptor_pb2.ServiceDescriptorProto(name="Bacon"),
+                    descriptor_pb2.ServiceDescriptorProto(name="Eggs"),
+                ],
+            ),
+        ],
+        package="foo.v1",
+    )
+    opts = Options.build(
+        f"autogen-snippets=false,python-gapic-templates={templates}{opt_string}"
+    )
+    output = io.BytesIO()
+    generator.Generator(opts).write_response(api_schema, opts, output)
+
+    res = generator.Generator(opts).get_response(api_schema, opts)
+    assert [f.name for f in res.file] == ["foo/bacon.py", "foo/eggs.py", "foo/py.typed"]
+    assert res.file[0].content == "Service: Bacon\n\n\nclass Foo:\n    pass\n"
+    assert output.getvalue() == res.SerializeToString()
+
+
+def test_render_job_in_worker():
+    g = make_generator()
+    api_schema = make_api(
+        make_proto(descriptor_pb2.FileDescriptorProto(name="a.proto")),
+    )
+    opts = Options.build("")
+    index = snippet_index.SnippetIndex(api_schema)
+    job = generator._RenderJob("foo/%proto.py.j2", (), proto="a.proto")
+
+    with mock.patch.object(generator, "Generator", return_value=g):
+        generator._init_render_worker(api_schema, opts, index)
+    with mock.patch.object(jinja2.Environment, "get_template") as gt:
+        gt.return_value = jinja2.Template("Proto: {{ proto.module_name }}")
+        files = generator._render_job_in_worker(job)
+
+    assert list(files) == ["foo/a.py"]
+    assert files["foo/a.py"].content == "Proto: a\n"
+
+
+def test_render_jobs_in_parallel_without_fork():
+    g = make_generator()
+    api_schema = make_api()
+    opts = Options.build("python-gapic-jobs=2")
+    jobs = [generator._RenderJob("foo/bar.py.j2", ())]
+
+    with mock.patch.object(generator.multiprocessing, "get_all_start_methods", return_value=["spawn"]), \
+            mock.patch.object(generator.multiprocessing, "get_context") as get_context, \
+            mock.patch.object(generator.concurrent.futures, "ProcessPoolExecutor") as executor:
+        executor.return_value.__enter__.return_value.map.return_value = iter([{}])
+        results = list(g._render_jobs_in_parallel(
+            jobs, api_schema=api_schema, opts=opts, snippet_index=None,
+        ))
+
+    get_context.assert_called_once_with()
+    assert executor.call_args.kwargs["mp_context"] == get_context.return_value
+    assert executor.call_args.kwargs["max_workers"] == 1
+    assert results == [{}]
+
+
 def test_get_filename():
     g = make_generator()
     template_name = "%namespace/%name_%version/foo.py.j2"
@@ -225,6 +225,55 @@ def test_options_autogen_snippets_false_for_old_naming():
     assert not options.autogen_snippets
 
 
+def test_options_jobs():
+    opts = Options.build("")
+    assert opts.jobs == 1
+
+    opts = Options.build("python-gapic-jobs=4")
+    assert opts.jobs == 4
+
+
+@pytest.mark.parametrize("jobs", ("four", "0", "-2", ""))
+def test_options_jobs_invalid(jobs):
+    with pytest.raises(ValueError, match="python-gapic-jobs"):
+        Options.build(f"python-gapic-jobs={jobs}")
+
+
+def test_options_bytecode_cache():
+    opts = Options.build("")
+    assert opts.bytecode_cache == ""
+
+    opts = Options.build("python-gapic-bytecode-cache=/tmp/cache")
+    assert opts.bytecode_cache == "/tmp/cache"
+
+
+def test_options_schema_cache():
+    opts = Options.build("")
+    assert opts.schema_cache == ""
+
+    opts = Options.build("python-gapic-schema-cache=/tmp/cache")
+    assert opts.schema_cache == "/tmp/cache"
+
+
+def test_options_rst_cache():
+    opts = Options.build("")
+    assert opts.rst_cache == ""
+
+    opts = Options.build("python-gapic-rst-cache=/tmp/cache")
+    assert opts.rst_cache == "/tmp/cache"
+
+
+def test_options_filter_stats():
+    assert not Options.build("").filter_stats
+    assert Options.build("python-gapic-filter-stats").filter_stats
+
+
+def test_options_profile():
+    assert Options.build("").profile == ""
+    opts = Options.build("python-gapic-profile=/tmp/profile.json")
+    assert opts.profile == "/tmp/profile.json"
+
+
 def test_options_proto_plus_deps():
     opts = Options.build("proto-plus-deps=")
     assert opts.proto_plus_deps == ('',)
@@ -0,0 +1,372 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from textwrap import dedent
+from unittest import mock
+
+import jinja2
+
+from google.longrunning import operations_pb2
+from google.protobuf import descriptor_pb2
+from google.protobuf.compiler.plugin_pb2 import CodeGeneratorResponse
+
+from gapic.generator import generator
+from gapic.generator import render_cache
+from gapic.samplegen import samplegen
+from gapic.samplegen_utils import snippet_index
+from gapic.samplegen_utils import snippet_metadata_pb2
+from gapic.schema import api
+from gapic.utils import Options
+
+
+def test_get_response_uses_cache(tmp_path):
+    templates = {
+        "foo/%sub/types/%proto.py.j2": "Proto: {{ proto.module_name }}",
+        "foo/%sub/services/%service.py.j2": "{% extends '_base.j2' %}",
+        "_base.j2": "Service: {{ service.name }}",
+    }
+    write_templates(tmp_path / "templates", templates)
+    api_schema = make_api()
+    opts = Options.build(
+        "autogen-snippets=false,"
+        f"python-gapic-templates={tmp_path / 'templates'},"
+        f"python-gapic-render-cache={tmp_path / 'cache'}"
+    )
+    assert opts.render_cache == str(tmp_path / "cache")
+
+    first = generator.Generator(opts).get_response(
+        api_schema=api_schema, opts=opts)
+    assert len(first.file) == 3
+
+    # Rendering again with identical inputs never touches the templates.
+    with mock.patch.object(jinja2.Environment, "get_template") as gt:
+        second = generator.Generator(opts).get_response(
+            api_schema=api_schema, opts=opts)
+    gt.assert_not_called()
+    assert second.SerializeToString() == first.SerializeToString()
+
+    # Changing a template that is only extended re-renders what uses it.
+    write_templates(tmp_path / "templates", {
+        "_base.j2": "Service is {{ service.name }}",
+    })
+    third = generator.Generator(opts).get_response(
+        api_schema=api_schema, opts=opts)
+    contents = {f.name: f.content for f in third.file}
+    assert contents["foo/services/top.py"] == "Service is Top\n"
+    assert contents["foo/types/top.py"] == "Proto: top\n"
+
+
+def test_key_depends_on_slice(tmp_path):
+    cache = make_cache(tmp_path)
+    api_schema = make_api()
+    top = api_schema.protos["top.proto"]
+    ham = api_schema.protos["ham.proto"]
+    service = top.services["foo.v1.Top"]
+
+    def key(schema, **kwargs):
+        return cache.key("foo.j2", "foo.py", api_schema=schema, **kwargs)
+
+    assert key(api_schema) == key(api_schema)
+    assert key(api_schema) != key(api_schema, proto=top)
+    assert key(api_schema, proto=top) != key(api_schema, proto=ham)
+    assert key(api_schema, service=service) != key(api_schema, proto=top)
+
+    # A change to a file outside the slice keeps the key stable, whereas
+    # a change to the file defining a long-running response type does not.
+    changed_ham = make_api(ham_comment="The ham.")
+    assert key(changed_ham, proto=top) == key(api_schema, proto=top)
+    assert key(changed_ham, service=service) != key(
+        api_schema, service=service)
+    assert key(changed_ham) != key(api_schema)
+
+    # Services are visible API-wide, except to per-proto templates.
+    changed_service = make_api(method_name="DoOtherThing")
+    assert key(changed_service, proto=ham) == key(api_schema, proto=ham)
+    assert key(changed_service) != key(api_schema)
+    ham_service = descriptor_pb2.ServiceDescriptorProto(name="Ham")
+    assert key(make_api(ham_services=[ham_service]), service=service) \
+        != key(api_schema, service=service)
+
+
+def test_key_depends_on_snippets(tmp_path):
+    cache = make_cache(tmp_path)
+    api_schema = make_api()
+    service = api_schema.services["foo.v1.Top"]
+
+    def key(snippet, **kwargs):
+        index = snippet_index.SnippetIndex(api_schema)
+        if snippet:
+            metadata = snippet_metadata_pb2.Snippet()
+            metadata.client_method.method.service.short_name = "Top"
+            metadata.client_method.method.short_name = "DoThing"
+            index.add_snippet(snippet_index.Snippet(snippet, metadata))
+        return cache.key(
+            "foo.j2", "foo.py", api_schema=api_schema, snippets=index, **kwargs)
+
+    assert key("") != key("# [START foo]\n# [END foo]\n", service=service)
+    assert key("", service=service) \
+        != key("# [START foo]\n# [END foo]\n", service=service)
+
+    # Only per-service templates embed snippets.
+    assert key("") == key("# [START foo]\n# [END foo]\n")
+
+
+def test_key_with_missing_dependency(tmp_path):
+    cache = make_cache(tmp_path)
+    api_schema = make_api()
+    top = api_schema.protos["top.proto"]
+
+    with mock.patch.object(render_cache, "_dependency_closure", return_value=None):
+        assert cache.key("foo.j2", "foo.py", api_schema=api_schema, proto=top) \
+            == cache.key("foo.j2", "foo.py", api_schema=api_schema)
+
+    # Services whose types cannot be traced back to a file fall back too.
+    missing = mock.Mock(package=("missing",), module="missing")
+    service = mock.Mock(meta=mock.Mock(address=missing), methods={})
+    assert cache.key("foo.j2", "foo.py", api_schema=api_schema, service=service) \
+        == cache.key("foo.j2", "foo.py", api_schema=api_schema)
+
+
+def test_dependency_closure():
+    api_schema = make_api()
+    assert render_cache._dependency_closure(
+        api_schema.all_protos, ["top.proto"]) == {"top.proto", "ops.proto"}
+    assert render_cache._dependency_closure(
+        api_schema.all_protos, ["nope.proto"]) is None
+
+
+def test_key_with_dynamic_reference(tmp_path):
+    write_templates(tmp_path / "templates", {
+        "foo.j2": "{% include name %}",
+        "bar.j2": "Bar",
+    })
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(str(tmp_path / "templates")))
+    cache = render_cache.RenderCache(
+        str(tmp_path / "cache"), env, Options.build(""))
+    api_schema = make_api()
+    first = cache.key("foo.j2", "foo.py", api_schema=api_schema)
+    assert cache.key("bar.j2", "bar.py", api_schema=api_schema) != first
+
+    # Any template at all could be included, so every template counts.
+    write_templates(tmp_path / "templates", {"bar.j2": "Baz"})
+    cache = render_cache.RenderCache(
+        str(tmp_path / "cache"), env, Options.build(""))
+    assert cache.key("foo.j2", "foo.py", api_schema=api_schema) != first
+
+
+def test_key_depends_on_options(tmp_path, fs):
+    config = dedent("""\
+        type: com.google.api.codegen.samplegen.v1p2.SampleConfigProto
+        schema_version: 1.2.0
+        samples:
+        - id: sample
+    """)
+    fs.create_file("samples.yaml", contents=config)
+    env = mock.Mock()
+
+    def base_digest(opt_string):
+        # Pandoc cannot be run in the fake filesystem.
+        with mock.patch.object(render_cache, "_toolchain_digest", return_value=""):
+            cache = render_cache.RenderCache(
+                str(tmp_path), env, Options.build(opt_string))
+        return cache._base_digest
+
+    assert base_digest("") == base_digest("python-gapic-jobs=4")
+    assert base_digest("") != base_digest("transport=rest")
+    assert base_digest("") != base_digest("samples=samples.yaml")
+
+    samples = base_digest("samples=samples.yaml")
+    fs.get_object("samples.yaml").set_contents(f"{config}# Changed.\n")
+    assert base_digest("samples=samples.yaml") != samples
+
+
+def test_key_depends_on_toolchain(tmp_path):
+    def base_digest(pandoc_version):
+        render_cache._toolchain_digest.cache_clear()
+        with mock.patch("pypandoc.get_pandoc_version", return_value=pandoc_version):
+            cache = render_cache.RenderCache(
+                str(tmp_path), mock.Mock(), Options.build(""))
+        render_cache._toolchain_digest.cache_clear()
+        return cache._base_digest
+
+    assert base_digest("3.1.3") == base_digest("3.1.3")
+    assert base_digest("3.1.3") != base_digest("3.5")
+
+
+def test_get_and_put(tmp_path):
+    cache = make_cache(tmp_path)
+    cgr_file = CodeGeneratorResponse.File(name="foo.py", content="foo\n")
+
+    assert cache.get("abcdef") is None
+    cache.put("abcdef", cgr_file)
+    assert cache.get("abcdef") == cgr_file
+    assert (tmp_path / "cache" / "ab" / "abcdef").exists()
+
+    # Unreadable entries are treated as missing.
+    (tmp_path / "cache" / "ab" / "abcdef").write_bytes(b"\xff")
+    assert cache.get("abcdef") is None
+
+
+def test_get_and_put_sample(tmp_path):
+    cache = make_cache(tmp_path)
+    metadata = snippet_metadata_pb2.Snippet(region_tag="foo")
+
+    assert cache.get_sample("abcdef") is None
+    cache.put_sample("abcdef", "sample\n", metadata)
+    assert cache.get_sample("abcdef") == ("sample\n", metadata)
+
+    # A sample without its metadata is treated as missing.
+    (tmp_path / "cache" / "ab" / "abcdef-metadata").unlink()
+    assert cache.get_sample("abcdef") is None
+
+
+def test_prune(tmp_path):
+    cache = render_cache.RenderCache(
+        str(tmp_path / "cache"), mock.Mock(), Options.build(""), max_size=40)
+    metadata = snippet_metadata_pb2.Snippet(region_tag="foo")
+    old, older, sample = "a" * 64, "b" * 64, "c" * 64
+    cache.put(old, CodeGeneratorResponse.File(name="old.py", content="old\n"))
+    cache.put(older, CodeGeneratorResponse.File(name="older.py", content="older\n"))
+    cache.put_sample(sample, "sample\n", metadata)
+    for key, mtime in ((older, 0), (old, 1), (sample, 2), (f"{sample}-metadata", 2)):
+        os.utime(cache._entry_path(key), (mtime, mtime))
+
+    # Reading entries marks them as recently used.
+    assert cache.get(old).content == "old\n"
+    assert cache.get_sample(sample) == ("sample\n", metadata)
+
+    assert cache.prune() == 1
+    assert cache.get(older) is None
+    assert cache.get(old).content == "old\n"
+    assert cache.get_sample(sample) == ("sample\n", metadata)
+
+
+def test_get_response_prunes_cache(tmp_path):
+    write_templates(tmp_path / "templates", {"foo/%sub/types/%proto.py.j2": "Proto"})
+    opts = Options.build(
+        "autogen-snippets=false,"
+        f"python-gapic-templates={tmp_path / 'templates'},"
+        f"python-gapic-render-cache={tmp_path / 'cache'}"
+    )
+    with mock.patch.object(render_cache.RenderCache, "prune") as prune:
+        generator.Generator(opts).get_response(api_schema=make_api(), opts=opts)
+    prune.assert_called_once_with()
+
+
+def test_get_response_read_only_cache(tmp_path, read_only_cache):
+    write_templates(tmp_path / "templates", {"foo/%sub/types/%proto.py.j2": "Proto"})
+    opts = Options.build(
+        "autogen-snippets=false,"
+        f"python-gapic-templates={tmp_path / 'templates'},"
+        f"python-gapic-render-cache={read_only_cache}"
+    )
+    for _ in range(2):
+        cgr = generator.Generator(opts).get_response(api_schema=make_api(), opts=opts)
+        assert [f.content for f in cgr.file] == ["Proto\n"] * 2
+
+    cache = make_cache(tmp_path)
+    cache._path = read_only_cache
+    cache.put_sample("abcdef", "sample\n", snippet_metadata_pb2.Snippet())
+    assert cache.get_sample("abcdef") is None
+
+
+def test_get_response_caches_samples(tmp_path):
+    write_templates(tmp_path / "templates", {
+        "samplegen/sample.py.j2": "Sample",
+    })
+    opts = Options.build(
+        f"python-gapic-templates={tmp_path / 'templates'},"
+        f"python-gapic-render-cache={tmp_path / 'cache'}"
+    )
+    api_schema = make_api()
+    spec = {"id": "sample", "service": "foo.v1.Top", "rpc": "DoThing"}
+    metadata = snippet_metadata_pb2.Snippet()
+    metadata.client_method.method.service.short_name = "Top"
+    metadata.client_method.method.short_name = "DoThing"
+
+    with mock.patch.object(samplegen, "generate_sample_specs", return_value=[]), \
+            mock.patch.object(samplegen, "parse_handwritten_specs", side_effect=lambda _: [dict(spec)]), \
+            mock.patch.object(samplegen, "generate_sample", return_value=("Sample", metadata)) as gs:
+        first = generator.Generator(opts).get_response(
+            api_schema=api_schema, opts=opts)
+        second = generator.Generator(opts).get_response(
+            api_schema=api_schema, opts=opts)
+
+    gs.assert_called_once()
+    assert second.SerializeToString() == first.SerializeToString()
+    assert "samples/generated_samples/sample.py" in {f.name for f in second.file}
+
+
+def make_cache(tmp_path) -> render_cache.RenderCache:
+    write_templates(tmp_path / "templates", {"foo.j2": "Foo"})
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(str(tmp_path / "templates")))
+    return render_cache.RenderCache(
+        str(tmp_path / "cache"), env, Options.build(""))
+
+
+def make_api(method_name: str = "DoThing", ham_comment: str = "", ham_services=()) -> api.API:
+    method = descriptor_pb2.MethodDescriptorProto(
+        name=method_name,
+        input_type="foo.v1.DoThingRequest",
+        output_type="google.longrunning.Operation",
+    )
+    method.options.Extensions[operations_pb2.operation_info].MergeFrom(
+        operations_pb2.OperationInfo(
+            response_type="foo.v1.Ham",
+            metadata_type="foo.v1.DoThingRequest",
+        ),
+    )
+    ham_location = descriptor_pb2.SourceCodeInfo.Location(
+        path=[4, 0], leading_comments=ham_comment,
+    )
+    return api.API.build(
+        [
+            descriptor_pb2.FileDescriptorProto(
+                name="ops.proto",
+                package="google.longrunning",
+                message_type=[descriptor_pb2.DescriptorProto(name="Operation")],
+            ),
+            descriptor_pb2.FileDescriptorProto(
+                name="ham.proto",
+                package="foo.v1",
+                message_type=[descriptor_pb2.DescriptorProto(name="Ham")],
+                source_code_info=descriptor_pb2.SourceCodeInfo(
+                    location=[ham_location],
+                ),
+                service=ham_services,
+            ),
+            descriptor_pb2.FileDescriptorProto(
+                name="top.proto",
+                package="foo.v1",
+                dependency=["ops.proto"],
+                message_type=[
+                    descriptor_pb2.DescriptorProto(name="DoThingRequest"),
+                ],
+                service=[descriptor_pb2.ServiceDescriptorProto(
+                    name="Top", method=[method],
+                )],
+            ),
+        ],
+        package="foo.v1",
+    )
+
+
+def write_templates(root, templates):
+    for template_name, content in templates.items():
+        template_path = root / template_name
+        template_path.parent.mkdir(parents=True, exist_ok=True)
+        template_path.write_text(content)
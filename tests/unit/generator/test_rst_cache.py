@@ -0,0 +1,158 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pathlib
+import sys
+from unittest import mock
+
+import pypandoc
+
+from gapic import utils
+from gapic.generator import rst_cache
+
+
+def test_get_put(tmp_path):
+    cache = rst_cache.RstCache(str(tmp_path))
+    assert cache.get("The *hail*", 68, "commonmark") is None
+
+    cache.put("The *hail*", 68, "commonmark", "The *hail*.")
+    assert cache.get("The *hail*", 68, "commonmark") == "The *hail*."
+    assert cache.get("The *hail*", 64, "commonmark") is None
+    assert cache.get("The *hail*", 68, "rst") is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_get_unreadable(tmp_path):
+    cache = rst_cache.RstCache(str(tmp_path))
+    path = cache._entry_path("The *hail*", 68, "commonmark")
+    path.parent.mkdir()
+    path.write_bytes(b"\xff")
+    assert cache.get("The *hail*", 68, "commonmark") is None
+
+    path.unlink()
+    path.mkdir()
+    assert cache.get("The *hail*", 68, "commonmark") is None
+    assert (cache.hits, cache.misses, cache.errors) == (0, 0, 2)
+
+
+def test_put_read_only(read_only_cache):
+    cache = rst_cache.RstCache(str(read_only_cache))
+    cache.put("The *hail*", 68, "commonmark", "The *hail*.")
+    assert cache.get("The *hail*", 68, "commonmark") is None
+    assert (cache.hits, cache.misses, cache.errors) == (0, 1, 0)
+
+
+def test_key_includes_pandoc_version(tmp_path):
+    cache = rst_cache.RstCache(str(tmp_path))
+    with mock.patch.object(rst_cache, "_pandoc_version", return_value="1.0"):
+        cache.put("The *hail*", 68, "commonmark", "The *hail*.")
+        assert cache.get("The *hail*", 68, "commonmark") == "The *hail*."
+    with mock.patch.object(rst_cache, "_pandoc_version", return_value="2.0"):
+        assert cache.get("The *hail*", 68, "commonmark") is None
+
+
+def test_prune(tmp_path):
+    cache = rst_cache.RstCache(str(tmp_path), max_size=10)
+    for text in ("old", "older", "new"):
+        cache.put(text, 68, "commonmark", "12345")
+    paths = {
+        text: cache._entry_path(text, 68, "commonmark")
+        for text in ("old", "older", "new")
+    }
+    os.utime(paths["older"], (0, 0))
+    os.utime(paths["old"], (1, 1))
+
+    # Reading an entry marks it as recently used.
+    assert cache.get("old", 68, "commonmark") == "12345"
+
+    # Files being written concurrently are left alone.
+    partial = paths["new"].parent / "tmp1234"
+    partial.write_text("12345")
+
+    assert cache.prune() == 1
+    assert not paths["older"].exists()
+    assert paths["old"].exists()
+    assert paths["new"].exists()
+    assert partial.exists()
+    assert cache.prune() == 0
+
+
+def test_get_evicted_concurrently(tmp_path):
+    cache = rst_cache.RstCache(str(tmp_path))
+    cache.put("The *hail*", 68, "commonmark", "The *hail*.")
+    with mock.patch.object(os, "utime", side_effect=FileNotFoundError):
+        assert cache.get("The *hail*", 68, "commonmark") == "The *hail*."
+
+
+def test_prune_everything(tmp_path):
+    cache = rst_cache.RstCache(str(tmp_path), max_size=0)
+    for text in ("old", "older", "new"):
+        cache.put(text, 68, "commonmark", "12345")
+    assert cache.prune() == 3
+
+
+def test_prune_errors(tmp_path):
+    cache = rst_cache.RstCache(str(tmp_path), max_size=0)
+    cache.put("old", 68, "commonmark", "12345")
+
+    # Entries removed by another run, even as they are found, are skipped.
+    path = cache._entry_path("older", 68, "commonmark")
+    path.parent.mkdir(exist_ok=True)
+    path.symlink_to(tmp_path / "missing")
+    with mock.patch.object(pathlib.Path, "unlink", side_effect=OSError):
+        assert cache.prune() == 0
+    assert cache.get("old", 68, "commonmark") == "12345"
+
+
+def test_rst_uses_cache(tmp_path):
+    texts = ["The _hail_ in `Wales`", "The _snails_"]
+    with mock.patch.object(pypandoc, "convert_text") as convert_text:
+        convert_text.side_effect = lambda *a, **kw: a[0].replace("`", "``")
+        cache = rst_cache.RstCache(str(tmp_path))
+        with utils.batch_rst(texts, cache=cache):
+            assert utils.rst(texts[0]) == "The _hail_ in ``Wales``"
+            assert utils.rst("The _rain_ `here`") == "The _rain_ ``here``"
+        assert convert_text.call_count == 2
+        assert cache.hits == 0
+
+        # A later run finds every conversion in the cache.
+        cache = rst_cache.RstCache(str(tmp_path))
+        with utils.batch_rst(texts, cache=cache):
+            assert utils.rst(texts[0]) == "The _hail_ in ``Wales``"
+            assert utils.rst(texts[1]) == "The _snails_"
+            assert utils.rst("The _rain_ `here`") == "The _rain_ ``here``"
+            assert utils.rst("The _rain_ `here`", indent=4) == "The _rain_ ``here``"
+        assert convert_text.call_count == 3
+        assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_rst_looks_texts_up_once(tmp_path):
+    def convert_text(text, *args, **kwargs):
+        # One text swallows the separators, so neither converts in bulk.
+        if "_swallow_" in text:
+            text = text.replace(rst_module._SEPARATOR, "")
+        return text
+
+    rst_module = sys.modules["gapic.utils.rst"]
+    texts = ["The _hail_", "The _swallow_", "The `fast` one"]
+    cache = rst_cache.RstCache(str(tmp_path))
+    with mock.patch.object(pypandoc, "convert_text", side_effect=convert_text), \
+            mock.patch.object(rst_module, "_bullet", return_value="- "):
+        with utils.batch_rst(texts, cache=cache):
+            assert utils.rst(texts[0]) == "The _hail_"
+            assert utils.rst(texts[1]) == "The _swallow_"
+            assert utils.rst(texts[2]) == "The ``fast`` one"
+    # Texts taking the fast path are not cached at all.
+    assert (cache.hits, cache.misses) == (0, 2)
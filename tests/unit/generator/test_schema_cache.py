@@ -0,0 +1,91 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from google.protobuf import descriptor_pb2
+
+from gapic.generator import schema_cache
+from gapic.schema import api
+from gapic.utils import Options
+
+
+def test_build_uses_cache(tmp_path):
+    cache = schema_cache.SchemaCache(str(tmp_path))
+    fds = make_file_descriptors()
+
+    first = cache.build(fds, package="foo.v1")
+    assert list(first.messages) == ["foo.v1.Foo"]
+
+    # Building again with identical inputs loads the snapshot instead.
+    with mock.patch.object(api.API, "build") as build:
+        second = cache.build(fds, package="foo.v1")
+    build.assert_not_called()
+    assert second is not first
+    assert list(second.messages) == ["foo.v1.Foo"]
+    assert second.naming == first.naming
+
+
+def test_key():
+    cache = schema_cache.SchemaCache("cache")
+    fds = make_file_descriptors()
+
+    def key(fds=fds, package="foo.v1", opt_string=""):
+        return cache.key(fds, package=package, opts=Options.build(opt_string))
+
+    assert key() == key()
+    assert key() != key(package="foo")
+    assert key() != key(fds=make_file_descriptors(message_name="Bar"))
+    assert key() != key(opt_string="python-gapic-name=bar")
+
+    # Options that only affect rendering do not invalidate the model.
+    assert key() == key(opt_string="python-gapic-templates=/tmp/templates")
+    assert key() == key(opt_string="python-gapic-render-cache=/tmp/cache")
+    assert key() == key(opt_string="autogen-snippets=false")
+
+
+def test_get_and_put(tmp_path):
+    cache = schema_cache.SchemaCache(str(tmp_path))
+    api_schema = api.API.build(make_file_descriptors(), package="foo.v1")
+
+    assert cache.get("abcdef") is None
+    cache.put("abcdef", api_schema)
+    assert list(cache.get("abcdef").messages) == ["foo.v1.Foo"]
+
+    # Unreadable snapshots are treated as missing.
+    (tmp_path / "ab" / "abcdef.pickle").write_bytes(b"\xff")
+    assert cache.get("abcdef") is None
+
+    # Models too deep to pickle are not stored.
+    with mock.patch("pickle.dumps", side_effect=RecursionError):
+        cache.put("123456", api_schema)
+    assert not (tmp_path / "12").exists()
+
+
+def test_build_read_only(read_only_cache):
+    cache = schema_cache.SchemaCache(str(read_only_cache))
+    fds = make_file_descriptors()
+    for _ in range(2):
+        assert list(cache.build(fds, package="foo.v1").messages) == ["foo.v1.Foo"]
+    assert cache.get(cache.key(fds, package="foo.v1", opts=Options())) is None
+
+
+def make_file_descriptors(message_name: str = "Foo"):
+    return [
+        descriptor_pb2.FileDescriptorProto(
+            name="foo.proto",
+            package="foo.v1",
+            message_type=[descriptor_pb2.DescriptorProto(name=message_name)],
+        ),
+    ]
@@ -0,0 +1,156 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import zipfile
+
+import pytest
+
+from google.protobuf.compiler.plugin_pb2 import CodeGeneratorResponse
+
+from gapic.generator import writer
+
+
+def make_files(contents):
+    return [
+        CodeGeneratorResponse.File(name=name, content=content)
+        for name, content in contents.items()
+    ]
+
+
+def test_write_directory(tmp_path):
+    files = make_files({"foo/bar.py": "Bar\n", "foo/__init__.py": "", "baz.py": "Baz\n"})
+    assert writer.write_directory(files, str(tmp_path)) == [
+        "foo/bar.py", "foo/__init__.py", "baz.py",
+    ]
+    assert (tmp_path / "foo" / "bar.py").read_text() == "Bar\n"
+    assert (tmp_path / "foo" / "__init__.py").read_text() == ""
+    assert (tmp_path / "baz.py").read_text() == "Baz\n"
+
+    # Unchanged files are left alone, including their modification times.
+    os.utime(tmp_path / "foo" / "bar.py", (0, 0))
+    (tmp_path / "baz.py").write_text("Bad\n")
+    files = make_files({"foo/bar.py": "Bar\n", "foo/__init__.py": "", "baz.py": "Baz\n"})
+    assert writer.write_directory(files, str(tmp_path)) == ["baz.py"]
+    assert (tmp_path / "foo" / "bar.py").stat().st_mtime == 0
+    assert (tmp_path / "baz.py").read_text() == "Baz\n"
+
+    # Files which are no longer generated are removed.
+    files = make_files({"foo/bar.py": "Bar, bar\n"})
+    assert writer.write_directory(files, str(tmp_path)) == [
+        "foo/bar.py", "baz.py", "foo/__init__.py",
+    ]
+    assert (tmp_path / "foo" / "bar.py").read_text() == "Bar, bar\n"
+    assert sorted(os.listdir(tmp_path)) == [writer.MANIFEST, "foo"]
+    assert os.listdir(tmp_path / "foo") == ["bar.py"]
+
+
+def test_write_directory_removes_stale_files(tmp_path):
+    (tmp_path / "README.md").write_text("Not generated.\n")
+    files = make_files({"a/b/c.py": "C\n", "a/d.py": "D\n", "e.py": "E\n"})
+    writer.write_directory(files, str(tmp_path))
+
+    # Directories left empty are removed; other files are left alone.
+    (tmp_path / "e.py").unlink()
+    files = make_files({"a/d.py": "D\n"})
+    assert writer.write_directory(files, str(tmp_path)) == ["a/b/c.py", "e.py"]
+    assert sorted(os.listdir(tmp_path)) == [writer.MANIFEST, "README.md", "a"]
+    assert os.listdir(tmp_path / "a") == ["d.py"]
+
+    # The manifest is only rewritten when the files change.
+    os.utime(tmp_path / writer.MANIFEST, (0, 0))
+    assert writer.write_directory(files, str(tmp_path)) == []
+    assert (tmp_path / writer.MANIFEST).stat().st_mtime == 0
+
+    assert writer.write_directory([], str(tmp_path)) == ["a/d.py"]
+    assert sorted(os.listdir(tmp_path)) == [writer.MANIFEST, "README.md"]
+
+
+def test_write_directory_tampered_manifest(tmp_path):
+    out = tmp_path / "out"
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "keep.txt").write_text("Keep\n")
+    out.mkdir()
+    (out / "link").symlink_to(outside)
+    (out / "foo.py").write_text("Foo\n")
+    (out / writer.MANIFEST).write_text("\n".join([
+        "../outside/keep.txt",
+        str(outside / "keep.txt"),
+        "link/keep.txt",
+        "bar/../../outside/keep.txt",
+        ".",
+        "foo.py",
+    ]) + "\n")
+
+    # Only the name which is inside the directory is removed.
+    assert writer.write_directory([], str(out)) == ["foo.py"]
+    assert (outside / "keep.txt").read_text() == "Keep\n"
+    assert sorted(os.listdir(out)) == [writer.MANIFEST, "link"]
+
+
+def test_write_directory_permissions(tmp_path):
+    writer.write_directory(make_files({"foo.py": "Foo\n"}), str(tmp_path))
+    (tmp_path / "bar.py").write_text("Bar\n")
+    # Files are written atomically, but not with a temporary file's mode.
+    assert (tmp_path / "foo.py").stat().st_mode == (tmp_path / "bar.py").stat().st_mode
+
+
+def test_write_srcjar(tmp_path):
+    srcjar = tmp_path / "foo.srcjar"
+    files = make_files({"foo/bar.py": "Bar\n", "baz.py": "Baz\n"})
+    assert writer.write_srcjar(files, str(srcjar)) == ["foo/bar.py", "baz.py"]
+    with zipfile.ZipFile(srcjar) as z:
+        assert z.namelist() == ["foo/bar.py", "baz.py"]
+        assert z.read("foo/bar.py") == b"Bar\n"
+        assert z.getinfo("baz.py").date_time == (1980, 1, 1, 0, 0, 0)
+
+    # An unchanged srcjar is not rewritten.
+    os.utime(srcjar, (0, 0))
+    files = make_files({"baz.py": "Baz\n", "foo/bar.py": "Bar\n"})
+    assert writer.write_srcjar(files, str(srcjar)) == []
+    assert srcjar.stat().st_mtime == 0
+    assert os.listdir(tmp_path) == ["foo.srcjar"]
+
+    files = make_files({"foo/bar.py": "Bar\n", "baz.py": "Baz, baz\n"})
+    assert writer.write_srcjar(files, str(srcjar)) == ["baz.py"]
+    with zipfile.ZipFile(srcjar) as z:
+        assert z.read("baz.py") == b"Baz, baz\n"
+
+    # Removing a file changes the srcjar too, and is reported.
+    files = make_files({"foo/bar.py": "Bar\n"})
+    assert writer.write_srcjar(files, str(srcjar)) == ["baz.py"]
+    with zipfile.ZipFile(srcjar) as z:
+        assert z.namelist() == ["foo/bar.py"]
+
+
+def test_write_srcjar_replaces_invalid_zip(tmp_path):
+    srcjar = tmp_path / "foo.srcjar"
+    srcjar.write_text("Not a zip file.")
+    files = make_files({"foo/bar.py": "Bar\n"})
+    assert writer.write_srcjar(files, str(srcjar)) == ["foo/bar.py"]
+    with zipfile.ZipFile(srcjar) as z:
+        assert z.namelist() == ["foo/bar.py"]
+
+
+def test_write_srcjar_failure(tmp_path):
+    srcjar = tmp_path / "foo.srcjar"
+
+    def files():
+        yield from make_files({"foo/bar.py": "Bar\n"})
+        raise ValueError("Rendering failed.")
+
+    with pytest.raises(ValueError):
+        writer.write_srcjar(files(), str(srcjar))
+    assert os.listdir(tmp_path) == []
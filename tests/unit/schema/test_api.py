@@ -13,7 +13,10 @@
 # limitations under the License.
 
 import collections
+import pickle
 import re
+import sys
+from types import MappingProxyType
 from typing import Sequence
 from unittest import mock
 import yaml
@@ -1025,6 +1028,135 @@ def test_prior_protos():
     assert method.meta.doc == 'This is the Ping method.'
 
 
+def test_api_build_dependencies_built_once():
+    fd = (
+        make_file_pb2(
+            name='dep.proto',
+            package='google.dep',
+            messages=(make_message_pb2(name='ImportedMessage', fields=()),),
+        ),
+        make_file_pb2(
+            name='unused.proto',
+            package='google.dep',
+            messages=(make_message_pb2(name='UnusedMessage', fields=()),),
+        ),
+        make_file_pb2(
+            name='foo.proto',
+            package='google.example.v1',
+            messages=(make_message_pb2(name='Foo', fields=(
+                make_field_pb2(name='imported_message', number=1,
+                               type_name='.google.dep.ImportedMessage'),
+            )),),
+        ),
+    )
+
+    with mock.patch.object(api, '_ProtoBuilder', wraps=api._ProtoBuilder) as builder:
+        api_schema = api.API.build(fd, package='google.example.v1')
+
+        # Files being generated are built again once every type is known;
+        # dependencies are built once, when one of their types is first used.
+        built = [c.args[0].name for c in builder.call_args_list]
+        assert built == ['foo.proto', 'dep.proto', 'foo.proto']
+        foo = api_schema.messages['google.example.v1.Foo']
+        assert foo.fields['imported_message'].message.name == 'ImportedMessage'
+
+        # Unused dependencies are still built if asked for.
+        assert 'google.dep.UnusedMessage' in \
+            api_schema.all_protos['unused.proto'].messages
+        assert builder.call_count == 4
+        assert len(api_schema.all_protos['unused.proto'].all_messages) == 1
+    assert api_schema.requires_package(('google', 'dep'))
+    assert not api_schema.requires_package(('google', 'other'))
+
+
+def test_deferred_symbols():
+    message = object()
+    deferred = mock.Mock(building=False)
+    deferred.build.return_value.all_messages = {'foo.Squid': message}
+    symbols = api._DeferredSymbols({'foo.Squid': deferred}, 'all_messages')
+    assert list(symbols) == ['foo.Squid']
+    assert len(symbols) == 1
+    assert symbols['foo.Squid'] is message
+
+    # Names declared by a proto being built are not found yet.
+    deferred.building = True
+    assert 'foo.Squid' not in symbols
+
+
+def test_api_build_long_dependency_chain():
+    # Each dependency uses a message from the one before it. Building each
+    # one as the next one uses it would recurse much deeper than the chain.
+    fd = [
+        make_file_pb2(
+            name=f'dep{i}.proto',
+            package='google.dep',
+            messages=(make_message_pb2(name=f'Dep{i}', fields=(
+                make_field_pb2(name='previous', number=1,
+                               type_name=f'.google.dep.Dep{i - 1}'),
+            ) if i else ()),),
+        )
+        for i in range(sys.getrecursionlimit() // 8)
+    ]
+    fd.append(make_file_pb2(
+        name='foo.proto',
+        package='google.example.v1',
+        messages=(make_message_pb2(name='Foo', fields=(
+            make_field_pb2(name='dep', number=1,
+                           type_name=f'.google.dep.Dep{len(fd) - 1}'),
+        )),),
+    ))
+
+    api_schema = api.API.build(fd, package='google.example.v1')
+    message = api_schema.messages['google.example.v1.Foo']
+    for _ in range(len(fd) - 1):
+        message = message.fields[next(iter(message.fields))].message
+    assert message.name == 'Dep0'
+
+
+def test_symbol_table():
+    def make_proto(name, message_name):
+        return api.Proto.build(make_file_pb2(
+            name=name, package='google.protobuf',
+            messages=(make_message_pb2(name=message_name),),
+            enums=(make_enum_pb2(message_name + 'Enum', 'ZERO'),),
+        ), file_to_generate=False, naming=make_naming())
+
+    first = make_proto('first.proto', 'Empty')
+    second = make_proto('second.proto', 'Empty')
+    other = make_proto('other.proto', 'Other')
+    symbols = api._SymbolTable.build([first, second])
+    symbols.add(other)
+
+    # Where protos define the same name, the first one wins.
+    assert symbols.messages == {
+        'google.protobuf.Empty': first.messages['google.protobuf.Empty'],
+        'google.protobuf.Other': other.messages['google.protobuf.Other'],
+    }
+    assert symbols.enums == {
+        'google.protobuf.EmptyEnum': first.enums['google.protobuf.EmptyEnum'],
+        'google.protobuf.OtherEnum': other.enums['google.protobuf.OtherEnum'],
+    }
+
+    # Types are resolved through the table, rather than the prior protos.
+    service_pb = descriptor_pb2.ServiceDescriptorProto(
+        name='PingService',
+        method=(descriptor_pb2.MethodDescriptorProto(
+            name='Ping',
+            input_type='google.protobuf.Empty',
+            output_type='google.protobuf.Other',
+        ),),
+    )
+    proto = api.Proto.build(
+        make_file_pb2(package='google.example.v1', services=(service_pb,)),
+        file_to_generate=True,
+        naming=make_naming(),
+        prior_symbols=symbols,
+    )
+    method = proto.services['google.example.v1.PingService'].methods['Ping']
+    assert method.input == first.messages['google.protobuf.Empty']
+    assert method.output == other.messages['google.protobuf.Other']
+
+
 def test_lro():
     # Set up a prior proto that mimics google/protobuf/empty.proto
     lro_proto = api.Proto.build(make_file_pb2(
@@ -1643,6 +1775,65 @@ def test_file_level_resources():
     assert actual == expected
 
 
+def test_api_pickle_roundtrip():
+    fdp = make_file_pb2(
+        name="nomenclature.proto",
+        package="nomenclature.linneaen.v1",
+        messages=(
+            make_message_pb2(
+                name="CreateSpeciesRequest",
+                fields=(
+                    make_field_pb2(name='species', number=1, type=9,
+                                   oneof_index=0),
+                    make_field_pb2(name='rank', number=2, type=14,
+                                   type_name='.nomenclature.linneaen.v1.Rank'),
+                ),
+                oneof_decl=(make_oneof_pb2(name='taxon'),),
+            ),
+            make_message_pb2(
+                name="CreateSpeciesResponse",
+            ),
+        ),
+        enums=(
+            make_enum_pb2('Rank', 'SPECIES', 'GENUS'),
+        ),
+        services=(
+            descriptor_pb2.ServiceDescriptorProto(
+                name="SpeciesService",
+                method=(
+                    descriptor_pb2.MethodDescriptorProto(
+                        name="CreateSpecies",
+                        input_type="nomenclature.linneaen.v1.CreateSpeciesRequest",
+                        output_type="nomenclature.linneaen.v1.CreateSpeciesResponse",
+                    ),
+                ),
+            ),
+        ),
+    )
+    resource_definition = fdp.options.Extensions[resource_pb2.resource_definition].add()
+    resource_definition.type = "nomenclature.linnaen.com/Species"
+    resource_definition.pattern.append("families/{family}/species/{species}")
+
+    api_schema = api.API.build([fdp], package='nomenclature.linneaen.v1')
+    actual = pickle.loads(pickle.dumps(api_schema))
+
+    proto = actual.protos['nomenclature.proto']
+    assert proto.name == 'nomenclature.proto'
+    request = proto.messages['nomenclature.linneaen.v1.CreateSpeciesRequest']
+    assert request.name == 'CreateSpeciesRequest'
+    assert request.fields['species'].oneof == 'taxon'
+    assert request.oneofs['taxon'].name == 'taxon'
+    rank = proto.enums['nomenclature.linneaen.v1.Rank']
+    assert [v.name for v in rank.values] == ['SPECIES', 'GENUS']
+    service = actual.services['nomenclature.linneaen.v1.SpeciesService']
+    assert isinstance(service.visible_resources, MappingProxyType)
+    assert service.name == 'SpeciesService'
+    assert service.methods['CreateSpecies'].name == 'CreateSpecies'
+    assert list(service.visible_resources) == [
+        "nomenclature.linnaen.com/Species",
+    ]
+
+
 def test_resources_referenced_but_not_typed(reference_attr="type"):
     fdp = make_file_pb2(
         name="nomenclature.proto",
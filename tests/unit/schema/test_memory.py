@@ -0,0 +1,67 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gc
+import tracemalloc
+
+from google.protobuf import descriptor_pb2
+
+from gapic.schema import api
+from gapic.schema import metadata
+from gapic.schema import wrappers
+
+
+def test_schema_objects_are_slotted():
+    for cls in (
+        metadata.Address,
+        metadata.Metadata,
+        wrappers.EnumType,
+        wrappers.Field,
+        wrappers.MessageType,
+        wrappers.Method,
+    ):
+        assert '__dict__' not in dir(cls), cls
+
+
+def test_memory_per_field():
+    fd = descriptor_pb2.FileDescriptorProto(
+        name='foo/v1/foo.proto',
+        package='foo.v1',
+    )
+    for i in range(50):
+        message = fd.message_type.add(name=f'Message{i}')
+        for j in range(20):
+            if j % 5:
+                message.field.add(name=f'field_{j}', number=j + 1, type=9)
+            else:
+                message.field.add(name=f'message_{j}', number=j + 1, type=11,
+                                  type_name='.foo.v1.Message0')
+
+    # Measure what a built API retains, including what templates typically
+    # compute for every field.
+    gc.collect()
+    tracemalloc.start()
+    try:
+        api_schema = api.API.build([fd], package='foo.v1')
+        for message in api_schema.messages.values():
+            for field in message.fields.values():
+                field.ident
+                field.type
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Each field used to retain about 3.5KB.
+    assert retained / 1000 < 2000
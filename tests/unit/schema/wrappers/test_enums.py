@@ -52,3 +52,9 @@ def test_enum_options_dict():
                      module="mollusca")
     assert isinstance(bivalve.enum_pb.options, descriptor_pb2.EnumOptions)
     assert bivalve.options_dict == {}
+
+
+def test_enum_special_attributes_not_delegated():
+    enum_type = make_enum(name='Color', values=(('RED', 1),))
+    assert enum_type.options == enum_type.enum_pb.options
+    assert not hasattr(enum_type, '__reduce_ex_custom__')
@@ -603,3 +603,9 @@ def test_extended_operation_properties():
 
     assert f.operation_request_field == "squid"
     assert f.operation_response_field == "clam"
+
+
+def test_field_special_attributes_not_delegated():
+    field = make_field(name='my_field', number=1, type='TYPE_BOOL')
+    assert field.json_name == field.field_pb.json_name
+    assert not hasattr(field, '__reduce_ex_custom__')
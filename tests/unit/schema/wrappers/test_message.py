@@ -64,6 +64,39 @@ def test_message_ident_collisions():
     assert message.ident.sphinx == 'foo.v1.bar.Baz'
 
 
+def test_message_with_context_shared():
+    inner = make_message('Inner', package='foo.v1', module='bar')
+    first = make_message('First', fields=(
+        make_field('inner', message=inner),
+    ))
+    second = make_message('Second', fields=(
+        make_field('inner', message=inner),
+    ))
+    first = first.with_context(collisions=frozenset({'bar'}))
+    second = second.with_context(collisions=frozenset({'bar'}))
+
+    # The context reaches fields, and through them the messages they hold.
+    assert str(first.fields['inner'].message.ident) == 'fv_bar.Inner'
+    assert dict(first.fields) == {'inner': first.fields['inner']}
+
+    # Both references to the inner message share a single derivative.
+    assert first.fields['inner'].message is second.fields['inner'].message
+    assert inner.with_context(collisions=frozenset({'bar'})) \
+        is first.fields['inner'].message
+    assert inner.with_context(collisions=frozenset()) \
+        is not first.fields['inner'].message
+
+
+def test_message_with_context_recursive():
+    outer = make_message('Outer', package='foo.v1', module='bar')
+    outer.fields['outer'] = make_field('outer', message=outer)
+    actual = outer.with_context(collisions=frozenset({'bar'}))
+
+    # Circular references are cut rather than followed, and not shared.
+    assert actual.fields['outer'].message.fields['outer'].message is outer
+    assert outer.with_context(collisions=frozenset({'bar'})) is not actual
+
+
 def test_message_pb2_sphinx_ident():
     meta = metadata.Metadata(
         address=metadata.Address(
@@ -472,3 +505,9 @@ def test_extended_operation_request_response_fields():
 
     actual = poll_request.extended_operation_response_fields
     assert actual == expected
+
+
+def test_message_special_attributes_not_delegated():
+    message = make_message('Squid')
+    assert message.options == message.message_pb.options
+    assert not hasattr(message, '__reduce_ex_custom__')
@@ -1017,3 +1017,9 @@ def test_mixin_rule():
         'city': {},
     }
     assert e == m.sample_request
+
+
+def test_method_special_attributes_not_delegated():
+    method = make_method('DoBigThing')
+    assert method.options == method.method_pb.options
+    assert not hasattr(method, '__reduce_ex_custom__')
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import dataclasses
+
 from gapic.utils import cache
 
 
@@ -31,3 +33,61 @@ def test_cached_property():
     assert foo.call_count == 1
     assert foo.bar == 42
     assert foo.call_count == 1
+
+
+def test_cached_property_bypassed():
+    @dataclasses.dataclass(frozen=True)
+    class Foo:
+        calls: list
+
+        @cache.cached_property
+        def bar(self):
+            """The answer."""
+            self.calls.append(self)
+            return 42
+
+    foo = Foo(calls=[])
+    assert Foo.bar.__doc__ == 'The answer.'
+    assert foo.bar == 42
+
+    # The value shadows the property, which is never called again.
+    assert foo.__dict__['bar'] == 42
+    assert foo.bar == 42
+    assert foo.calls == [foo]
+
+
+def test_memoize():
+    calls = []
+
+    @cache.memoize
+    def snake(text, sep='_'):
+        """Make snakes."""
+        calls.append(text)
+        return sep.join(text)
+
+    assert snake.__doc__ == 'Make snakes.'
+    assert snake('ab') == 'a_b'
+    assert snake('ab') == 'a_b'
+    assert snake('ab', sep='-') == 'a-b'
+    assert snake('ab', sep='-') == 'a-b'
+    assert calls == ['ab', 'ab']
+    assert (snake.calls, snake.hits) == (4, 2)
+
+    # Unhashable arguments are never cached.
+    assert snake(['a', 'b']) == 'a_b'
+    assert snake(['a', 'b']) == 'a_b'
+    assert (snake.calls, snake.hits) == (6, 2)
+
+
+def test_memoize_evicts_least_recently_used():
+    calls = []
+
+    def double(n):
+        calls.append(n)
+        return n * 2
+
+    memoized = cache.memoize(double, maxsize=2)
+    for n in (1, 2, 1, 3, 1, 2):
+        memoized(n)
+    # 2 was evicted by 3, as 1 had been used more recently.
+    assert calls == [1, 2, 3, 2]
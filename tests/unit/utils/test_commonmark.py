@@ -0,0 +1,105 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from gapic.utils import commonmark
+
+
+# The expected answers are what pandoc 3 writes.
+@pytest.mark.parametrize('text,columns,expected', [
+    (
+        'The `hail_in` *Wales* falls **mainly** on the snails.',
+        20,
+        'The ``hail_in``\n*Wales* falls\n**mainly** on the\nsnails.',
+    ),
+    (
+        'Code spans are `never broken`.',
+        20,
+        'Code spans are\n``never broken``.',
+    ),
+    (
+        'See [the long docs](https://example.com/a_b) (or not).',
+        20,
+        'See `the long\ndocs <https://example.com/a_b>`__\n(or not).',
+    ),
+    (
+        'Indexed like foo[0] or [Thing][google.example.v1.Thing].',
+        72,
+        'Indexed like foo[0] or [Thing][google.example.v1.Thing].',
+    ),
+    (
+        'Values:\n * `ONE`: the first\n   value.\n * `TWO`',
+        20,
+        'Values:\n\n- ``ONE``: the first\n  value.\n- ``TWO``',
+    ),
+    (
+        '8. eight\n9. nine\n\n10. ten',
+        72,
+        '8.  eight\n\n9.  nine\n\n10. ten',
+    ),
+    (
+        'A paragraph.\n\n\nAnother `one`.',
+        72,
+        'A paragraph.\n\nAnother ``one``.',
+    ),
+    (
+        'The snake_case `names` are [literal].',
+        72,
+        'The snake_case ``names`` are [literal].',
+    ),
+])
+def test_to_rst(text, columns, expected):
+    assert commonmark.to_rst(text, columns) == expected
+
+
+def test_to_rst_bullet():
+    assert commonmark.to_rst('* The hail in Wales falls', 20, bullet='-  ') == (
+        '-  The hail in Wales\n   falls'
+    )
+
+
+@pytest.mark.parametrize('text', [
+    # Escapes, raw HTML and entities.
+    'A `code` \\* star',
+    'A `code` <b>tag</b>',
+    'A `code` &amp; entity',
+    # Markup which needs escaping in RST, or no markup at all.
+    'A `code`s',
+    '_snake_ case',
+    'A stray * star',
+    'Intra*word*',
+    'Double ``code``',
+    # Other blocks.
+    '# A `heading`',
+    'A `heading`\n---',
+    '> A `quote`',
+    '    An indented `block`',
+    '```\nA fenced block\n```',
+    '[ref]: https://example.com\n\nA [ref] `link`',
+    'A `code` ![image](hail.png)',
+    '- An item\n\n  continued',
+    '- A\n- - nested `list`',
+    '1) A `list`',
+    '- A `list`\n\n* Another',
+    ' - A `list`\n- Misaligned',
+    '- A `list`\n# Heading',
+    '- A _list_',
+    'A [https://example.com](https://example.com)',
+    'A [nested [link](https://example.com)]',
+    'A hard  \nbreak `here`',
+    'Non-ASCII `café`',
+])
+def test_to_rst_unsupported(text):
+    assert commonmark.to_rst(text, 72) is None
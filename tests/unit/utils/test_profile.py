@@ -0,0 +1,87 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import tracemalloc
+
+import pytest
+
+from gapic.utils import profile
+
+
+def test_profiling(tmp_path):
+    report = tmp_path / "profile.json"
+    hail = profile.profiled("hail", lambda where: f"The hail in {where}")
+    with profile.profiling(str(report)):
+        with profile.span("outer", "stage"):
+            with profile.span("inner", "template", file="wales.py"):
+                snails = [object() for _ in range(10000)]
+                del snails
+            assert hail("Wales") == "The hail in Wales"
+            assert hail("Spain") == "The hail in Spain"
+    assert not tracemalloc.is_tracing()
+
+    trace = json.loads(report.read_text())
+    events = trace["traceEvents"]
+    assert [(e["name"], e["cat"]) for e in events] == [
+        ("generate", "stage"), ("outer", "stage"), ("inner", "template"),
+    ]
+    assert all(e["ph"] == "X" for e in events)
+    generate, outer, inner = events
+    assert generate["ts"] <= outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["args"]["file"] == "wales.py"
+    assert inner["args"]["peak_memory_kb"] > 100
+    assert outer["args"]["peak_memory_kb"] >= inner["args"]["peak_memory_kb"]
+    assert generate["args"]["peak_memory_kb"] >= outer["args"]["peak_memory_kb"]
+    assert trace["functions"]["hail"]["calls"] == 2
+
+
+def test_profiling_without_memory(tmp_path):
+    report = tmp_path / "profile.json"
+    with profile.profiling(str(report), trace_memory=False):
+        with profile.span("outer", "stage"):
+            assert not tracemalloc.is_tracing()
+
+    events = json.loads(report.read_text())["traceEvents"]
+    assert [e["name"] for e in events] == ["generate", "outer"]
+    assert all("peak_memory_kb" not in e["args"] for e in events)
+    assert all("cpu_ms" in e["args"] for e in events)
+
+
+def test_profiling_disabled(tmp_path):
+    hail = profile.profiled("hail", lambda where: f"The hail in {where}")
+    with profile.profiling(""):
+        with profile.span("outer", "stage"):
+            assert hail("Wales") == "The hail in Wales"
+    assert not tracemalloc.is_tracing()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profiling_failure(tmp_path):
+    report = tmp_path / "profile.json"
+    tracemalloc.start()
+    try:
+        with pytest.raises(ValueError):
+            with profile.profiling(str(report)):
+                with profile.span("outer", "stage"):
+                    raise ValueError("Hail in Wales.")
+
+        # Tracing which was started elsewhere carries on.
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+    events = json.loads(report.read_text())["traceEvents"]
+    assert [e["name"] for e in events] == ["generate", "outer"]
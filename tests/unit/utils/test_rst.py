@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
 from unittest import mock
 
 import pypandoc
@@ -28,7 +29,7 @@ def test_rst_unformatted():
 def test_rst_formatted():
     with mock.patch.object(pypandoc, 'convert_text') as convert_text:
         convert_text.side_effect = lambda *a, **kw: a[0].replace('`', '``')
-        assert utils.rst('The hail in `Wales`') == 'The hail in ``Wales``'
+        assert utils.rst('The _hail_ in `Wales`') == 'The _hail_ in ``Wales``'
         assert convert_text.call_count == 1
         assert convert_text.mock_calls[0][1][1] == 'rst'
         assert convert_text.mock_calls[0][2]['format'] == 'commonmark'
@@ -60,3 +61,129 @@ def test_rst_pad_close_quote():
         s = 'A value, as in "foo"'
         assert utils.rst(s) == s + '.'
         assert convert_text.call_count == 0
+
+
+def test_rst_batch():
+    with mock.patch.object(pypandoc, 'convert_text') as convert_text:
+        convert_text.side_effect = lambda *a, **kw: a[0].replace('`', '``')
+        with utils.batch_rst(['The _hail_ in `Wales`', 'The _snails_', 'Plain']):
+            assert utils.rst('The _hail_ in `Wales`') == 'The _hail_ in ``Wales``'
+            assert utils.rst('The _snails_') == 'The _snails_'
+            assert convert_text.call_count == 1
+
+            # Each width is converted separately.
+            assert utils.rst('The _snails_', indent=4) == 'The _snails_'
+            assert convert_text.call_count == 2
+
+            # Texts outside the batch are converted on their own.
+            assert utils.rst('The _rain_ `here`') == 'The _rain_ ``here``'
+            assert convert_text.call_count == 3
+
+        assert utils.rst('The _snails_') == 'The _snails_'
+        assert convert_text.call_count == 4
+
+
+def test_rst_batch_lazy():
+    texts = iter(['The *hail*'])
+    with mock.patch.object(pypandoc, 'convert_text') as convert_text:
+        with utils.batch_rst(texts):
+            assert utils.rst('The hail in Wales') == 'The hail in Wales'
+        assert convert_text.call_count == 0
+    assert next(texts) == 'The *hail*'
+
+
+def test_rst_batch_unsplittable():
+    def convert_text(text, *args, **kwargs):
+        # An unclosed code block swallows whatever follows it.
+        head, sep, tail = text.partition('```')
+        return head + sep + tail.replace('GAPICDOCSTRINGSEPARATOR', '')
+
+    texts = ['A\n```\nhail', 'In _Wales_', 'The _rain_', 'The _snails_']
+    with mock.patch.object(pypandoc, 'convert_text') as mocked:
+        mocked.side_effect = convert_text
+        with utils.batch_rst(texts):
+            assert [utils.rst(t, nl=False) for t in texts] == texts
+        # The batch is halved until each half converts cleanly; the texts
+        # left over are converted on their own.
+        assert mocked.call_count == 5
+
+
+def test_rst_batch_excluded():
+    with mock.patch.object(pypandoc, 'convert_text') as convert_text:
+        convert_text.side_effect = lambda *a, **kw: a[0]
+        texts = ['An ![image](hail.png)', 'A _[link][wales]_', '[wales]: x']
+        with utils.batch_rst(texts):
+            for text in texts:
+                utils.rst(text)
+        assert convert_text.call_count == 3
+
+
+def test_rst_batch_excluded_rst():
+    with mock.patch.object(pypandoc, 'convert_text') as convert_text:
+        convert_text.side_effect = lambda *a, **kw: a[0]
+        texts = [
+            'The *hail*',
+            'The *snails*',
+            'See `Wales`_',
+            '.. note:: The *rain*',
+            'The *rain*\n==========',
+            'The *GAPICDOCSTRINGSEPARATOR*',
+        ]
+        with utils.batch_rst(texts):
+            for text in texts:
+                utils.rst(text, source_format='rst')
+        # Only the first two are converted together.
+        assert convert_text.call_count == 5
+
+
+def test_rst_batch_other_format():
+    with mock.patch.object(pypandoc, 'convert_text') as convert_text:
+        convert_text.side_effect = lambda *a, **kw: a[0]
+        texts = ['The *hail*', 'The *snails*']
+        with utils.batch_rst(texts):
+            for text in texts:
+                utils.rst(text, source_format='markdown')
+        assert convert_text.call_count == 2
+
+
+def test_rst_fast_path():
+    # The module is shadowed by the function of the same name.
+    rst_module = sys.modules['gapic.utils.rst']
+    with mock.patch.object(pypandoc, 'convert_text') as convert_text, \
+            mock.patch.object(rst_module, '_bullet', return_value='- '):
+        assert utils.rst(
+            'The `hail` in *Wales*\nfalls [mainly](https://snails.example)\n'
+            '\n- on the\n- snails',
+            width=40,
+            indent=4,
+        ) == (
+            'The ``hail`` in *Wales* falls\n'
+            '    `mainly <https://snails.example>`__\n'
+            '    \n'
+            '    - on the\n'
+            '    - snails\n'
+            '    '
+        )
+        assert convert_text.call_count == 0
+
+
+def test_rst_fast_path_unknown_pandoc():
+    rst_module = sys.modules['gapic.utils.rst']
+    with mock.patch.object(pypandoc, 'convert_text') as convert_text, \
+            mock.patch.object(rst_module, '_bullet', return_value=None):
+        convert_text.side_effect = lambda *a, **kw: a[0].replace('`', '``')
+        assert utils.rst('The hail in `Wales`') == 'The hail in ``Wales``'
+        assert convert_text.call_count == 1
+
+
+def test_rst_bullet():
+    rst_module = sys.modules['gapic.utils.rst']
+    for version, bullet in (('2.9.2.1', None), ('2.19.2', '-  '),
+                            ('3.1.3', None), ('3.5', '- '), ('3.9', '- '),
+                            ('3.10', None), ('4.0', None)):
+        with mock.patch.object(pypandoc, 'get_pandoc_version',
+                               return_value=version):
+            assert rst_module._bullet.__wrapped__() == bullet
+    with mock.patch.object(pypandoc, 'get_pandoc_version',
+                           side_effect=OSError):
+        assert rst_module._bullet.__wrapped__() is None
@@ -0,0 +1,115 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import dataclasses
+import pickle
+
+import pytest
+
+from gapic.utils import cached_property
+from gapic.utils import slotted
+
+
+@slotted
+@dataclasses.dataclass(frozen=True)
+class Base:
+    name: str = ''
+
+    def describe(self) -> str:
+        return f'Base {self.name}'
+
+
+@slotted
+@dataclasses.dataclass(frozen=True)
+class Derived(Base):
+    __slots__ = ('extra',)
+
+    size: int = 0
+
+    def describe(self) -> str:
+        return f'{super().describe()} of size {self.size}'
+
+    @cached_property
+    def double(self) -> int:
+        return self.size * 2
+
+
+def test_slotted():
+    derived = Derived(name='foo', size=3)
+    assert not hasattr(derived, '__dict__')
+    assert tuple(Derived.__slots__) == ('extra', 'size', 'double')
+    assert derived == Derived(name='foo', size=3)
+    assert derived.describe() == 'Base foo of size 3'
+    assert derived.double == 6
+    assert dataclasses.replace(derived, size=4).double == 8
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        derived.size = 4
+    with pytest.raises(AttributeError):
+        derived.other = 4
+
+
+def test_slotted_pickle():
+    derived = Derived(name='foo', size=3)
+    object.__setattr__(derived, 'extra', 'bar')
+    assert derived.double == 6
+
+    actual = pickle.loads(pickle.dumps(derived))
+    assert actual == derived
+    assert actual.extra == 'bar'
+    assert actual.double == 6
+
+    # Unset slots stay unset.
+    assert not hasattr(pickle.loads(pickle.dumps(Derived())), 'extra')
+
+
+def test_slotted_cached_property():
+    @slotted
+    @dataclasses.dataclass(frozen=True)
+    class Wrapper:
+        values: dict
+
+        @cached_property
+        def total(self) -> int:
+            calls.append(self)
+            return sum(self.values.values())
+
+        def __getattr__(self, name):
+            return self.values[name]
+
+    calls = []
+    wrapper = Wrapper(values={'a': 1, 'b': 2})
+    assert Wrapper.__slots__['total'] == Wrapper.total.__doc__
+    assert wrapper.total == 3
+    assert wrapper.total == 3
+    assert calls == [wrapper]
+
+    # Other names are still delegated.
+    assert wrapper.a == 1
+    with pytest.raises(KeyError):
+        wrapper.c
+    with pytest.raises(AttributeError):
+        Derived().other
+
+
+def test_slotted_classmethod():
+    @slotted
+    @dataclasses.dataclass(frozen=True)
+    class Named(Base):
+        @classmethod
+        def build(cls, name: str) -> 'Base':
+            return super().__new__(cls)
+
+    # `super()` refers to the slotted class, not the original.
+    assert type(Named.build('foo')) is Named